@@ -3,8 +3,9 @@ AFASA domain package for modelling Anti-Financial Account Scamming Act
 processes, rules, and services inside the demo backend.
 """
 
-from .models import AfasaDisputedTransaction, AfasaVerificationEvent, AfasaMoneyMuleFlag
+from .models import AfasaDisputedTransaction, AfasaDisputeRollup, AfasaVerificationEvent, AfasaMoneyMuleFlag
 from .rules import evaluate_afasa_risk
+from .rollups import dispute_summary, dispute_trends, rebuild_dispute_rollups
 from .services import (
     initiate_disputed_transaction,
     apply_temporary_hold,
@@ -15,6 +16,7 @@ from .services import (
 
 __all__ = [
     "AfasaDisputedTransaction",
+    "AfasaDisputeRollup",
     "AfasaVerificationEvent",
     "AfasaMoneyMuleFlag",
     "evaluate_afasa_risk",
@@ -23,4 +25,7 @@ __all__ = [
     "release_or_restitute_funds",
     "auto_enforce_max_hold_period",
     "add_verification_event",
+    "dispute_summary",
+    "dispute_trends",
+    "rebuild_dispute_rollups",
 ]
@@ -4,6 +4,7 @@ from sqlalchemy import (
     Integer,
     String,
     Enum,
+    Date,
     DateTime,
     ForeignKey,
     Boolean,
@@ -36,8 +37,8 @@ class AfasaDisputedTransaction(Base):
     amount = Column(Numeric(18, 2), nullable=True)
     currency = Column(String(10), nullable=True)
     reason_category = Column(Enum(*REASON_CATEGORIES, name="afasa_reason_category", create_constraint=False), nullable=False)
-    suspicion_type = Column(Enum(*SUSPICION_TYPES, name="afasa_suspicion_type", create_constraint=False), nullable=False)
-    status = Column(Enum(*DISPUTE_STATUS, name="afasa_dispute_status", create_constraint=False), nullable=False, default="PENDING_HOLD")
+    suspicion_type = Column(Enum(*SUSPICION_TYPES, name="afasa_suspicion_type", create_constraint=False), nullable=False, index=True)
+    status = Column(Enum(*DISPUTE_STATUS, name="afasa_dispute_status", create_constraint=False), nullable=False, default="PENDING_HOLD", index=True)
     hold_start_at = Column(DateTime(timezone=True), nullable=True)
     hold_end_at = Column(DateTime(timezone=True), nullable=True)
     max_hold_until = Column(DateTime(timezone=True), nullable=True)
@@ -57,11 +58,25 @@ class AfasaDisputedTransaction(Base):
         self.status = "HELD"
 
 
+class AfasaDisputeRollup(Base):
+    """
+    Dispute counts per creation day, status and suspicion type, maintained by the
+    lifecycle functions in afasa/services.py (see afasa/rollups.py).
+    """
+
+    __tablename__ = "afasa_dispute_rollups"
+
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(*DISPUTE_STATUS, name="afasa_dispute_status", create_constraint=False), primary_key=True)
+    suspicion_type = Column(Enum(*SUSPICION_TYPES, name="afasa_suspicion_type", create_constraint=False), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
 class AfasaVerificationEvent(Base):
     __tablename__ = "afasa_verification_events"
 
     id = Column(Integer, primary_key=True)
-    disputed_tx_id = Column(Integer, ForeignKey("afasa_disputed_transactions.id"), nullable=False)
+    disputed_tx_id = Column(Integer, ForeignKey("afasa_disputed_transactions.id"), nullable=False, index=True)
     event_type = Column(Enum(*VERIFICATION_EVENT_TYPES, name="afasa_verification_event", create_constraint=False), nullable=False)
     notes = Column(String, nullable=True)
     created_by = Column(String(255), nullable=True)
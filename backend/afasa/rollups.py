@@ -0,0 +1,132 @@
+"""
+Incrementally maintained dispute counts behind the AFASA reports.
+
+afasa_dispute_rollups holds one row per (creation day, status, suspicion type).
+The lifecycle functions in afasa/services.py adjust it in the same transaction
+as the dispute change, so reports aggregate a few rows per day with GROUP BY
+instead of loading every dispute. rebuild_dispute_rollups() recomputes the table
+from afasa_disputed_transactions, e.g. after a bulk import.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backend.afasa.models import AfasaDisputeRollup, AfasaDisputedTransaction
+
+TREND_BUCKETS = ("day", "week")
+
+_UPSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+def _day(dispute) -> date:
+    return (dispute.created_at or datetime.utcnow()).date()
+
+
+def _bump(session, day: date, status: str, suspicion_type: str, delta: int):
+    stmt = _UPSERTS[session.get_bind().dialect.name](AfasaDisputeRollup).values(
+        day=day, status=status, suspicion_type=suspicion_type, count=delta
+    )
+    # Relative update, so concurrent lifecycle calls never overwrite each other's counts.
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[AfasaDisputeRollup.day, AfasaDisputeRollup.status, AfasaDisputeRollup.suspicion_type],
+            set_={"count": AfasaDisputeRollup.count + delta},
+        )
+    )
+
+
+def record_dispute_created(session, dispute):
+    _bump(session, _day(dispute), dispute.status, dispute.suspicion_type, 1)
+
+
+def record_status_change(session, dispute, old_status: str):
+    """Move one count from old_status to the new status. The caller must hold the dispute's row lock."""
+    if old_status == dispute.status:
+        return
+    day = _day(dispute)
+    _bump(session, day, old_status, dispute.suspicion_type, -1)
+    _bump(session, day, dispute.status, dispute.suspicion_type, 1)
+
+
+def rebuild_dispute_rollups(session) -> int:
+    """Recompute the rollup table from the disputes with one INSERT ... SELECT ... GROUP BY. Returns the row count.
+
+    On Postgres the table is locked first so _bump upserts from concurrent dispute changes wait for the
+    rebuild instead of landing between the DELETE and the INSERT (and being lost or counted twice).
+    SQLite already serialises writers on the database lock.
+    """
+    day = func.date(AfasaDisputedTransaction.created_at)
+    grouped = select(
+        day,
+        AfasaDisputedTransaction.status,
+        AfasaDisputedTransaction.suspicion_type,
+        func.count(),
+    ).group_by(day, AfasaDisputedTransaction.status, AfasaDisputedTransaction.suspicion_type)
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text(f"LOCK TABLE {AfasaDisputeRollup.__tablename__} IN EXCLUSIVE MODE"))
+    session.execute(delete(AfasaDisputeRollup))
+    session.execute(
+        insert(AfasaDisputeRollup).from_select(
+            [AfasaDisputeRollup.day, AfasaDisputeRollup.status, AfasaDisputeRollup.suspicion_type, AfasaDisputeRollup.count],
+            grouped,
+        )
+    )
+    session.commit()
+    return session.execute(select(func.count()).select_from(AfasaDisputeRollup)).scalar_one()
+
+
+def backfill_dispute_rollups(session) -> bool:
+    """Rebuild once if disputes exist but the rollup table is empty (databases created before it existed)."""
+    if session.execute(select(AfasaDisputeRollup.day).limit(1)).first() is not None:
+        return False
+    if session.execute(select(AfasaDisputedTransaction.id).limit(1)).first() is None:
+        return False
+    rebuild_dispute_rollups(session)
+    return True
+
+
+def _counts(session, column) -> Dict[str, int]:
+    query = select(column, func.sum(AfasaDisputeRollup.count)).group_by(column)
+    return {key: int(n) for key, n in session.execute(query) if n}
+
+
+def dispute_summary(session) -> Dict[str, Any]:
+    by_status = _counts(session, AfasaDisputeRollup.status)
+    return {
+        "total_disputes": sum(by_status.values()),
+        "by_status": by_status,
+        "by_suspicion": _counts(session, AfasaDisputeRollup.suspicion_type),
+    }
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    return day - timedelta(days=day.weekday()) if bucket == "week" else day
+
+
+def dispute_trends(session, bucket: str = "day", days: int = 90) -> List[Dict[str, Any]]:
+    """
+    Disputes created per day or ISO week (buckets start on Monday) over the last
+    `days` days, split by status and suspicion type. Empty buckets are omitted.
+    """
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(TREND_BUCKETS)}")
+    since = _bucket_start(datetime.utcnow().date() - timedelta(days=max(days, 1) - 1), bucket)
+    rows = session.execute(
+        select(AfasaDisputeRollup.day, AfasaDisputeRollup.status, AfasaDisputeRollup.suspicion_type, AfasaDisputeRollup.count)
+        .where(AfasaDisputeRollup.day >= since)
+        .order_by(AfasaDisputeRollup.day)
+    )
+    # Rollup rows are already per day; a week folds at most 7 days x statuses x types of them.
+    buckets: Dict[date, Dict[str, Any]] = {}
+    for day, status, suspicion_type, n in rows:
+        if not n:
+            continue
+        entry = buckets.setdefault(_bucket_start(day, bucket), {"total": 0, "by_status": {}, "by_suspicion": {}})
+        entry["total"] += n
+        entry["by_status"][status] = entry["by_status"].get(status, 0) + n
+        entry["by_suspicion"][suspicion_type] = entry["by_suspicion"].get(suspicion_type, 0) + n
+    return [dict(bucket=start.isoformat(), **entry) for start, entry in sorted(buckets.items())]
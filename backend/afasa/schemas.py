@@ -6,10 +6,10 @@ def _ts(val: Optional[datetime]) -> Optional[str]:
     return val.isoformat() if val else None
 
 
-def disputed_transaction_to_dict(model) -> Dict[str, Any]:
+def disputed_transaction_to_dict(model, include_events: bool = True) -> Dict[str, Any]:
     if model is None:
         return {}
-    return {
+    data = {
         "id": model.id,
         "alert_id": model.alert_id,
         "original_tx_id": model.original_tx_id,
@@ -25,8 +25,10 @@ def disputed_transaction_to_dict(model) -> Dict[str, Any]:
         "max_hold_until": _ts(model.max_hold_until),
         "created_at": _ts(model.created_at),
         "updated_at": _ts(model.updated_at),
-        "verification_events": [verification_event_to_dict(evt) for evt in getattr(model, "verification_events", [])],
     }
+    if include_events:
+        data["verification_events"] = [verification_event_to_dict(evt) for evt in getattr(model, "verification_events", [])]
+    return data
 
 
 def verification_event_to_dict(model) -> Dict[str, Any]:
@@ -10,6 +10,7 @@ from backend.afasa.constants import (
     VERIFICATION_EVENT_TYPES,
 )
 from backend.afasa.models import AfasaDisputedTransaction, AfasaVerificationEvent
+from backend.afasa.rollups import record_dispute_created, record_status_change
 from backend.afasa.rules import evaluate_afasa_risk
 from backend.afasa.schemas import disputed_transaction_to_dict
 from backend.models.transaction import TransactionLog
@@ -39,6 +40,7 @@ def initiate_disputed_transaction(session, alert_id: int, tx_id: Optional[int],
     )
     session.add(dispute)
     session.flush()
+    record_dispute_created(session, dispute)
     event = AfasaVerificationEvent(
         disputed_tx_id=dispute.id,
         event_type="INITIATED",
@@ -50,11 +52,19 @@ def initiate_disputed_transaction(session, alert_id: int, tx_id: Optional[int],
     return dispute
 
 
+def _lock_dispute(session, disputed_tx_id: int):
+    # SELECT ... FOR UPDATE: concurrent status changes to one dispute queue up here,
+    # so each sees the status the previous one committed and the rollups stay exact.
+    return session.get(AfasaDisputedTransaction, disputed_tx_id, with_for_update=True, populate_existing=True)
+
+
 def apply_temporary_hold(session, disputed_tx_id: int, actor: str):
-    dispute = session.get(AfasaDisputedTransaction, disputed_tx_id)
+    dispute = _lock_dispute(session, disputed_tx_id)
     if not dispute:
         raise ValueError("Disputed transaction not found")
+    old_status = dispute.status
     dispute.start_hold(hold_window_days=AFASA_HOLD_WINDOW_DAYS)
+    record_status_change(session, dispute, old_status)
     evt = AfasaVerificationEvent(
         disputed_tx_id=dispute.id,
         event_type="CUSTOMER_CONTACTED",
@@ -67,9 +77,10 @@ def apply_temporary_hold(session, disputed_tx_id: int, actor: str):
 
 
 def release_or_restitute_funds(session, disputed_tx_id: int, decision: str, actor: str, notes: Optional[str] = None):
-    dispute = session.get(AfasaDisputedTransaction, disputed_tx_id)
+    dispute = _lock_dispute(session, disputed_tx_id)
     if not dispute:
         raise ValueError("Disputed transaction not found")
+    old_status = dispute.status
     if decision.upper() == "RELEASE":
         dispute.status = "RELEASED"
         evt_type = "FUNDS_RELEASED"
@@ -80,6 +91,7 @@ def release_or_restitute_funds(session, disputed_tx_id: int, decision: str, acto
         dispute.status = "ESCALATED"
         evt_type = "ESCALATED_TO_LEA"
     dispute.hold_end_at = datetime.utcnow()
+    record_status_change(session, dispute, old_status)
     evt = AfasaVerificationEvent(
         disputed_tx_id=dispute.id,
         event_type=evt_type,
@@ -110,17 +122,22 @@ def add_verification_event(session, disputed_tx_id: int, event_type: str, notes:
 
 def auto_enforce_max_hold_period(session):
     now = datetime.utcnow()
+    # Rows another transaction is changing are skipped; the next run picks them up if still HELD.
     to_release = session.execute(
-        select(AfasaDisputedTransaction).where(
+        select(AfasaDisputedTransaction)
+        .where(
             AfasaDisputedTransaction.status == "HELD",
             AfasaDisputedTransaction.max_hold_until != None,  # noqa: E711
             AfasaDisputedTransaction.max_hold_until < now,
         )
-    ).scalars()
+        .with_for_update(skip_locked=True)
+        .execution_options(populate_existing=True)
+    ).scalars().all()
     count = 0
     for dispute in to_release:
         dispute.status = "ESCALATED"
         dispute.hold_end_at = now
+        record_status_change(session, dispute, "HELD")
         evt = AfasaVerificationEvent(
             disputed_tx_id=dispute.id,
             event_type="ESCALATED_TO_LEA",
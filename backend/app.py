@@ -1,15 +1,14 @@
 import os
 import sys
-import uuid
 import tempfile
-import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, send_file
 from flask_cors import CORS
 from dotenv import load_dotenv
 from sqlalchemy import select, text
-from neo4j import GraphDatabase
 from neo4j.graph import Path as NeoPath
 import requests
 
@@ -19,6 +18,8 @@ PROJECT_ROOT = CURRENT_DIR.parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from backend.afasa.models import AfasaDisputedTransaction, AfasaVerificationEvent
+from backend.afasa.rollups import backfill_dispute_rollups
 from backend.config import Config
 from backend.db.session import engine, get_session
 from backend.models import Base, RuleDefinition, Account, Device, Alert
@@ -29,14 +30,62 @@ from backend.routes.rules import rules_bp
 from backend.routes.neo4j import neo4j_bp
 from backend.routes.investigator import investigator_bp
 from backend.routes.afasa import afasa_bp
+from backend.routes.admin import admin_bp
+from backend.services.compression import compress_response
+from backend.services.graph_cache import RenderCache, TTLCache, graph_fingerprint
+from backend.services.json_provider import FastJSONProvider
+from backend.services.llm_assessment import AssessmentService, backend_from_env
+from backend.services.metrics import RequestMetrics, end_request, install_sqlalchemy, start_request, submit_in_context
+from backend.services.neighborhood import account_graph, identifier_graph
+from backend.services.neo4j_client import fetch_all, neo4j_settings, shared_driver
+from backend.services.render_service import RenderService
+from backend.services.rule_queries import (
+    R1_CYPHER,
+    R2_CYPHER,
+    R3_COMMUNITY_CYPHER,
+    R3_HAS_COMMUNITIES_CYPHER,
+    R3_LIVE_CYPHER,
+    R7_CYPHER,
+    clamp_hops,
+    r8_cypher,
+    r9_cypher,
+    r10_cypher,
+)
+from backend.services.slow_queries import install_slow_sql_log, query_tags, set_tags
+from backend.services.telegram_queue import UpdateQueue, UpdateQueueFull
+from backend.services.top_k import TopKSelector, priority_score
 
 # Neo4j driver (global)
-NEO4J_URI = os.getenv("NEO4J_URI")
-NEO4J_USER = os.getenv("NEO4J_USER") or os.getenv("NEO4J_USERNAME")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
-driver = None
-if all([NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD]):
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD = neo4j_settings()
+driver = shared_driver() if all([NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD]) else None
+
+# Per-endpoint latency / query-count / size histograms, served at /api/metrics
+request_metrics = RequestMetrics()
+install_sqlalchemy(engine)
+# Statements slower than SLOW_QUERY_MS, served at /api/admin/slow-queries
+install_slow_sql_log(engine)
+
+# Rendered assessment graphs (content-addressed, LRU-evicted), short-lived neighborhood graphs,
+# and the bounded Graphviz render pool
+GRAPH_RENDER_DIR = os.getenv("GRAPH_RENDER_DIR") or str(Path(tempfile.gettempdir()) / "gcash_graphs")
+render_cache = RenderCache(GRAPH_RENDER_DIR, max_bytes=int(os.getenv("GRAPH_RENDER_CACHE_MB", "200")) * 1024 * 1024)
+graph_cache = TTLCache(ttl_seconds=float(os.getenv("GRAPH_CACHE_TTL", "60")))
+render_service = RenderService(
+    render_cache,
+    max_workers=int(os.getenv("RENDER_WORKERS", "2")),
+    max_pending=int(os.getenv("RENDER_MAX_PENDING", "16")),
+    timeout=float(os.getenv("RENDER_TIMEOUT", "20")),
+    svg_max_nodes=int(os.getenv("RENDER_SVG_MAX_NODES", "40")),
+)
+RENDER_WAIT_SECONDS = float(os.getenv("RENDER_WAIT_SECONDS", "2"))
+
+# Independent rule queries (each on its own session) for compute_ai_top
+_rule_fetch_pool = ThreadPoolExecutor(max_workers=int(os.getenv("RULE_FETCH_WORKERS", "5")), thread_name_prefix="rule-fetch")
+
+
+def _execute_read(fn, *args):
+    with driver.session() as session:
+        return session.execute_read(fn, *args)
 
 
 def is_locally_flagged(anchor_id: str, anchor_type: str) -> bool:
@@ -57,229 +106,19 @@ def is_locally_flagged(anchor_id: str, anchor_type: str) -> bool:
         session.close()
 
 
-def _detect_flag(obj: dict, labels=None) -> bool:
-    labels = labels or []
-    if "Mule" in labels:
-        return True
-    if obj.get("fraud_group") is not None:
-        return True
-    if obj.get("flagged"):
-        return True
-    val = obj.get("is_fraud")
-    if isinstance(val, str):
-        val = val.lower() in {"true", "1", "yes"}
-    return bool(val)
-
-
 def _graph_for_account(account_id: str):
-    cypher = """
-    MATCH (a)
-    WHERE (a:Account AND a.account_number = $accountId)
-       OR (a:Mule AND a.id = $accountId)
-       OR (a:Client AND a.id = $accountId)
-       OR (a:Merchant AND a.id = $accountId)
-    OPTIONAL MATCH (a)-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]->(id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(peer)
-    OPTIONAL MATCH (a)-[:PERFORMED]->(txOut:Transaction)-[:TO]->(dst)
-    OPTIONAL MATCH (src)-[:PERFORMED]->(txIn:Transaction)-[:TO]->(a)
-    RETURN a, labels(a) AS a_labels,
-           collect(DISTINCT id) AS identifiers,
-           collect(DISTINCT {idNode:id, peer:peer, peerLabels:labels(peer)}) AS idPeers,
-           collect(DISTINCT {tx:txOut, other:dst, otherLabels:labels(dst), direction:'OUT'}) AS outbound,
-           collect(DISTINCT {tx:txIn, other:src, otherLabels:labels(src), direction:'IN'}) AS inbound
-    """
-    nodes = {}
-    edges = []
-
-    def add_node(key, label, ntype, extra=None):
-        if key in nodes:
-            return
-        node = {"id": key, "label": label, "type": ntype}
-        if extra:
-            node.update(extra)
-        nodes[key] = node
-
     with driver.session() as session:
-        record = session.run(cypher, accountId=account_id).single()
-        if not record:
-            return {"nodes": [], "edges": []}
-        a = record["a"]
-        anchor_id = a.get("account_number") or a.get("id")
-        anchor_label = a.get("customer_name") or a.get("name") or anchor_id
-        flagged_anchor = _detect_flag(a, record.get("a_labels") or [])
-        add_node(anchor_id, anchor_label, "Account", {"customerName": anchor_label, "isSubject": True, "isFlagged": flagged_anchor})
-
-        identifiers = record.get("identifiers") or []
-        for id_node in identifiers:
-            device_id = id_node.get("device_id") or id_node.get("email") or id_node.get("phoneNumber") or id_node.get("ssn")
-            if not device_id:
-                continue
-            dev_type = "Device"
-            if "email" in id_node:
-                dev_type = "Email"
-            elif "phoneNumber" in id_node:
-                dev_type = "Phone"
-            elif "ssn" in id_node:
-                dev_type = "SSN"
-            flagged_id = _detect_flag(id_node)
-            add_node(device_id, device_id, "Device", {"deviceType": dev_type, "isFlagged": flagged_id})
-            edges.append({"source": anchor_id, "target": device_id, "type": "HAS_IDENTIFIER"})
-
-        id_peers = record.get("idPeers") or []
-        for entry in id_peers:
-            id_node = entry.get("idNode") or {}
-            peer = entry.get("peer") or {}
-            peer_labels = entry.get("peerLabels") or []
-            device_id = id_node.get("device_id") or id_node.get("email") or id_node.get("phoneNumber") or id_node.get("ssn")
-            peer_id = peer.get("account_number") or peer.get("id")
-            if not device_id or not peer_id:
-                continue
-            peer_label = peer.get("customer_name") or peer.get("name") or peer_id
-            flagged_peer = _detect_flag(peer, peer_labels)
-            add_node(peer_id, peer_label, "Account", {"customerName": peer_label, "isFlagged": flagged_peer})
-            add_node(device_id, device_id, "Device", {"deviceType": "Identifier", "isFlagged": _detect_flag(id_node)})
-            edges.append({"source": peer_id, "target": device_id, "type": "HAS_IDENTIFIER"})
-
-        def handle_tx(items):
-            for item in items or []:
-                tx = item.get("tx")
-                other = item.get("other")
-                other_labels = item.get("otherLabels") or []
-                direction = item.get("direction")
-                if not tx or not other:
-                    continue
-                tx_ref = tx.get("tx_ref") or tx.get("id")
-                add_node(tx_ref, tx_ref, "Transaction", {"amount": tx.get("amount"), "tags": tx.get("tags")})
-                other_id = other.get("account_number") or other.get("id")
-                other_label = other.get("customer_name") or other.get("name") or other_id
-                flagged_other = _detect_flag(other, other_labels)
-                add_node(other_id, other_label, "Account", {"customerName": other_label, "isFlagged": flagged_other})
-                if direction == "OUT":
-                    edges.append({"source": anchor_id, "target": tx_ref, "type": "PERFORMS"})
-                    edges.append({"source": tx_ref, "target": other_id, "type": "TO"})
-                else:
-                    edges.append({"source": other_id, "target": tx_ref, "type": "PERFORMS"})
-                    edges.append({"source": tx_ref, "target": anchor_id, "type": "TO"})
-
-        handle_tx(record.get("outbound"))
-        handle_tx(record.get("inbound"))
-
-    return {"nodes": list(nodes.values()), "edges": edges}
+        return account_graph(session, account_id) or {"nodes": [], "edges": [], "truncated": {}}
 
 
 def _graph_for_identifier(identifier: str):
-    cypher = """
-    MATCH (id)
-    WHERE (id:Email AND id.email = $identifier)
-       OR (id:Phone AND id.phoneNumber = $identifier)
-       OR (id:SSN AND id.ssn = $identifier)
-    OPTIONAL MATCH (id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(acc)
-    OPTIONAL MATCH (acc)-[:PERFORMED]->(txOut:Transaction)-[:TO]->(dst)
-    OPTIONAL MATCH (src)-[:PERFORMED]->(txIn:Transaction)-[:TO]->(acc)
-    RETURN id,
-           collect(DISTINCT {acc: acc, accLabels: labels(acc)}) AS accounts,
-           collect(DISTINCT {tx: txOut, other: dst, otherLabels: labels(dst), direction: 'OUT', acc: acc, accLabels: labels(acc)}) AS outbound,
-           collect(DISTINCT {tx: txIn, other: src, otherLabels: labels(src), direction: 'IN', acc: acc, accLabels: labels(acc)}) AS inbound
-    """
-    nodes = {}
-    edges = []
+    with driver.session() as session:
+        return identifier_graph(session, identifier) or {"nodes": [], "edges": [], "truncated": {}}
 
-    def add_node(key, label, ntype, extra=None):
-        if key in nodes:
-            return
-        node = {"id": key, "label": label, "type": ntype}
-        if extra:
-            node.update(extra)
-        nodes[key] = node
 
-    with driver.session() as session:
-        record = session.run(cypher, identifier=identifier).single()
-        if not record:
-            return {"nodes": [], "edges": []}
-
-        id_node = record["id"]
-        device_id_val = id_node.get("device_id") or id_node.get("email") or id_node.get("phoneNumber") or id_node.get("ssn")
-        device_type = "Device"
-        if "email" in id_node:
-            device_type = "Email"
-        elif "phoneNumber" in id_node:
-            device_type = "Phone"
-        elif "ssn" in id_node:
-            device_type = "SSN"
-        flagged_id = _detect_flag(id_node)
-        add_node(device_id_val, device_id_val, "Device", {"deviceType": device_type, "isSubject": True, "isFlagged": flagged_id})
-
-        for acc_entry in record.get("accounts") or []:
-            acc = acc_entry.get("acc") or {}
-            acc_labels = acc_entry.get("accLabels") or []
-            acc_id = acc.get("account_number") or acc.get("id")
-            acc_label = acc.get("customer_name") or acc.get("name") or acc_id
-            flagged_acc = _detect_flag(acc, acc_labels)
-            add_node(acc_id, acc_label, "Account", {"customerName": acc_label, "isFlagged": flagged_acc})
-            edges.append({"source": acc_id, "target": device_id_val, "type": "HAS_IDENTIFIER"})
-
-        def handle_tx(items):
-            for item in items or []:
-                tx = item.get("tx")
-                other = item.get("other")
-                acc = item.get("acc")
-                acc_labels = item.get("accLabels") or []
-                direction = item.get("direction")
-                if not tx or not other or not acc:
-                    continue
-                tx_ref = tx.get("tx_ref") or tx.get("id")
-                add_node(tx_ref, tx_ref, "Transaction", {"amount": tx.get("amount"), "tags": tx.get("tags")})
-                other_id = other.get("account_number") or other.get("id")
-                other_label = other.get("customer_name") or other.get("name") or other_id
-                acc_id = acc.get("account_number") or acc.get("id")
-                acc_label = acc.get("customer_name") or acc.get("name") or acc_id
-                flagged_acc = _detect_flag(acc, acc_labels)
-                add_node(other_id, other_label, "Account", {"customerName": other_label})
-                add_node(acc_id, acc_label, "Account", {"customerName": acc_label, "isFlagged": flagged_acc})
-                if direction == "OUT":
-                    edges.append({"source": acc_id, "target": tx_ref, "type": "PERFORMS"})
-                    edges.append({"source": tx_ref, "target": other_id, "type": "TO"})
-                else:
-                    edges.append({"source": other_id, "target": tx_ref, "type": "PERFORMS"})
-                    edges.append({"source": tx_ref, "target": acc_id, "type": "TO"})
-
-        handle_tx(record.get("outbound"))
-        handle_tx(record.get("inbound"))
-
-    return {"nodes": list(nodes.values()), "edges": edges}
-
-
-def _render_dot_png(nodes, edges):
-    """Render a simple graph PNG using graphviz dot if available."""
-    dot_lines = ["digraph G {", 'rankdir="LR";', 'node [style=filled,fontname="Arial"];']
-    for n in nodes:
-        color = "#6ba7ff" if n.get("type") == "Account" else "#6adedc" if n.get("type") == "Device" else "#ffd166"
-        if n.get("isFlagged"):
-            color = "#e63946"
-        if n.get("isSubject"):
-            color = "#ff8c42"
-        shape = "ellipse"
-        if n.get("type") == "Device":
-            shape = "diamond"
-        if n.get("type") == "Transaction":
-            shape = "box"
-        label = n.get("label") or n.get("id")
-        dot_lines.append(f'"{n["id"]}" [label="{label}", color="#0c1a36", fillcolor="{color}", shape="{shape}"];')
-    for e in edges:
-        lbl = e.get("type") or ""
-        dot_lines.append(f'"{e["source"]}" -> "{e["target"]}" [label="{lbl}", color="#a5b4d0"];')
-    dot_lines.append("}")
-    dot_src = "\n".join(dot_lines)
-    tmpdir = Path(tempfile.gettempdir()) / "gcash_graphs"
-    tmpdir.mkdir(parents=True, exist_ok=True)
-    png_path = tmpdir / f"{uuid.uuid4().hex}.png"
-    try:
-        proc = subprocess.run(["dot", "-Tpng"], input=dot_src.encode("utf-8"), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        with open(png_path, "wb") as f:
-            f.write(proc.stdout)
-        return str(png_path)
-    except Exception as exc:
-        print(f"dot render failed: {exc}")
-        return None
+def assessment_graph_key(rule_key: str, anchor: str):
+    """graph_cache key of the neighborhood an AI assessment looks at (R2 anchors are identifiers)."""
+    return ("identifier" if rule_key == "R2" else "account", anchor)
 
 
 def is_flagged_record(rec: dict, anchor_type: str) -> bool:
@@ -329,16 +168,7 @@ def fetch_account_alerts_r1(tx, min_risk: float, limit: int):
     We expose a fixed riskScore (1.0) and ignore min_risk because the dataset
     does not store risk on Client/Mule nodes.
     """
-    cypher = """
-    MATCH (a:Mule)
-    RETURN
-      a.id   AS accountId,
-      a.name AS customerName,
-      1.0    AS riskScore,
-      true   AS isFraud
-    ORDER BY accountId
-    LIMIT $limit
-    """
+    cypher = R1_CYPHER
     result = tx.run(cypher, minRisk=min_risk, limit=limit)
     return [record.data() for record in result]
 
@@ -348,24 +178,7 @@ def fetch_device_alerts_r2(tx, high_risk: float, min_risky: int, limit: int):
     Xavier data has no Device nodes; use shared identifiers (Email/Phone/SSN) across mules.
     Treat any identifier connected to >= min_risky Mule nodes as a risky hub.
     """
-    cypher = """
-    MATCH (id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(risky:Mule)
-    WITH id, collect(DISTINCT risky) AS riskyAccounts, count(DISTINCT risky) AS riskyCount
-    MATCH (id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(acc)
-    WITH id, riskyCount, collect(DISTINCT acc) AS allAccounts
-    WHERE riskyCount >= $minRiskyAccounts
-    RETURN
-      CASE
-        WHEN id.email IS NOT NULL THEN id.email
-        WHEN id.phoneNumber IS NOT NULL THEN id.phoneNumber
-        ELSE id.ssn
-      END AS deviceId,
-      head(labels(id)) AS deviceType,
-      size(allAccounts) AS totalAccounts,
-      riskyCount AS riskyAccounts
-    ORDER BY riskyAccounts DESC, totalAccounts DESC
-    LIMIT $limit
-    """
+    cypher = R2_CYPHER
     result = tx.run(
         cypher,
         highRiskThreshold=high_risk,
@@ -377,22 +190,26 @@ def fetch_device_alerts_r2(tx, high_risk: float, min_risky: int, limit: int):
 
 def fetch_mule_ring_alerts_r3(tx, min_risky: int, limit: int):
     """
-    Xavier data: detect mule rings as mules densely connected to other mules via TRANSACTED_WITH.
-    For each Mule, count distinct Mule peers; require count >= min_risky.
+    Xavier data: mule rings are the communities computed offline by
+    scripts/detect_communities.py (connected components + Louvain over TRANSACTED_WITH
+    and shared identifiers). ringSize is the number of other Mules in the cached
+    community (communityMules - 1), so minRisky and the severity cut-off keep the
+    meaning of the legacy peer count; falls back to counting distinct Mule peers
+    when communities have not been computed yet.
     """
-    cypher = """
-    MATCH (m:Mule)-[:TRANSACTED_WITH]-(peer:Mule)
-    WITH m, collect(DISTINCT peer) AS peers, size(collect(DISTINCT peer)) AS ringSize
-    WHERE ringSize >= $minRisky
-    RETURN
-      m.id   AS accountId,
-      m.name AS customerName,
-      1.0    AS riskScore,
-      true   AS isFraud,
-      ringSize AS ringSize
-    ORDER BY ringSize DESC, accountId
-    LIMIT $limit
+    has_communities = tx.run(R3_HAS_COMMUNITIES_CYPHER).single()
+    if not has_communities:
+        return fetch_mule_ring_alerts_r3_live(tx, min_risky, limit)
+    cypher = R3_COMMUNITY_CYPHER
+    result = tx.run(cypher, minRisky=min_risky, limit=limit)
+    return [record.data() for record in result]
+
+
+def fetch_mule_ring_alerts_r3_live(tx, min_risky: int, limit: int):
+    """
+    Legacy R3: for each Mule, count distinct Mule peers via TRANSACTED_WITH; require count >= min_risky.
     """
+    cypher = R3_LIVE_CYPHER
     result = tx.run(cypher, minRisky=min_risky, limit=limit)
     return [record.data() for record in result]
 
@@ -402,21 +219,7 @@ def fetch_hub_alerts_r7(tx, risk_threshold: float, min_risky: int, limit: int):
     Xavier: risky senders are mules. Count distinct Mule senders to each destination
     (Client or Mule) via PERFORMED->tx->TO edges.
     """
-    cypher = """
-    MATCH (src:Mule)-[:PERFORMED]->(tx:Transaction)-[:TO]->(dst)
-    WHERE dst:Client OR dst:Mule
-    WITH dst, collect(DISTINCT src) AS riskySenders, count(DISTINCT src) AS riskyCount, count(DISTINCT tx) AS txCount
-    WHERE riskyCount >= $minRiskyAccounts
-    RETURN
-      dst.id   AS accountId,
-      coalesce(dst.name, dst.id) AS customerName,
-      1.0    AS riskScore,
-      (dst:Mule) AS isFraud,
-      riskyCount AS riskySenders,
-      txCount AS txCount
-    ORDER BY riskyCount DESC, txCount DESC
-    LIMIT $limit
-    """
+    cypher = R7_CYPHER
     result = tx.run(
         cypher,
         riskThreshold=risk_threshold,
@@ -455,153 +258,324 @@ def fetch_progressive_chain_r8(tx, name: str, duration: int, amount: float, min_
     Progressive multi-hop chain within a time window where amounts start high and decrease.
     Based on Neo4j-provided pattern (10–20 hops, window duration, min amount).
     """
-    min_hops = max(1, min_hops)
-    max_hops = max(min_hops, min(max_hops, 15))
-    name_filter = " {name: $name}" if name else ""
-    cypher = f"""
-    MATCH p=(c1:Client{name_filter})
-    (
-      (:Client)-[t1:TRANSACTED_WITH]->(:Client)-[t2:TRANSACTED_WITH]->(:Client)
-      WHERE t1.globalStep + $duration > t2.globalStep > t1.globalStep
-        AND t2.amount < t1.amount
-        AND t1.amount > $amount
-    ){{{min_hops},{max_hops}}}(c2:Client)
-    RETURN p
-    LIMIT $limit
-    """
-    results = []
-    for record in tx.run(cypher, name=name, duration=duration, amount=amount, limit=limit):
-        path = record["p"]
-        stats = _path_stats(path)
-        start = path.start_node
-        end = path.end_node
-        account_id = _node_prop(start, ["id", "account_number"]) or name
-        customer_name = _node_prop(start, ["name", "customer_name"]) or name
-        severity = "Critical" if stats["steps"] >= 15 or stats["max_amount"] >= amount * 2 else "High"
-        summary = (
-            f"{customer_name} progressive chain {stats['steps']} hops "
-            f"(max {stats['max_amount']:,} in window {duration})"
-        )
-        results.append(
-            {
-                "accountId": account_id,
-                "customerName": customer_name,
-                "pathLength": stats["steps"],
-                "maxAmount": stats["max_amount"],
-                "timeSpan": stats["time_span"],
-                "isFraud": False,
-                "severity": severity,
-                "summary": summary,
-            }
-        )
-    return results
+    min_hops, max_hops = clamp_hops(min_hops, max_hops)
+    cypher = r8_cypher(name, min_hops, max_hops)
+    return [
+        progressive_chain_row(record, name, duration, amount)
+        for record in tx.run(cypher, name=name, duration=duration, amount=amount, limit=limit)
+    ]
+
+
+def progressive_chain_row(record, name: str, duration: int, amount: float) -> dict:
+    path = record["p"]
+    stats = _path_stats(path)
+    start = path.start_node
+    account_id = _node_prop(start, ["id", "account_number"]) or name
+    customer_name = _node_prop(start, ["name", "customer_name"]) or name
+    severity = "Critical" if stats["steps"] >= 15 or stats["max_amount"] >= amount * 2 else "High"
+    summary = (
+        f"{customer_name} progressive chain {stats['steps']} hops "
+        f"(max {stats['max_amount']:,} in window {duration})"
+    )
+    return {
+        "accountId": account_id,
+        "customerName": customer_name,
+        "pathLength": stats["steps"],
+        "maxAmount": stats["max_amount"],
+        "timeSpan": stats["time_span"],
+        "isFraud": False,
+        "severity": severity,
+        "summary": summary,
+    }
 
 
 def fetch_cycle_r9(tx, name: str, min_amount: float, min_hops: int, max_hops: int, limit: int):
     """
     Long high-value cycle (returns to same client) with min amount on each hop.
     """
-    min_hops = max(1, min_hops)
-    max_hops = max(min_hops, min(max_hops, 15))
-    name_filter = " {name: $name}" if name else ""
-    cypher = f"""
-    MATCH p=(c:Client{name_filter})-[r:TRANSACTED_WITH WHERE r.amount > $minAmount]->{{{min_hops},{max_hops}}}(c)
-    RETURN p
-    LIMIT $limit
-    """
-    results = []
-    for record in tx.run(cypher, name=name, minAmount=min_amount, limit=limit):
-        path = record["p"]
-        stats = _path_stats(path)
-        start = path.start_node
-        account_id = _node_prop(start, ["id", "account_number"]) or name
-        customer_name = _node_prop(start, ["name", "customer_name"]) or name
-        severity = "Critical" if stats["steps"] >= 18 or stats["max_amount"] >= min_amount * 1.2 else "High"
-        summary = f"{customer_name} cycle {stats['steps']} hops (min hop amount > {min_amount:,})"
-        results.append(
-            {
-                "accountId": account_id,
-                "customerName": customer_name,
-                "pathLength": stats["steps"],
-                "maxAmount": stats["max_amount"],
-                "timeSpan": stats["time_span"],
-                "isFraud": False,
-                "severity": severity,
-                "summary": summary,
-            }
-        )
-    return results
+    min_hops, max_hops = clamp_hops(min_hops, max_hops)
+    cypher = r9_cypher(name, min_hops, max_hops)
+    return [cycle_row(record, name, min_amount) for record in tx.run(cypher, name=name, minAmount=min_amount, limit=limit)]
+
+
+def cycle_row(record, name: str, min_amount: float) -> dict:
+    path = record["p"]
+    stats = _path_stats(path)
+    start = path.start_node
+    account_id = _node_prop(start, ["id", "account_number"]) or name
+    customer_name = _node_prop(start, ["name", "customer_name"]) or name
+    severity = "Critical" if stats["steps"] >= 18 or stats["max_amount"] >= min_amount * 1.2 else "High"
+    summary = f"{customer_name} cycle {stats['steps']} hops (min hop amount > {min_amount:,})"
+    return {
+        "accountId": account_id,
+        "customerName": customer_name,
+        "pathLength": stats["steps"],
+        "maxAmount": stats["max_amount"],
+        "timeSpan": stats["time_span"],
+        "isFraud": False,
+        "severity": severity,
+        "summary": summary,
+    }
 
 
 def fetch_progressive_high_value_r10(tx, name: str, min_amount: float, min_hops: int, max_hops: int, limit: int):
     """
     Progressive time-ordered high-value chains (r2 after r1, both above threshold).
     """
-    min_hops = max(1, min_hops)
-    max_hops = max(min_hops, min(max_hops, 15))
-    name_filter = " {name: $name}" if name else ""
-    cypher = f"""
-    MATCH p=(c:Client{name_filter})
-    (
-      (:Client)-[r1:TRANSACTED_WITH]->(:Client)-[r2:TRANSACTED_WITH]->(:Client)
-      WHERE r2.globalStep > r1.globalStep
-        AND r1.amount > $minAmount
-        AND r2.amount > $minAmount
-    ){{{min_hops},{max_hops}}}(c)
-    RETURN p
-    LIMIT $limit
-    """
-    results = []
-    for record in tx.run(cypher, name=name, minAmount=min_amount, limit=limit):
-        path = record["p"]
-        stats = _path_stats(path)
-        start = path.start_node
-        account_id = _node_prop(start, ["id", "account_number"]) or name
-        customer_name = _node_prop(start, ["name", "customer_name"]) or name
-        severity = "Critical" if stats["steps"] >= 8 or stats["max_amount"] >= min_amount * 1.5 else "High"
-        summary = f"{customer_name} time-ordered chain {stats['steps']} hops (min amount > {min_amount:,})"
-        results.append(
-            {
-                "accountId": account_id,
-                "customerName": customer_name,
-                "pathLength": stats["steps"],
-                "maxAmount": stats["max_amount"],
-                "timeSpan": stats["time_span"],
-                "isFraud": False,
-                "severity": severity,
-                "summary": summary,
-            }
-        )
-    return results
+    min_hops, max_hops = clamp_hops(min_hops, max_hops)
+    cypher = r10_cypher(name, min_hops, max_hops)
+    return [
+        progressive_high_value_row(record, name, min_amount)
+        for record in tx.run(cypher, name=name, minAmount=min_amount, limit=limit)
+    ]
+
+
+def progressive_high_value_row(record, name: str, min_amount: float) -> dict:
+    path = record["p"]
+    stats = _path_stats(path)
+    start = path.start_node
+    account_id = _node_prop(start, ["id", "account_number"]) or name
+    customer_name = _node_prop(start, ["name", "customer_name"]) or name
+    severity = "Critical" if stats["steps"] >= 8 or stats["max_amount"] >= min_amount * 1.5 else "High"
+    summary = f"{customer_name} time-ordered chain {stats['steps']} hops (min amount > {min_amount:,})"
+    return {
+        "accountId": account_id,
+        "customerName": customer_name,
+        "pathLength": stats["steps"],
+        "maxAmount": stats["max_amount"],
+        "timeSpan": stats["time_span"],
+        "isFraud": False,
+        "severity": severity,
+        "summary": summary,
+    }
+
+
+# Query-string parameters of the /api/neo-alerts/<rule> routes: (name, type, default), in fetcher argument order.
+NEO_ALERT_ARGS = {
+    "r1": (("riskThreshold", float, 0.8), ("limit", int, 50)),
+    "r2": (("highRiskThreshold", float, 0.8), ("minRiskyAccounts", int, 2), ("limit", int, 20)),
+    "r3": (("minRiskyAccounts", int, 3), ("limit", int, 20)),
+    "r7": (("riskThreshold", float, 0.8), ("minRiskyAccounts", int, 3), ("limit", int, 20)),
+    "r8": (
+        ("name", str, "Aubree David"),
+        ("duration", int, 4000),
+        ("amount", float, 50000.0),
+        ("minHops", int, 5),
+        ("maxHops", int, 10),
+        ("limit", int, 5),
+    ),
+    "r9": (("name", str, "Aubree David"), ("minAmount", float, 1200000.0), ("minHops", int, 10), ("maxHops", int, 12), ("limit", int, 5)),
+    "r10": (("name", str, "Aubree David"), ("minAmount", float, 800000.0), ("minHops", int, 3), ("maxHops", int, 8), ("limit", int, 5)),
+}
+
+NEO_ALERT_FETCHERS = {
+    "r1": fetch_account_alerts_r1,
+    "r2": fetch_device_alerts_r2,
+    "r3": fetch_mule_ring_alerts_r3,
+    "r7": fetch_hub_alerts_r7,
+    "r8": fetch_progressive_chain_r8,
+    "r9": fetch_cycle_r9,
+    "r10": fetch_progressive_high_value_r10,
+}
+
+
+def neo_alert_args(rule: str, args) -> list:
+    values = []
+    for name, cast, default in NEO_ALERT_ARGS[rule]:
+        try:
+            values.append(cast(args.get(name, default)))
+        except Exception:
+            values.append(default)
+    return values
+
+
+def _severity_from_risk(risk) -> str:
+    if risk >= 0.95:
+        return "Critical"
+    if risk >= 0.9:
+        return "High"
+    return "Medium"
+
+
+def _r1_alert(idx, rec):
+    if not is_flagged_record(rec, "ACCOUNT"):
+        return None
+    risk = rec.get("riskScore") or 0
+    return {
+        "id": idx,
+        "accountId": rec.get("accountId"),
+        "customerName": rec.get("customerName"),
+        "riskScore": risk,
+        "severity": _severity_from_risk(risk),
+        "rule": "R1 – High risk / flagged account",
+        "summary": f"{rec.get('customerName')} ({rec.get('accountId')}) risk={risk:.2f} is_fraud={rec.get('isFraud')}",
+    }
+
+
+def _r2_alert(idx, rec):
+    risky = rec.get("riskyAccounts") or 0
+    total = rec.get("totalAccounts") or 0
+    return {
+        "id": idx,
+        "deviceId": rec.get("deviceId"),
+        "deviceType": rec.get("deviceType"),
+        "riskyAccounts": risky,
+        "totalAccounts": total,
+        "severity": "High" if risky >= 3 else "Medium",
+        "rule": "R2 – Shared risky device",
+        "summary": f"Identifier {rec.get('deviceId')} ({rec.get('deviceType')}) linked to {risky} risky / {total} total accounts",
+    }
+
+
+def _r3_alert(idx, rec):
+    if not is_flagged_record(rec, "ACCOUNT"):
+        return None
+    ring_size = rec.get("ringSize") or 0
+    risk = rec.get("riskScore") or 0
+    return {
+        "id": idx,
+        "accountId": rec.get("accountId"),
+        "customerName": rec.get("customerName"),
+        "riskScore": risk,
+        "ringSize": ring_size,
+        "communityId": rec.get("communityId"),
+        "communitySize": rec.get("communitySize"),
+        "severity": "Critical" if ring_size >= 5 else "High",
+        "rule": "R3 – Mule ring flow",
+        "summary": f"Account {rec.get('accountId')} in ring of size {ring_size} (risk={risk:.2f})",
+    }
+
+
+def _r7_alert(idx, rec):
+    if not is_flagged_record(rec, "ACCOUNT"):
+        return None
+    risky = rec.get("riskySenders") or 0
+    tx_count = rec.get("txCount") or 0
+    return {
+        "id": idx,
+        "accountId": rec.get("accountId"),
+        "customerName": rec.get("customerName"),
+        "riskScore": rec.get("riskScore") or 0,
+        "riskySenders": risky,
+        "txCount": tx_count,
+        "communityId": rec.get("communityId"),
+        "communitySize": rec.get("communitySize"),
+        "severity": "Critical" if risky >= 5 else "High",
+        "rule": "R7 – Risky funnel to hub",
+        "summary": f"Hub {rec.get('accountId')} receives from {risky} risky senders ({tx_count} tx)",
+    }
+
+
+def _path_alert(rule_key: str, rule: str, default_summary: str):
+    def shape(idx, rec):
+        return {
+            "id": idx,
+            "ruleKey": rule_key,
+            "accountId": rec.get("accountId"),
+            "customerName": rec.get("customerName"),
+            "severity": rec.get("severity") or "High",
+            "rule": rule,
+            "summary": rec.get("summary") or default_summary,
+            "pathLength": rec.get("pathLength"),
+            "maxAmount": rec.get("maxAmount"),
+        }
+
+    return shape
+
+
+_NEO_ALERT_SHAPES = {
+    "r1": _r1_alert,
+    "r2": _r2_alert,
+    "r3": _r3_alert,
+    "r7": _r7_alert,
+    "r8": _path_alert("R8", "R8 – Progressive time-window chain", "Progressive chain detected"),
+    "r9": _path_alert("R9", "R9 – High-value multi-hop cycle", "Cycle detected"),
+    "r10": _path_alert("R10", "R10 – Time-ordered high-value chain", "Progressive high-value chain"),
+}
+
+
+def neo_alerts(rule: str, records) -> list:
+    """Alert payloads for /api/neo-alerts/<rule> from the rule fetcher's rows."""
+    shape = _NEO_ALERT_SHAPES[rule]
+    alerts = []
+    for idx, rec in enumerate(records, start=1):
+        alert = shape(idx, rec)
+        if alert is None:
+            continue
+        alert["status"] = "Open"
+        alert["created"] = datetime.utcnow().isoformat() + "Z"
+        alerts.append(alert)
+    return alerts
 
 
 def create_app():
     load_dotenv()
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.config.from_object(Config)
     CORS(app)
 
+    @app.before_request
+    def start_request_metrics():
+        g.request_started = time.perf_counter()
+        g.query_counter = start_request()
+        set_tags(endpoint=request.url_rule.rule if request.url_rule else request.path, method=request.method)
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get("request_started")
+        if started is not None:
+            counter = g.query_counter
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            request_metrics.observe(
+                request.method,
+                endpoint,
+                response.status_code,
+                time.perf_counter() - started,
+                counter.sql,
+                counter.neo4j,
+                response.content_length or 0,
+            )
+        return response
+
+    # Registered after record_request_metrics so it runs first: the size metric sees compressed bytes.
+    app.after_request(compress_response)
+
+    @app.teardown_request
+    def clear_request_metrics(exc):
+        end_request()
+        set_tags()
+
     @app.after_request
     def add_cors_headers(response):
         # Ensure all endpoints (including new ones) emit permissive CORS for local demos.
         response.headers["Access-Control-Allow-Origin"] = "*"
         response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
         response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+        response.headers["Access-Control-Expose-Headers"] = "ETag, X-Next-After-Id"
         return response
 
     verify_database_connection()
 
+    # LLM assessments keyed by (rule, anchor, graph fingerprint); AI_ASSESS_BACKEND=stub for offline runs
+    assessment_service = AssessmentService(backend_from_env(), ttl_seconds=float(os.getenv("AI_ASSESS_CACHE_TTL", "3600")))
+
     app.register_blueprint(alerts_bp, url_prefix="/api")
     app.register_blueprint(cases_bp, url_prefix="/api")
     app.register_blueprint(rules_bp, url_prefix="/api")
     app.register_blueprint(neo4j_bp, url_prefix="/api")
     app.register_blueprint(investigator_bp, url_prefix="/api")
     app.register_blueprint(afasa_bp, url_prefix="/api")
+    app.register_blueprint(admin_bp, url_prefix="/api")
 
     @app.route("/api/health", methods=["GET"])
     def health():
         return jsonify({"status": "ok"})
 
+    @app.route("/api/metrics", methods=["GET"])
+    def metrics():
+        return Response(request_metrics.render(), mimetype="text/plain; version=0.0.4")
+
     @app.route("/api/neo-alerts", methods=["GET"])
     def neo4j_account_alerts():
         if not driver:
@@ -633,314 +607,40 @@ def create_app():
             )
         return jsonify(alerts)
 
-    @app.route("/api/neo-alerts/r1", methods=["GET"])
-    def neo4j_account_alerts_r1():
+    def _neo_alerts_response(rule: str):
         if not driver:
             return jsonify({"status": "error", "message": "Neo4j driver not configured"}), 500
-        try:
-            risk_threshold = float(request.args.get("riskThreshold", 0.8))
-        except Exception:
-            risk_threshold = 0.8
-        try:
-            limit = int(request.args.get("limit", 50))
-        except Exception:
-            limit = 50
         with driver.session() as session:
-            records = session.execute_read(fetch_account_alerts_r1, risk_threshold, limit)
-        alerts = []
-        for idx, rec in enumerate(records, start=1):
-            if not is_flagged_record(rec, "ACCOUNT"):
-                continue
-            risk = rec.get("riskScore") or 0
-            if risk >= 0.95:
-                severity = "Critical"
-            elif risk >= 0.9:
-                severity = "High"
-            else:
-                severity = "Medium"
-            summary = f"{rec.get('customerName')} ({rec.get('accountId')}) risk={risk:.2f} is_fraud={rec.get('isFraud')}"
-            alerts.append(
-                {
-                    "id": idx,
-                    "accountId": rec.get("accountId"),
-                    "customerName": rec.get("customerName"),
-                    "riskScore": risk,
-                    "severity": severity,
-                    "rule": "R1 – High risk / flagged account",
-                    "summary": summary,
-                    "status": "Open",
-                    "created": datetime.utcnow().isoformat() + "Z",
-                }
-            )
-        return jsonify(alerts)
+            records = session.execute_read(NEO_ALERT_FETCHERS[rule], *neo_alert_args(rule, request.args))
+        return jsonify(neo_alerts(rule, records))
+
+    @app.route("/api/neo-alerts/r1", methods=["GET"])
+    def neo4j_account_alerts_r1():
+        return _neo_alerts_response("r1")
 
     @app.route("/api/neo-alerts/r2", methods=["GET"])
     def neo4j_device_alerts_r2():
-        if not driver:
-            return jsonify({"status": "error", "message": "Neo4j driver not configured"}), 500
-        try:
-            high_risk = float(request.args.get("highRiskThreshold", 0.8))
-        except Exception:
-            high_risk = 0.8
-        try:
-            min_risky = int(request.args.get("minRiskyAccounts", 2))
-        except Exception:
-            min_risky = 2
-        try:
-            limit = int(request.args.get("limit", 20))
-        except Exception:
-            limit = 20
-        with driver.session() as session:
-            records = session.execute_read(fetch_device_alerts_r2, high_risk, min_risky, limit)
-
-        alerts = []
-        for idx, rec in enumerate(records, start=1):
-            risky = rec.get("riskyAccounts") or 0
-            total = rec.get("totalAccounts") or 0
-            severity = "High" if risky >= 3 else "Medium"
-            summary = f"Identifier {rec.get('deviceId')} ({rec.get('deviceType')}) linked to {risky} risky / {total} total accounts"
-            alerts.append(
-                {
-                    "id": idx,
-                    "deviceId": rec.get("deviceId"),
-                    "deviceType": rec.get("deviceType"),
-                    "riskyAccounts": risky,
-                    "totalAccounts": total,
-                    "severity": severity,
-                    "rule": "R2 – Shared risky device",
-                    "summary": summary,
-                    "status": "Open",
-                    "created": datetime.utcnow().isoformat() + "Z",
-                }
-            )
-        return jsonify(alerts)
+        return _neo_alerts_response("r2")
 
     @app.route("/api/neo-alerts/r3", methods=["GET"])
     def neo4j_mule_ring_alerts_r3():
-        if not driver:
-            return jsonify({"status": "error", "message": "Neo4j driver not configured"}), 500
-        try:
-            min_risky = int(request.args.get("minRiskyAccounts", 3))
-        except Exception:
-            min_risky = 3
-        try:
-            limit = int(request.args.get("limit", 20))
-        except Exception:
-            limit = 20
-        with driver.session() as session:
-            records = session.execute_read(fetch_mule_ring_alerts_r3, min_risky, limit)
-
-        alerts = []
-        for idx, rec in enumerate(records, start=1):
-            if not is_flagged_record(rec, "ACCOUNT"):
-                continue
-            ring_size = rec.get("ringSize") or 0
-            risk = rec.get("riskScore") or 0
-            severity = "Critical" if ring_size >= 5 else "High"
-            summary = f"Account {rec.get('accountId')} in ring of size {ring_size} (risk={risk:.2f})"
-            alerts.append(
-                {
-                    "id": idx,
-                    "accountId": rec.get("accountId"),
-                    "customerName": rec.get("customerName"),
-                    "riskScore": risk,
-                    "ringSize": ring_size,
-                    "severity": severity,
-                    "rule": "R3 – Mule ring flow",
-                    "summary": summary,
-                    "status": "Open",
-                    "created": datetime.utcnow().isoformat() + "Z",
-                }
-            )
-        return jsonify(alerts)
+        return _neo_alerts_response("r3")
 
     @app.route("/api/neo-alerts/r7", methods=["GET"])
     def neo4j_hub_alerts_r7():
-        if not driver:
-            return jsonify({"status": "error", "message": "Neo4j driver not configured"}), 500
-        try:
-            risk_threshold = float(request.args.get("riskThreshold", 0.8))
-        except Exception:
-            risk_threshold = 0.8
-        try:
-            min_risky = int(request.args.get("minRiskyAccounts", 3))
-        except Exception:
-            min_risky = 3
-        try:
-            limit = int(request.args.get("limit", 20))
-        except Exception:
-            limit = 20
-
-        with driver.session() as session:
-            records = session.execute_read(fetch_hub_alerts_r7, risk_threshold, min_risky, limit)
-
-        alerts = []
-        for idx, rec in enumerate(records, start=1):
-            if not is_flagged_record(rec, "ACCOUNT"):
-                continue
-            risky = rec.get("riskySenders") or 0
-            tx_count = rec.get("txCount") or 0
-            risk = rec.get("riskScore") or 0
-            severity = "Critical" if risky >= 5 else "High"
-            summary = f"Hub {rec.get('accountId')} receives from {risky} risky senders ({tx_count} tx)"
-            alerts.append(
-                {
-                    "id": idx,
-                    "accountId": rec.get("accountId"),
-                    "customerName": rec.get("customerName"),
-                    "riskScore": risk,
-                    "riskySenders": risky,
-                    "txCount": tx_count,
-                    "severity": severity,
-                    "rule": "R7 – Risky funnel to hub",
-                    "summary": summary,
-                    "status": "Open",
-                    "created": datetime.utcnow().isoformat() + "Z",
-                }
-            )
-        return jsonify(alerts)
+        return _neo_alerts_response("r7")
 
     @app.route("/api/neo-alerts/r8", methods=["GET"])
     def neo4j_progressive_chains_r8():
-        if not driver:
-            return jsonify({"status": "error", "message": "Neo4j driver not configured"}), 500
-        name = request.args.get("name", "Aubree David")
-        try:
-            duration = int(request.args.get("duration", 4000))
-        except Exception:
-            duration = 4000
-        try:
-            amount = float(request.args.get("amount", 50000))
-        except Exception:
-            amount = 50000.0
-        try:
-            min_hops = int(request.args.get("minHops", 5))
-        except Exception:
-            min_hops = 5
-        try:
-            max_hops = int(request.args.get("maxHops", 10))
-        except Exception:
-            max_hops = 10
-        try:
-            limit = int(request.args.get("limit", 5))
-        except Exception:
-            limit = 5
-
-        with driver.session() as session:
-            records = session.execute_read(fetch_progressive_chain_r8, name, duration, amount, min_hops, max_hops, limit)
-
-        alerts = []
-        for idx, rec in enumerate(records, start=1):
-            severity = rec.get("severity") or "High"
-            summary = rec.get("summary") or "Progressive chain detected"
-            alerts.append(
-                {
-                    "id": idx,
-                    "ruleKey": "R8",
-                    "accountId": rec.get("accountId"),
-                    "customerName": rec.get("customerName"),
-                    "severity": severity,
-                    "rule": "R8 – Progressive time-window chain",
-                    "summary": summary,
-                    "pathLength": rec.get("pathLength"),
-                    "maxAmount": rec.get("maxAmount"),
-                    "status": "Open",
-                    "created": datetime.utcnow().isoformat() + "Z",
-                }
-            )
-        return jsonify(alerts)
+        return _neo_alerts_response("r8")
 
     @app.route("/api/neo-alerts/r9", methods=["GET"])
     def neo4j_cycle_r9():
-        if not driver:
-            return jsonify({"status": "error", "message": "Neo4j driver not configured"}), 500
-        name = request.args.get("name", "Aubree David")
-        try:
-            min_amount = float(request.args.get("minAmount", 1200000))
-        except Exception:
-            min_amount = 1200000.0
-        try:
-            min_hops = int(request.args.get("minHops", 10))
-        except Exception:
-            min_hops = 10
-        try:
-            max_hops = int(request.args.get("maxHops", 12))
-        except Exception:
-            max_hops = 12
-        try:
-            limit = int(request.args.get("limit", 5))
-        except Exception:
-            limit = 5
-
-        with driver.session() as session:
-            records = session.execute_read(fetch_cycle_r9, name, min_amount, min_hops, max_hops, limit)
-
-        alerts = []
-        for idx, rec in enumerate(records, start=1):
-            severity = rec.get("severity") or "High"
-            summary = rec.get("summary") or "Cycle detected"
-            alerts.append(
-                {
-                    "id": idx,
-                    "ruleKey": "R9",
-                    "accountId": rec.get("accountId"),
-                    "customerName": rec.get("customerName"),
-                    "severity": severity,
-                    "rule": "R9 – High-value multi-hop cycle",
-                    "summary": summary,
-                    "pathLength": rec.get("pathLength"),
-                    "maxAmount": rec.get("maxAmount"),
-                    "status": "Open",
-                    "created": datetime.utcnow().isoformat() + "Z",
-                }
-            )
-        return jsonify(alerts)
+        return _neo_alerts_response("r9")
 
     @app.route("/api/neo-alerts/r10", methods=["GET"])
     def neo4j_progressive_high_value_r10():
-        if not driver:
-            return jsonify({"status": "error", "message": "Neo4j driver not configured"}), 500
-        name = request.args.get("name", "Aubree David")
-        try:
-            min_amount = float(request.args.get("minAmount", 800000))
-        except Exception:
-            min_amount = 800000.0
-        try:
-            min_hops = int(request.args.get("minHops", 3))
-        except Exception:
-            min_hops = 3
-        try:
-            max_hops = int(request.args.get("maxHops", 8))
-        except Exception:
-            max_hops = 8
-        try:
-            limit = int(request.args.get("limit", 5))
-        except Exception:
-            limit = 5
-
-        with driver.session() as session:
-            records = session.execute_read(fetch_progressive_high_value_r10, name, min_amount, min_hops, max_hops, limit)
-
-        alerts = []
-        for idx, rec in enumerate(records, start=1):
-            severity = rec.get("severity") or "High"
-            summary = rec.get("summary") or "Progressive high-value chain"
-            alerts.append(
-                {
-                    "id": idx,
-                    "ruleKey": "R10",
-                    "accountId": rec.get("accountId"),
-                    "customerName": rec.get("customerName"),
-                    "severity": severity,
-                    "rule": "R10 – Time-ordered high-value chain",
-                    "summary": summary,
-                    "pathLength": rec.get("pathLength"),
-                    "maxAmount": rec.get("maxAmount"),
-                    "status": "Open",
-                    "created": datetime.utcnow().isoformat() + "Z",
-                }
-            )
-        return jsonify(alerts)
+        return _neo_alerts_response("r10")
 
     def _resolve_rule_pipeline(include_temporal: bool) -> list:
         """
@@ -1028,6 +728,8 @@ def create_app():
                     "customerName": rec.get("customerName"),
                     "riskScore": risk,
                     "ringSize": ring_size,
+                    "communityId": rec.get("communityId"),
+                    "communitySize": rec.get("communitySize"),
                     "severity": severity,
                     "rule": "R3 – Mule ring flow",
                     "summary": summary,
@@ -1056,6 +758,8 @@ def create_app():
                     "riskScore": risk,
                     "riskySenders": risky,
                     "txCount": tx_count,
+                    "communityId": rec.get("communityId"),
+                    "communitySize": rec.get("communitySize"),
                     "severity": severity,
                     "rule": "R7 – Risky funnel to hub",
                     "summary": summary,
@@ -1147,27 +851,28 @@ def create_app():
         alerts = []
         with driver.session() as session:
             for rule_key in pipeline:
-                if rule_key == "R1":
-                    recs = session.execute_read(fetch_account_alerts_r1, risk_threshold, limit)
-                    alerts.extend(_build_r1_alerts(recs, exclude_flagged, is_flagged))
-                elif rule_key == "R2":
-                    recs = session.execute_read(fetch_device_alerts_r2, high_risk, min_risky, limit)
-                    alerts.extend(_build_r2_alerts(recs, exclude_flagged, is_flagged))
-                elif rule_key == "R3":
-                    recs = session.execute_read(fetch_mule_ring_alerts_r3, min_risky, limit)
-                    alerts.extend(_build_r3_alerts(recs, exclude_flagged, is_flagged))
-                elif rule_key == "R7":
-                    recs = session.execute_read(fetch_hub_alerts_r7, risk_threshold, min_risky, limit)
-                    alerts.extend(_build_r7_alerts(recs, exclude_flagged, is_flagged))
-                elif rule_key == "R8" and include_temporal:
-                    recs = session.execute_read(fetch_progressive_chain_r8, name_param, temporal_duration, temporal_amount, 5, 10, min(5, limit))
-                    alerts.extend(_build_temporal_alerts("R8", recs))
-                elif rule_key == "R9" and include_temporal:
-                    recs = session.execute_read(fetch_cycle_r9, name_param, temporal_min_amount, 10, 12, min(5, limit))
-                    alerts.extend(_build_temporal_alerts("R9", recs))
-                elif rule_key == "R10" and include_temporal:
-                    recs = session.execute_read(fetch_progressive_high_value_r10, name_param, temporal_min_amount, 3, 8, min(5, limit))
-                    alerts.extend(_build_temporal_alerts("R10", recs))
+                with query_tags(rule=rule_key):
+                    if rule_key == "R1":
+                        recs = session.execute_read(fetch_account_alerts_r1, risk_threshold, limit)
+                        alerts.extend(_build_r1_alerts(recs, exclude_flagged, is_flagged))
+                    elif rule_key == "R2":
+                        recs = session.execute_read(fetch_device_alerts_r2, high_risk, min_risky, limit)
+                        alerts.extend(_build_r2_alerts(recs, exclude_flagged, is_flagged))
+                    elif rule_key == "R3":
+                        recs = session.execute_read(fetch_mule_ring_alerts_r3, min_risky, limit)
+                        alerts.extend(_build_r3_alerts(recs, exclude_flagged, is_flagged))
+                    elif rule_key == "R7":
+                        recs = session.execute_read(fetch_hub_alerts_r7, risk_threshold, min_risky, limit)
+                        alerts.extend(_build_r7_alerts(recs, exclude_flagged, is_flagged))
+                    elif rule_key == "R8" and include_temporal:
+                        recs = session.execute_read(fetch_progressive_chain_r8, name_param, temporal_duration, temporal_amount, 5, 10, min(5, limit))
+                        alerts.extend(_build_temporal_alerts("R8", recs))
+                    elif rule_key == "R9" and include_temporal:
+                        recs = session.execute_read(fetch_cycle_r9, name_param, temporal_min_amount, 10, 12, min(5, limit))
+                        alerts.extend(_build_temporal_alerts("R9", recs))
+                    elif rule_key == "R10" and include_temporal:
+                        recs = session.execute_read(fetch_progressive_high_value_r10, name_param, temporal_min_amount, 3, 8, min(5, limit))
+                        alerts.extend(_build_temporal_alerts("R10", recs))
 
         return jsonify(alerts)
 
@@ -1198,21 +903,12 @@ def create_app():
         LIMIT 15
         """
         with driver.session() as session:
-            records = session.run(cypher, qLower=q_lower)
+            records = session.execute_read(fetch_all, cypher, {"qLower": q_lower})
             for rec in records:
                 node = rec["n"]
                 lbls = rec["lbls"]
-                raw_props = dict(node)
-                props = {}
-                for k, v in raw_props.items():
-                    try:
-                        jsonify(v)
-                        props[k] = v
-                    except Exception:
-                        if hasattr(v, "isoformat"):
-                            props[k] = v.isoformat()
-                        else:
-                            props[k] = str(v)
+                # Neo4j temporal/spatial values are converted by the JSON provider.
+                props = dict(node)
                 label = lbls[0] if lbls else "Node"
                 anchor = props.get("accountId") or props.get("deviceId") or props.get("id") or props.get("name") or props.get("ssn") or props.get("phoneNumber") or props.get("email")
                 display = props.get("customerName") or props.get("name") or props.get("email") or props.get("ssn") or props.get("phoneNumber") or anchor
@@ -1226,165 +922,167 @@ def create_app():
                 )
         return jsonify(results)
 
-    def run_ai_assessment(rule_key: str, anchor: str):
-        graph = _graph_for_identifier(anchor) if rule_key == "R2" else _graph_for_account(anchor)
-        png_path = _render_dot_png(graph["nodes"], graph["edges"])
-
-        openai_key = os.getenv("OPENAI_API_KEY")
-        assessment = "OpenAI key not configured; no assessment generated."
-        if openai_key:
-            try:
-                prompt = (
-                    f"Assess this fraud case. Rule={rule_key}, Anchor={anchor}. "
-                    f"Nodes: {len(graph['nodes'])}, Edges: {len(graph['edges'])}. "
-                    "Flagged nodes may indicate known fraud. Provide a concise risk assessment and next action."
-                )
-                resp = requests.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {openai_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "gpt-4o",
-                        "messages": [
-                            {"role": "system", "content": "You are a fraud analyst. Be concise."},
-                            {"role": "user", "content": prompt},
-                        ],
-                        "max_tokens": 180,
-                    },
-                    timeout=15,
-                )
-                print(f"[AI-ASSESS] status={resp.status_code} body={resp.text[:500]}")
-                if resp.ok:
-                    data = resp.json()
-                    assessment = data["choices"][0]["message"]["content"]
-                else:
-                    assessment = f"OpenAI error: {resp.text}"
-            except Exception as exc:
-                assessment = f"OpenAI call failed: {exc}"
+    def _assessment_graph(rule_key: str, anchor: str):
+        key = assessment_graph_key(rule_key, anchor)
+        graph = graph_cache.get(key)
+        if graph is None:
+            graph = _graph_for_identifier(anchor) if key[0] == "identifier" else _graph_for_account(anchor)
+            graph_cache.set(key, graph)
+        return graph
+
+    def run_ai_assessment(rule_key: str, anchor: str, fmt: str = "png", render_wait: float = None):
+        graph = _assessment_graph(rule_key, anchor)
+        # Graphviz runs on the render pool; we only wait briefly and hand back a handle otherwise.
+        render = render_service.render(
+            graph["nodes"], graph["edges"], fmt=fmt, wait=RENDER_WAIT_SECONDS if render_wait is None else render_wait
+        )
+        fingerprint = graph_fingerprint(graph["nodes"], graph["edges"])
+        assessment, cached = assessment_service.assess(rule_key, anchor, graph, fingerprint)
 
         return {
             "status": "ok",
             "assessment": assessment,
-            "image_path": png_path,
+            "assessmentCached": cached,
+            "graphFingerprint": fingerprint,
+            "image_path": render.get("path"),
+            "render": {k: v for k, v in render.items() if k != "path"},
             "ruleKey": rule_key,
             "anchor": anchor,
             "graph": graph,
         }
 
+    def _fetch_faf_rows(limit: int):
+        session_db = get_session()
+        try:
+            return (
+                session_db.query(Alert, RuleDefinition, Account)
+                .join(RuleDefinition, Alert.rule_id == RuleDefinition.id)
+                .join(Account, Alert.subject_account_id == Account.id)
+                .filter(RuleDefinition.name.like("FAF-%"))
+                .order_by(Alert.created_at.desc())
+                .limit(limit * 2)
+                .all()
+            )
+        finally:
+            session_db.close()
+
     def compute_ai_top(risk_threshold=0.8, high_risk=None, min_risky=3, limit=5, exclude_flagged=True):
+        """
+        Top `limit` unflagged suspects across R1/R2/R3/R7 and persisted FAF alerts.
+        The four rule queries and the FAF query run concurrently; rows are then fed
+        through a bounded top-k heap so flag checks and payload construction only
+        happen for rows that can still make the cut.
+        """
         if not driver:
             raise RuntimeError("Neo4j driver not configured")
         high_risk = high_risk if high_risk is not None else risk_threshold
 
-        alerts = []
-        with driver.session() as session:
-            r1 = session.execute_read(fetch_account_alerts_r1, risk_threshold, limit)
-            r2 = session.execute_read(fetch_device_alerts_r2, high_risk, min_risky, limit)
-            r3 = session.execute_read(fetch_mule_ring_alerts_r3, min_risky, limit)
-            r7 = session.execute_read(fetch_hub_alerts_r7, risk_threshold, min_risky, limit)
+        futures = {
+            "R1": submit_in_context(_rule_fetch_pool, _execute_read, fetch_account_alerts_r1, risk_threshold, limit),
+            "R2": submit_in_context(_rule_fetch_pool, _execute_read, fetch_device_alerts_r2, high_risk, min_risky, limit),
+            "R3": submit_in_context(_rule_fetch_pool, _execute_read, fetch_mule_ring_alerts_r3, min_risky, limit),
+            "R7": submit_in_context(_rule_fetch_pool, _execute_read, fetch_hub_alerts_r7, risk_threshold, min_risky, limit),
+            "FAF": submit_in_context(_rule_fetch_pool, _fetch_faf_rows, limit),
+        }
+        results = {key: fut.result() for key, fut in futures.items()}
+        selector = TopKSelector(limit)
 
-        def severity_rank(sev: str) -> int:
-            order = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
-            return order.get(sev, 3)
+        def r1_severity(rec):
+            risk = rec.get("riskScore") or 0
+            return "Critical" if risk >= 0.95 else "High" if risk >= 0.9 else "Medium"
 
-        for idx, rec in enumerate(r1, start=1):
-            if exclude_flagged and is_flagged_record(rec, "ACCOUNT"):
-                continue
+        def build_r1(idx, rec):
             risk = rec.get("riskScore") or 0
-            severity = "Critical" if risk >= 0.95 else "High" if risk >= 0.9 else "Medium"
-            alerts.append(
-                {
-                    "ruleKey": "R1",
-                    "id": f"R1-{idx}",
-                    "accountId": rec.get("accountId"),
-                    "customerName": rec.get("customerName"),
-                    "severity": severity,
-                    "summary": f"{rec.get('customerName')} ({rec.get('accountId')}) risk={risk:.2f}",
-                }
-            )
+            return {
+                "ruleKey": "R1",
+                "id": f"R1-{idx}",
+                "accountId": rec.get("accountId"),
+                "customerName": rec.get("customerName"),
+                "severity": r1_severity(rec),
+                "summary": f"{rec.get('customerName')} ({rec.get('accountId')}) risk={risk:.2f}",
+            }
 
-        for idx, rec in enumerate(r2, start=1):
-            if exclude_flagged and is_flagged_record(rec, "DEVICE"):
-                continue
+        def build_r2(idx, rec):
             risky = rec.get("riskyAccounts") or 0
             total = rec.get("totalAccounts") or 0
-            severity = "High" if risky >= 3 else "Medium"
-            alerts.append(
-                {
-                    "ruleKey": "R2",
-                    "id": f"R2-{idx}",
-                    "deviceId": rec.get("deviceId"),
-                    "deviceType": rec.get("deviceType"),
-                    "severity": severity,
-                    "summary": f"{rec.get('deviceId')} linked to {risky} risky / {total} total",
-                }
-            )
+            return {
+                "ruleKey": "R2",
+                "id": f"R2-{idx}",
+                "deviceId": rec.get("deviceId"),
+                "deviceType": rec.get("deviceType"),
+                "severity": "High" if risky >= 3 else "Medium",
+                "summary": f"{rec.get('deviceId')} linked to {risky} risky / {total} total",
+            }
 
-        for idx, rec in enumerate(r3, start=1):
-            if exclude_flagged and is_flagged_record(rec, "ACCOUNT"):
-                continue
+        def build_r3(idx, rec):
             ring_size = rec.get("ringSize") or 0
             risk = rec.get("riskScore") or 0
-            severity = "Critical" if ring_size >= 5 else "High"
-            alerts.append(
-                {
-                    "ruleKey": "R3",
-                    "id": f"R3-{idx}",
-                    "accountId": rec.get("accountId"),
-                    "customerName": rec.get("customerName"),
-                    "severity": severity,
-                    "summary": f"{rec.get('accountId')} in ring size {ring_size} (risk={risk:.2f})",
-                }
-            )
+            return {
+                "ruleKey": "R3",
+                "id": f"R3-{idx}",
+                "accountId": rec.get("accountId"),
+                "customerName": rec.get("customerName"),
+                "severity": "Critical" if ring_size >= 5 else "High",
+                "ringSize": ring_size,
+                "communityId": rec.get("communityId"),
+                "communitySize": rec.get("communitySize"),
+                "summary": f"{rec.get('accountId')} in ring size {ring_size} (risk={risk:.2f})",
+            }
 
-        for idx, rec in enumerate(r7, start=1):
-            if exclude_flagged and is_flagged_record(rec, "ACCOUNT"):
-                continue
+        def build_r7(idx, rec):
             risky = rec.get("riskySenders") or 0
             tx_count = rec.get("txCount") or 0
-            severity = "Critical" if risky >= 5 else "High"
-            alerts.append(
-                {
-                    "ruleKey": "R7",
-                    "id": f"R7-{idx}",
-                    "accountId": rec.get("accountId"),
-                    "customerName": rec.get("customerName"),
-                    "severity": severity,
-                    "summary": f"{rec.get('accountId')} receives from {risky} risky senders ({tx_count} tx)",
-                }
-            )
+            return {
+                "ruleKey": "R7",
+                "id": f"R7-{idx}",
+                "accountId": rec.get("accountId"),
+                "customerName": rec.get("customerName"),
+                "severity": "Critical" if risky >= 5 else "High",
+                "communityId": rec.get("communityId"),
+                "communitySize": rec.get("communitySize"),
+                "summary": f"{rec.get('accountId')} receives from {risky} risky senders ({tx_count} tx)",
+            }
 
-        # Include FAF alerts from persisted Alert table (rule_key like FAF-%)
-        session_db = get_session()
-        try:
-            faf_results = (
-                session_db.query(Alert, RuleDefinition, Account)
-                .join(RuleDefinition, Alert.rule_id == RuleDefinition.id)
-                .join(Account, Alert.subject_account_id == Account.id)
-                .filter(RuleDefinition.name.like("FAF-%"))
-                .order_by(Alert.created_at.desc())
-                .limit(limit * 2)
-                .all()
-            )
-            for alert_obj, rule_def, acct in faf_results:
-                rec = {
-                    "ruleKey": rule_def.name,
-                    "id": f"{rule_def.name}-{alert_obj.id}",
-                    "accountId": acct.account_number,
-                    "customerName": acct.customer_name,
-                    "severity": (alert_obj.severity or "HIGH").title(),
-                    "summary": alert_obj.summary,
-                }
-                if exclude_flagged and is_flagged_record(rec, "ACCOUNT"):
+        # (rule, anchor type, severity fn, builder). Each query returns rows best-first,
+        # so once a row cannot enter the heap the rest of that rule cannot either.
+        rule_specs = [
+            ("R1", "ACCOUNT", r1_severity, build_r1),
+            ("R2", "DEVICE", lambda rec: "High" if (rec.get("riskyAccounts") or 0) >= 3 else "Medium", build_r2),
+            ("R3", "ACCOUNT", lambda rec: "Critical" if (rec.get("ringSize") or 0) >= 5 else "High", build_r3),
+            ("R7", "ACCOUNT", lambda rec: "Critical" if (rec.get("riskySenders") or 0) >= 5 else "High", build_r7),
+        ]
+        for rule_key, anchor_type, severity_of, build in rule_specs:
+            for idx, rec in enumerate(results[rule_key], start=1):
+                severity = severity_of(rec)
+                priority = priority_score(rule_key, rec)
+                if not selector.accepts(severity, priority):
+                    break
+                if exclude_flagged and is_flagged_record(rec, anchor_type):
                     continue
-                alerts.append(rec)
-        finally:
-            session_db.close()
+                alert = build(idx, rec)
+                alert["priorityScore"] = round(priority, 4)
+                selector.push(severity, priority, alert)
+
+        # FAF rows are ordered by recency, not severity, so skip (rather than stop at) losers.
+        for alert_obj, rule_def, acct in results["FAF"]:
+            severity = (alert_obj.severity or "HIGH").title()
+            priority = priority_score(rule_def.name, {"afasa_risk_score": alert_obj.afasa_risk_score})
+            if not selector.accepts(severity, priority):
+                continue
+            rec = {
+                "ruleKey": rule_def.name,
+                "id": f"{rule_def.name}-{alert_obj.id}",
+                "accountId": acct.account_number,
+                "customerName": acct.customer_name,
+                "severity": severity,
+                "priorityScore": round(priority, 4),
+                "summary": alert_obj.summary,
+            }
+            if exclude_flagged and is_flagged_record(rec, "ACCOUNT"):
+                continue
+            selector.push(severity, priority, rec)
 
-        alerts_sorted = sorted(alerts, key=lambda a: severity_rank(a.get("severity")))
-        return alerts_sorted[:limit]
+        return selector.results()
 
     @app.route("/api/ai-agent/assess", methods=["POST"])
     def ai_agent_assess():
@@ -1393,9 +1091,43 @@ def create_app():
         anchor = payload.get("anchor") or payload.get("accountId") or payload.get("deviceId")
         if not anchor:
             return jsonify({"status": "error", "message": "Missing anchor"}), 400
-        result = run_ai_assessment(rule_key, anchor)
+        fmt = payload.get("format") or "png"
+        try:
+            render_wait = min(float(payload["wait"]), render_service.timeout) if "wait" in payload else None
+        except (TypeError, ValueError):
+            render_wait = None
+        result = run_ai_assessment(rule_key, anchor, fmt=fmt, render_wait=render_wait)
         return jsonify(result)
 
+    @app.route("/api/ai-agent/render/<handle>", methods=["GET"])
+    def ai_agent_render(handle: str):
+        """Poll a render handle returned by /assess; serves the image once ready."""
+        status = render_service.status(handle)
+        if status["status"] == "ready":
+            mimetype = "image/svg+xml" if status.get("format") == "svg" else "image/png"
+            return send_file(status["path"], mimetype=mimetype, max_age=86400)
+        if status["status"] == "invalid":
+            return jsonify({"status": "error", "message": "Invalid render handle"}), 404
+        if status["status"] == "failed":
+            return jsonify({"status": "error", "handle": handle, "message": status.get("error")}), 500
+        if status["status"] == "unknown":
+            return jsonify({"status": "error", "handle": handle, "message": "Unknown render handle; request the assessment again"}), 404
+        resp = jsonify({"status": "pending", "handle": handle})
+        resp.headers["Retry-After"] = "1"
+        return resp, 202
+
+    @app.route("/api/ai-agent/cache", methods=["GET"])
+    def ai_agent_cache_stats():
+        return jsonify(
+            {
+                "status": "ok",
+                "renders": render_cache.stats(),
+                "render_queue": render_service.stats(),
+                "graphs": graph_cache.stats(),
+                "assessments": assessment_service.stats(),
+            }
+        )
+
     @app.route("/api/ai-agent/top", methods=["GET"])
     def ai_agent_top():
         """
@@ -1501,7 +1233,7 @@ def create_app():
                 if len(parts) == 3:
                     rule_key, anchor = parts[1], parts[2]
                     _telegram_send_message(chat_id, f"Running assessment for {rule_key} ({anchor})…")
-                    result = run_ai_assessment(rule_key, anchor)
+                    result = run_ai_assessment(rule_key, anchor, render_wait=render_service.timeout)
                     caption = result.get("assessment") or "No assessment."
                     img_path = result.get("image_path")
                     if img_path and os.path.exists(img_path):
@@ -1543,6 +1275,15 @@ def create_app():
         _telegram_send_message(chat_id, "Send /sweep to look for unflagged suspects.")
         return {"handled": "fallback"}
 
+    # Webhook updates are processed off the request thread; see UpdateQueue. Its
+    # workers start with the first update; app.extensions lets the owner stop() them.
+    telegram_updates = UpdateQueue(
+        _handle_telegram_update,
+        workers=int(os.getenv("TELEGRAM_UPDATE_WORKERS", "2")),
+        max_pending=int(os.getenv("TELEGRAM_UPDATE_MAX_PENDING", "100")),
+    )
+    app.extensions["telegram_updates"] = telegram_updates
+
     @app.route("/api/telegram/webhook", methods=["POST"])
     def telegram_webhook():
         secret = os.getenv("TELEGRAM_WEBHOOK_SECRET")
@@ -1553,12 +1294,19 @@ def create_app():
             update = request.get_json(force=True) or {}
         except Exception:
             update = {}
+        if not update:
+            return jsonify({"status": "ok", "result": {"handled": "empty"}})
         try:
-            result = _handle_telegram_update(update)
-            return jsonify({"status": "ok", "result": result})
-        except Exception as exc:
-            print(f"[TELEGRAM-WEBHOOK] error: {exc}")
-            return jsonify({"status": "error", "message": str(exc)}), 500
+            queued = telegram_updates.submit(update)
+        except UpdateQueueFull as exc:
+            # Non-2xx makes Telegram redeliver later instead of losing the update.
+            print(f"[TELEGRAM-WEBHOOK] {exc}")
+            return jsonify({"status": "error", "message": str(exc)}), 503
+        return jsonify({"status": "ok", "result": {"handled": "queued" if queued else "duplicate"}})
+
+    @app.route("/api/telegram/stats", methods=["GET"])
+    def telegram_stats():
+        return jsonify(telegram_updates.stats())
 
     @app.route("/api/db-health", methods=["GET"])
     def db_health():
@@ -1576,7 +1324,16 @@ def create_app():
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes added to models whose tables already exist.
+    for table in (AfasaDisputedTransaction.__table__, AfasaVerificationEvent.__table__):
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     seed_data()
+    session = get_session()
+    try:
+        backfill_dispute_rollups(session)
+    finally:
+        session.close()
 
 
 def verify_database_connection():
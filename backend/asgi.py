@@ -0,0 +1,239 @@
+"""
+ASGI entry point: `uvicorn backend.asgi:app --workers N`.
+
+The Neo4j-bound read endpoints run on the event loop with the async Neo4j
+driver, so a slow traversal waits on a socket instead of holding a worker
+thread:
+
+- /api/neo-alerts/<rule> (r1, r2, r3, r7, r8, r9, r10)
+- /api/neo4j/graph/{account,device,identifier}/<id>
+- /api/ai-agent/assess, which prefetches the neighborhood graph into graph_cache
+
+Everything else (SQLAlchemy routes, the rest of /api/ai-agent, search, admin)
+is served by the Flask app on a pool of ASGI_WSGI_THREADS threads. The Flask
+app also still runs on its own under gunicorn (`gunicorn backend.app:app`).
+ASGI_NATIVE_ROUTES=0 sends every request through the pool.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from neo4j import AsyncGraphDatabase, Bookmarks
+
+from backend.app import (
+    NEO4J_PASSWORD,
+    NEO4J_URI,
+    NEO4J_USER,
+    NEO_ALERT_ARGS,
+    app as flask_app,
+    assessment_graph_key,
+    cycle_row,
+    graph_cache,
+    neo_alert_args,
+    neo_alerts,
+    progressive_chain_row,
+    progressive_high_value_row,
+    request_metrics,
+)
+from backend.services.asgi_server import AsgiApp, JSONResponse, Router, WsgiBridge
+from backend.services.http_cache import GRAPH_VERSION_CYPHER, graph_version_from_record, make_etag
+from backend.services.metrics import count_query
+from backend.services.neo4j_client import bookmarks
+from backend.services.neighborhood import (
+    account_graph_from_record,
+    account_query,
+    flag_version,
+    identifier_graph_from_record,
+    identifier_query,
+    limits_from_args,
+    overlay_flags,
+)
+from backend.services.rule_queries import (
+    R1_CYPHER,
+    R2_CYPHER,
+    R3_COMMUNITY_CYPHER,
+    R3_HAS_COMMUNITIES_CYPHER,
+    R3_LIVE_CYPHER,
+    R7_CYPHER,
+    clamp_hops,
+    r8_cypher,
+    r9_cypher,
+    r10_cypher,
+)
+from backend.services.slow_queries import query_tags, slow_query_log
+
+WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+NATIVE_ROUTES = os.getenv("ASGI_NATIVE_ROUTES", "1") != "0"
+
+# Created on lifespan startup so it belongs to the server's event loop.
+driver = None
+# Async reads also wait for writes made through the sync driver (flags from the Flask routes).
+async_bookmarks = AsyncGraphDatabase.bookmark_manager(bookmarks_supplier=lambda: Bookmarks.from_raw_values(bookmarks.get_bookmarks()))
+
+
+async def _records(tx, cypher: str, **params):
+    count_query("neo4j")
+    started = time.perf_counter()
+    result = await tx.run(cypher, **params)
+    records = [record async for record in result]
+    slow_query_log.record("neo4j", cypher, params, (time.perf_counter() - started) * 1000)
+    return records
+
+
+async def _execute_read(fn, *args, **kwargs):
+    """Async counterpart of app._execute_read, with the same slow-transaction logging."""
+    name = fn.__name__
+    started = time.perf_counter()
+    try:
+        with query_tags(function=name):
+            async with driver.session(bookmark_manager=async_bookmarks) as session:
+                return await session.execute_read(fn, *args, **kwargs)
+    finally:
+        params = dict({f"arg{i}": v for i, v in enumerate(args)}, **kwargs)
+        slow_query_log.record("neo4j_tx", name, params, (time.perf_counter() - started) * 1000)
+
+
+# Async twins of the fetchers in app.py; the Cypher and row shaping are shared.
+
+
+async def fetch_account_alerts_r1(tx, min_risk: float, limit: int):
+    return [r.data() for r in await _records(tx, R1_CYPHER, minRisk=min_risk, limit=limit)]
+
+
+async def fetch_device_alerts_r2(tx, high_risk: float, min_risky: int, limit: int):
+    records = await _records(tx, R2_CYPHER, highRiskThreshold=high_risk, minRiskyAccounts=min_risky, limit=limit)
+    return [r.data() for r in records]
+
+
+async def fetch_mule_ring_alerts_r3(tx, min_risky: int, limit: int):
+    cypher = R3_COMMUNITY_CYPHER if await _records(tx, R3_HAS_COMMUNITIES_CYPHER) else R3_LIVE_CYPHER
+    return [r.data() for r in await _records(tx, cypher, minRisky=min_risky, limit=limit)]
+
+
+async def fetch_hub_alerts_r7(tx, risk_threshold: float, min_risky: int, limit: int):
+    records = await _records(tx, R7_CYPHER, riskThreshold=risk_threshold, minRiskyAccounts=min_risky, limit=limit)
+    return [r.data() for r in records]
+
+
+async def fetch_progressive_chain_r8(tx, name: str, duration: int, amount: float, min_hops: int, max_hops: int, limit: int):
+    cypher = r8_cypher(name, *clamp_hops(min_hops, max_hops))
+    records = await _records(tx, cypher, name=name, duration=duration, amount=amount, limit=limit)
+    return [progressive_chain_row(r, name, duration, amount) for r in records]
+
+
+async def fetch_cycle_r9(tx, name: str, min_amount: float, min_hops: int, max_hops: int, limit: int):
+    cypher = r9_cypher(name, *clamp_hops(min_hops, max_hops))
+    return [cycle_row(r, name, min_amount) for r in await _records(tx, cypher, name=name, minAmount=min_amount, limit=limit)]
+
+
+async def fetch_progressive_high_value_r10(tx, name: str, min_amount: float, min_hops: int, max_hops: int, limit: int):
+    cypher = r10_cypher(name, *clamp_hops(min_hops, max_hops))
+    records = await _records(tx, cypher, name=name, minAmount=min_amount, limit=limit)
+    return [progressive_high_value_row(r, name, min_amount) for r in records]
+
+
+ASYNC_NEO_ALERT_FETCHERS = {
+    "r1": fetch_account_alerts_r1,
+    "r2": fetch_device_alerts_r2,
+    "r3": fetch_mule_ring_alerts_r3,
+    "r7": fetch_hub_alerts_r7,
+    "r8": fetch_progressive_chain_r8,
+    "r9": fetch_cycle_r9,
+    "r10": fetch_progressive_high_value_r10,
+}
+
+
+async def _single(tx, cypher: str, **params):
+    records = await _records(tx, cypher, **params)
+    return records[0] if records else None
+
+
+async def _read_single(cypher: str, params):
+    return await _execute_read(_single, cypher, **params)
+
+
+router = Router()
+
+
+def _neo_alerts_route(rule: str):
+    async def handler(request):
+        if driver is None:
+            return JSONResponse({"status": "error", "message": "Neo4j driver not configured"}, 500)
+        records = await _execute_read(ASYNC_NEO_ALERT_FETCHERS[rule], *neo_alert_args(rule, request.args))
+        # Shaping checks investigator flags in Postgres (blocking), so it runs off the loop.
+        return JSONResponse(await asyncio.to_thread(neo_alerts, rule, records))
+
+    return handler
+
+
+async def _graph_view(request, query, from_record, not_found: str):
+    if driver is None:
+        return JSONResponse({"status": "error", "message": "Neo4j driver not configured"}, 500)
+    version, flags = await asyncio.gather(_read_single(GRAPH_VERSION_CYPHER, {}), asyncio.to_thread(flag_version))
+    etag = make_etag(request.full_path, graph_version_from_record(version), flags)
+    if request.if_none_match.contains_weak(etag):
+        return JSONResponse.not_modified(etag)
+    graph = from_record(await _read_single(*query))
+    if graph is None:
+        return JSONResponse({"status": "error", "message": not_found}, 404)
+    return JSONResponse({"status": "ok", **await asyncio.to_thread(overlay_flags, graph)}, etag=etag)
+
+
+async def graph_account(request, account_id):
+    query = account_query(account_id, **limits_from_args(request.args, tx=7))
+    return await _graph_view(request, query, account_graph_from_record, "Account not found")
+
+
+async def graph_device(request, device_id):
+    query = identifier_query(device_id, devices=True, **limits_from_args(request.args))
+    return await _graph_view(request, query, identifier_graph_from_record, "Device not found")
+
+
+async def graph_identifier(request, identifier):
+    query = identifier_query(identifier, **limits_from_args(request.args))
+    return await _graph_view(request, query, identifier_graph_from_record, "Identifier not found")
+
+
+async def ai_agent_assess(request):
+    """Fetch the assessment's neighborhood here, then let the Flask route do the rest from graph_cache."""
+    try:
+        payload = json.loads(request.body or b"{}") or {}
+    except ValueError:
+        return None
+    rule_key = payload.get("ruleKey") or payload.get("rule") or "R1"
+    anchor = payload.get("anchor") or payload.get("accountId") or payload.get("deviceId")
+    if driver is None or not anchor:
+        return None
+    key = assessment_graph_key(rule_key, anchor)
+    if graph_cache.get(key) is None:
+        if key[0] == "identifier":
+            graph = identifier_graph_from_record(await _read_single(*identifier_query(anchor)))
+        else:
+            graph = account_graph_from_record(await _read_single(*account_query(anchor)))
+        graph_cache.set(key, graph or {"nodes": [], "edges": [], "truncated": {}})
+    return None
+
+
+if NATIVE_ROUTES:
+    for _rule in NEO_ALERT_ARGS:
+        router.add("GET", f"/api/neo-alerts/{_rule}", _neo_alerts_route(_rule))
+    router.add("GET", "/api/neo4j/graph/account/<account_id>", graph_account)
+    router.add("GET", "/api/neo4j/graph/device/<device_id>", graph_device)
+    router.add("GET", "/api/neo4j/graph/identifier/<identifier>", graph_identifier)
+    router.add("POST", "/api/ai-agent/assess", ai_agent_assess)
+
+
+async def startup():
+    global driver
+    if NATIVE_ROUTES and all([NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD]):
+        driver = AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+
+
+async def shutdown():
+    if driver is not None:
+        await driver.close()
+
+
+app = AsgiApp(router, WsgiBridge(flask_app, threads=WSGI_THREADS), metrics=request_metrics, on_startup=startup, on_shutdown=shutdown)
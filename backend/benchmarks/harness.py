@@ -0,0 +1,91 @@
+import gc
+import math
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return math.nan
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = int(math.floor(pos))
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1, items: Optional[Callable[[Any], int]] = None) -> Dict[str, Any]:
+    """
+    Run `fn` warmup + repeat times and summarise wall-clock latency (ms), throughput
+    and peak traced memory. `items(result)` gives the number of units processed per
+    call (rows, accounts, ...) for items/s; by default throughput is calls/s.
+    """
+    result = None
+    for _ in range(warmup):
+        result = fn()
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    timings_ms = sorted(t * 1000 for t in timings)
+    total_s = sum(timings) or 1e-9
+    units = items(result) if items else 1
+    return {
+        "repeat": repeat,
+        "p50_ms": round(percentile(timings_ms, 50), 3),
+        "p95_ms": round(percentile(timings_ms, 95), 3),
+        "p99_ms": round(percentile(timings_ms, 99), 3),
+        "mean_ms": round(sum(timings_ms) / len(timings_ms), 3),
+        "min_ms": round(timings_ms[0], 3),
+        "max_ms": round(timings_ms[-1], 3),
+        "items_per_call": units,
+        "throughput_per_s": round(units * repeat / total_s, 1),
+        "peak_mem_mb": round(peak / (1024 * 1024), 3),
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10, metrics=("p50_ms", "p95_ms", "peak_mem_mb")) -> List[Dict[str, Any]]:
+    """
+    Compare two results files benchmark by benchmark. A metric regresses when it
+    grew by more than `threshold` (relative). Benchmarks missing on either side
+    are reported with status "added"/"removed".
+    """
+    rows = []
+    scales = sorted(set(baseline.get("results", {})) | set(current.get("results", {})))
+    for scale in scales:
+        old_benches = baseline.get("results", {}).get(scale, {}).get("benchmarks", {})
+        new_benches = current.get("results", {}).get(scale, {}).get("benchmarks", {})
+        for name in sorted(set(old_benches) | set(new_benches)):
+            old, new = old_benches.get(name), new_benches.get(name)
+            if old is None or new is None:
+                rows.append({"scale": scale, "benchmark": name, "status": "added" if old is None else "removed"})
+                continue
+            if "error" in old or "error" in new or "skipped" in old or "skipped" in new:
+                continue
+            for metric in metrics:
+                before, after = old.get(metric), new.get(metric)
+                if before is None or after is None:
+                    continue
+                change = (after - before) / before if before else (math.inf if after else 0.0)
+                status = "regressed" if change > threshold else "improved" if change < -threshold else "unchanged"
+                rows.append(
+                    {
+                        "scale": scale,
+                        "benchmark": name,
+                        "metric": metric,
+                        "before": before,
+                        "after": after,
+                        "change": round(change, 4) if math.isfinite(change) else None,
+                        "status": status,
+                    }
+                )
+    return rows
@@ -0,0 +1,364 @@
+"""
+Benchmark every detection rule across dataset scales.
+
+For each --scales value the harness generates a graph with
+scripts/generate_benchmark_graph.py, builds a GraphSnapshot from it and times:
+  - snapshot build and open
+  - rules R1, R2, R3, R7, R8, R9, R10 as snapshot_rule_* (snapshot_rules.py). These are
+    NumPy stand-ins for the Cypher, not Neo4j timings
+  - FAF evaluation (features derived from the generated transactions + evaluate_account)
+    over the fraud accounts
+  - AFASA scoring (evaluate_afasa_risk) against an in-memory SQLite transaction_logs
+
+Against the configured databases (once, not per scale):
+  - with --neo4j, every RULE_QUERIES entry through execute_read as neo4j_* (read-only)
+  - with --live, refresh_alerts against Postgres/Neo4j (it writes alerts)
+
+Latency percentiles, throughput and peak traced memory go to a JSON file keyed by
+commit, so runs from two commits can be compared.
+
+Env vars:
+  NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD (for --neo4j and --live)
+  DATABASE_URL (for --live)
+
+Usage:
+  python -m backend.benchmarks.run --scales 0.01 0.1 1
+  python -m backend.benchmarks.run --scales 0.1 --out /tmp/bench.json
+  python -m backend.benchmarks.run --scales 0.01 --neo4j
+  python -m backend.benchmarks.run compare results/abc123.json results/def456.json --fail-on-regression
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.benchmarks.harness import compare, measure  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+GENERATOR = PROJECT_ROOT / "backend" / "scripts" / "generate_benchmark_graph.py"
+
+# Thresholds scaled to generate_benchmark_graph.py: legitimate transfers stay
+# under 3k, ring flows are 5k-15k and layering hops 20k-100k.
+RULE_PARAMS: Dict[str, Dict[str, Any]] = {
+    "r1": {"limit": 100},
+    "r2": {"min_risky": 3, "limit": 100},
+    "r3": {"min_risky": 3, "limit": 100},
+    "r7": {"min_risky": 3, "limit": 100},
+    "r8": {"duration": 4, "amount": 20000, "min_hops": 2, "max_hops": 6, "limit": 5},
+    "r9": {"min_amount": 4000, "min_hops": 3, "max_hops": 12, "limit": 5},
+    "r10": {"min_amount": 4000, "min_hops": 3, "max_hops": 12, "limit": 5},
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _guarded(name: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    try:
+        return fn()
+    except Exception as exc:  # keep the other benchmarks running
+        print(f"  {name} failed: {exc}")
+        return {"error": str(exc)}
+
+
+def _rows(result) -> int:
+    if isinstance(result, dict):
+        return len(result.get("alerts", []))
+    return len(result)
+
+
+def generate(scale: float, seed: int, out_dir: Path) -> float:
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(GENERATOR), "--scale", str(scale), "--seed", str(seed), "--out", str(out_dir)],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - started
+
+
+def bench_rules(rules, repeat: int) -> Dict[str, Dict[str, Any]]:
+    out = {}
+    for rule, params in RULE_PARAMS.items():
+        fn = getattr(rules, rule)
+
+        def run(fn=fn, rule=rule, params=params):
+            stats = measure(lambda: fn(**params), repeat=repeat, items=_rows)
+            result = fn(**params)
+            if isinstance(result, dict):
+                stats["truncated"] = result["truncated"]
+            return stats
+
+        out[f"snapshot_rule_{rule}"] = _guarded(rule, run)
+        print(f"  snapshot_rule_{rule} (stand-in): {out[f'snapshot_rule_{rule}']}")
+    return out
+
+
+def bench_neo4j_rules(repeat: int) -> Dict[str, Dict[str, Any]]:
+    from backend.services.neo4j_client import fetch_all, fetch_single, get_driver
+    from backend.services.rule_queries import RULE_QUERIES
+
+    out = {}
+    with get_driver() as driver, driver.session() as session:
+        for name, query in RULE_QUERIES.items():
+
+            def run(query=query):
+                overrides = {}
+                if query.sample_query and query.sample_param:
+                    record = session.execute_read(fetch_single, query.sample_query)
+                    overrides[query.sample_param] = record["value"] if record else None
+                cypher, params = query.cypher(overrides)
+                return measure(lambda: session.execute_read(fetch_all, cypher, params), repeat=repeat, items=len)
+
+            out[f"neo4j_{name.lower()}"] = _guarded(name, run)
+            print(f"  neo4j_{name.lower()}: {out[f'neo4j_{name.lower()}']}")
+    return out
+
+
+def snapshot_features(snap, index: int, max_degree: int) -> Dict[str, Any]:
+    """FAF features for one account, derived from its transactions in the snapshot."""
+    import numpy as np
+
+    edges = snap.out_edges(index)
+    targets, stamps = snap.out_targets[edges], snap.out_timestamp[edges]
+    new_recipients = 0
+    if len(stamps):
+        recent = stamps >= stamps.max() - 86400
+        new_recipients = len(np.setdiff1d(targets[recent], targets[~recent]))
+    degree = (edges.stop - edges.start) + int(snap.in_offsets[index + 1] - snap.in_offsets[index])
+    return {
+        "account_id": snap.account_key(index),
+        "graph_centrality": degree / max_degree,
+        "num_new_recipients_24h": new_recipients,
+        # The generated graph has no login locations.
+        "impossible_travel_flag": False,
+    }
+
+
+def bench_faf(snap, repeat: int, sample: int) -> Dict[str, Any]:
+    import numpy as np
+
+    from backend.services.faf_engine import evaluate_account
+
+    accounts = [int(i) for i in np.flatnonzero(snap.account_fraud)[:sample]]
+    max_degree = max(1, int((snap.out_degree() + snap.in_degree()).max()))
+
+    def run():
+        for index in accounts:
+            features = snapshot_features(snap, index, max_degree)
+            evaluate_account(features["account_id"], features)
+        return accounts
+
+    return measure(run, repeat=repeat, items=len)
+
+
+def _load_transaction_logs(session, data_dir: Path, sample: int) -> list:
+    from backend.models.transaction import TransactionLog
+
+    path = next(p for p in (data_dir / "graph_transactions.csv", data_dir / "transactions.csv") if p.exists())
+    ids = []
+    with path.open(newline="") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            if i >= sample:
+                break
+            tx = TransactionLog(
+                tx_reference=row["tx_ref"],
+                sender_account_id=row["from_account_id"],
+                receiver_account_id=row["to_account_id"],
+                amount=float(row["amount"]),
+                currency="PHP",
+                tx_datetime=datetime.fromisoformat(row["timestamp"]),
+                channel="MOBILE_APP",
+                auth_method="OTP_SMS",
+                device_fingerprint=f"dev-{row['from_account_id']}",
+            )
+            session.add(tx)
+            ids.append(i + 1)
+    session.commit()
+    return ids
+
+
+def bench_afasa(data_dir: Path, repeat: int, sample: int, tx_rows: int) -> Dict[str, Any]:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from backend.afasa.rules import evaluate_afasa_risk
+    from backend.models.transaction import TransactionLog
+
+    engine = create_engine("sqlite://", future=True)
+    TransactionLog.__table__.create(engine)
+    session = sessionmaker(bind=engine, future=True)()
+    try:
+        ids = _load_transaction_logs(session, data_dir, tx_rows)
+        step = max(1, len(ids) // sample)
+        picked = ids[::step][:sample]
+
+        def run():
+            for tx_id in picked:
+                evaluate_afasa_risk(session, tx_id=tx_id)
+            session.expunge_all()
+            return picked
+
+        stats = measure(run, repeat=repeat, items=len)
+        stats["transaction_logs"] = len(ids)
+        return stats
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def bench_refresh_alerts() -> Dict[str, Any]:
+    from backend.services.neo4j_client import get_driver
+    from backend.services.rule_executor import refresh_alerts
+
+    generated = {}
+    with get_driver() as driver:
+
+        def run():
+            generated["alerts"] = refresh_alerts(neo4j_driver=driver)
+            return generated["alerts"]
+
+        stats = measure(run, repeat=1, warmup=0, items=lambda n: n)
+    stats["alerts_generated"] = generated["alerts"]
+    return stats
+
+
+def run_scale(scale: float, args) -> Dict[str, Any]:
+    from backend.benchmarks.snapshot_rules import SnapshotRules
+    from backend.services.graph_snapshot import GraphSnapshot, arrays_from_csv, write_snapshot
+
+    benchmarks: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        data_dir = Path(tmp) / "data"
+        print(f"Scale {scale}: generating data")
+        gen_seconds = generate(scale, args.seed, data_dir)
+
+        started = time.perf_counter()
+        arrays = arrays_from_csv(data_dir)
+        snap_path = write_snapshot(Path(tmp) / "snapshot", arrays, source=f"benchmark scale={scale}")
+        build_seconds = time.perf_counter() - started
+        del arrays
+
+        benchmarks["snapshot_open"] = measure(lambda: GraphSnapshot(snap_path), repeat=args.repeat)
+        snap = GraphSnapshot(snap_path)
+        dataset = dict(snap.meta, generate_seconds=round(gen_seconds, 2), snapshot_build_seconds=round(build_seconds, 2))
+        for key in ("created_at", "source", "version"):
+            dataset.pop(key, None)
+
+        rules = SnapshotRules(snap)
+        benchmarks.update(bench_rules(rules, args.repeat))
+        benchmarks["faf_evaluation"] = _guarded("faf", lambda: bench_faf(snap, args.repeat, args.faf_accounts))
+        print(f"  faf_evaluation: {benchmarks['faf_evaluation']}")
+        benchmarks["afasa_scoring"] = _guarded("afasa", lambda: bench_afasa(data_dir, args.repeat, args.afasa_samples, args.afasa_rows))
+        print(f"  afasa_scoring: {benchmarks['afasa_scoring']}")
+        del rules, snap
+
+    return {"dataset": dataset, "benchmarks": benchmarks}
+
+
+def run(args) -> Dict[str, Any]:
+    commit = git_commit()
+    results = {}
+    for scale in args.scales:
+        results[str(scale)] = run_scale(scale, args)
+
+    # These read the configured databases, not the generated graph, so they run once.
+    if args.neo4j:
+        try:
+            neo4j_benchmarks = bench_neo4j_rules(args.repeat)
+        except Exception as exc:  # e.g. NEO4J_* not set
+            print(f"  neo4j failed: {exc}")
+            neo4j_benchmarks = {"neo4j_rules": {"error": str(exc)}}
+        results["neo4j"] = {"dataset": {}, "benchmarks": neo4j_benchmarks}
+    if args.live:
+        results["live"] = {"dataset": {}, "benchmarks": {"refresh_alerts": _guarded("refresh_alerts", bench_refresh_alerts)}}
+    else:
+        results["live"] = {"dataset": {}, "benchmarks": {"refresh_alerts": {"skipped": "pass --live with DATABASE_URL and NEO4J_* configured"}}}
+
+    report = {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system(), "cpus": os.cpu_count()},
+        "params": {"seed": args.seed, "repeat": args.repeat, "rules": RULE_PARAMS},
+        "results": results,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {out}")
+    return report
+
+
+def run_compare(args) -> int:
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+    rows = compare(baseline, current, threshold=args.threshold)
+    regressed = [r for r in rows if r["status"] == "regressed"]
+    print(f"{baseline.get('commit')} -> {current.get('commit')}")
+    for r in rows:
+        if r["status"] in ("added", "removed"):
+            print(f"  [{r['scale']}] {r['benchmark']}: {r['status']}")
+        elif r["status"] != "unchanged" or args.verbose:
+            change = f"{r['change']:+.1%}" if r["change"] is not None else "new"
+            print(f"  [{r['scale']}] {r['benchmark']}.{r['metric']}: {r['before']} -> {r['after']} ({change}) {r['status']}")
+    print(f"{len(regressed)} regression(s) above {args.threshold:.0%}")
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+def parse_args(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] == "compare":
+        parser = argparse.ArgumentParser(description="Compare two benchmark results files")
+        parser.add_argument("baseline")
+        parser.add_argument("current")
+        parser.add_argument("--threshold", type=float, default=0.10, help="Relative growth counted as a regression")
+        parser.add_argument("--fail-on-regression", action="store_true")
+        parser.add_argument("--verbose", action="store_true")
+        args = parser.parse_args(argv[1:])
+        args.command = "compare"
+        return args
+
+    parser = argparse.ArgumentParser(description="Benchmark detection rules across dataset scales")
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.01, 0.1], help="Generator scales (1.0 = 100k accounts / 1M transactions)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--faf-accounts", type=int, default=500, help="Fraud accounts run through FAF per iteration")
+    parser.add_argument("--afasa-rows", type=int, default=20_000, help="Transactions loaded into the SQLite transaction_logs")
+    parser.add_argument("--afasa-samples", type=int, default=200, help="Transactions scored per iteration")
+    parser.add_argument("--neo4j", action="store_true", help="Also time RULE_QUERIES against NEO4J_* with read transactions")
+    parser.add_argument("--live", action="store_true", help="Also time refresh_alerts against DATABASE_URL/NEO4J_* (writes alerts)")
+    parser.add_argument("--out", help=f"Results file (default {RESULTS_DIR}/<commit>.json)")
+    args = parser.parse_args(argv)
+    args.command = "run"
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.command == "compare":
+        sys.exit(run_compare(args))
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
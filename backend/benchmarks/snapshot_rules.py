@@ -0,0 +1,152 @@
+"""
+In-process stand-ins for the Neo4j detection rules, evaluated over a GraphSnapshot.
+
+They follow the Cypher in backend/app.py on the graph_* model (Account, Device,
+Transaction) so rule cost can be measured at any scale without a database:
+
+  R1   fraud accounts ordered by account number
+  R2   devices shared by >= min_risky fraud accounts
+  R3   fraud accounts with >= min_risky distinct fraud counterparties (live R3)
+  R7   accounts receiving from >= min_risky distinct fraud senders
+  R8   chains whose consecutive hops are step-ordered within `duration` with decreasing amounts
+  R9   cycles back to the start where every hop exceeds min_amount
+  R10  step-ordered cycles where every hop exceeds min_amount
+
+Path rules (R8-R10) walk the CSR depth-first, like a variable-length match, and
+stop after `limit` results or `budget` edge expansions (reported as truncated).
+Hop counts are in edges.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.services.graph_snapshot import GraphSnapshot
+
+
+class SnapshotRules:
+    def __init__(self, snap: GraphSnapshot):
+        self.snap = snap
+        self.fraud = np.asarray(snap.account_fraud)
+        self.targets = np.asarray(snap.out_targets)
+        self.amount = np.asarray(snap.out_amount)
+        self.offsets = np.asarray(snap.out_offsets)
+        self.sources = snap.edge_sources()
+        step = np.asarray(snap.out_step).astype(np.int64)
+        self.steps = np.where(step >= 0, step, np.asarray(snap.out_timestamp) // 3600)
+
+    def _key(self, idx) -> str:
+        return self.snap.account_key(int(idx))
+
+    def r1(self, limit: int = 100) -> List[Dict[str, Any]]:
+        idx = np.flatnonzero(self.fraud)[:limit]
+        return [{"accountId": self._key(i), "riskScore": 1.0, "isFraud": True} for i in idx]
+
+    def r2(self, min_risky: int = 3, limit: int = 100) -> List[Dict[str, Any]]:
+        snap = self.snap
+        total = np.diff(snap.da_offsets)
+        device_of_link = np.repeat(np.arange(len(total)), total)
+        risky = np.bincount(device_of_link, weights=self.fraud[snap.da_targets], minlength=len(total)).astype(np.int64)
+        hit = np.flatnonzero(risky >= min_risky)
+        order = hit[np.lexsort((-total[hit], -risky[hit]))][:limit]
+        return [
+            {"deviceId": snap.device_id[d].decode("utf-8"), "riskyAccounts": int(risky[d]), "totalAccounts": int(total[d])}
+            for d in order
+        ]
+
+    def _distinct_pairs(self, a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        n = self.snap.n_accounts
+        keys = np.unique(a.astype(np.int64) * n + b)
+        return keys // n, keys % n
+
+    def r3(self, min_risky: int = 3, limit: int = 100) -> List[Dict[str, Any]]:
+        mask = self.fraud[self.sources] & self.fraud[self.targets] & (self.sources != self.targets)
+        src, dst = self.sources[mask], self.targets[mask]
+        # Undirected: a peer counts whichever way the money moved.
+        owner, _ = self._distinct_pairs(np.concatenate([src, dst]), np.concatenate([dst, src]))
+        ring = np.bincount(owner, minlength=self.snap.n_accounts)
+        hit = np.flatnonzero(ring >= min_risky)
+        order = hit[np.lexsort((hit, -ring[hit]))][:limit]
+        return [{"accountId": self._key(i), "ringSize": int(ring[i]), "isFraud": True} for i in order]
+
+    def r7(self, min_risky: int = 3, limit: int = 100) -> List[Dict[str, Any]]:
+        mask = self.fraud[self.sources]
+        dst = self.targets[mask]
+        tx_count = np.bincount(dst, minlength=self.snap.n_accounts)
+        receiver, _ = self._distinct_pairs(dst, self.sources[mask])
+        senders = np.bincount(receiver, minlength=self.snap.n_accounts)
+        hit = np.flatnonzero(senders >= min_risky)
+        order = hit[np.lexsort((-tx_count[hit], -senders[hit]))][:limit]
+        return [
+            {"accountId": self._key(i), "riskySenders": int(senders[i]), "txCount": int(tx_count[i]), "isFraud": bool(self.fraud[i])}
+            for i in order
+        ]
+
+    def _walk(self, edge_ok: np.ndarray, pair_ok, min_hops: int, max_hops: int, limit: int, cycle: bool, budget: int, starts: Optional[np.ndarray] = None):
+        results: List[Tuple[int, ...]] = []
+        expansions = 0
+        if starts is None:
+            starts = np.flatnonzero(np.diff(self.offsets) > 0)
+        for start in starts:
+            first = np.arange(self.offsets[start], self.offsets[start + 1])
+            stack = [(int(e),) for e in first[edge_ok[first]]]
+            while stack:
+                path = stack.pop()
+                node = int(self.targets[path[-1]])
+                hops = len(path)
+                if hops >= min_hops and (not cycle or node == start):
+                    results.append(path)
+                    if len(results) >= limit:
+                        return results, False
+                    if cycle:
+                        continue
+                if hops >= max_hops:
+                    continue
+                cand = np.arange(self.offsets[node], self.offsets[node + 1])
+                expansions += len(cand)
+                if expansions > budget:
+                    return results, True
+                cand = cand[edge_ok[cand] & pair_ok(path[-1], cand)]
+                for e in cand:
+                    if int(e) not in path:
+                        stack.append(path + (int(e),))
+        return results, False
+
+    def _path_rows(self, paths) -> List[Dict[str, Any]]:
+        rows = []
+        for path in paths:
+            edges = np.array(path)
+            rows.append(
+                {
+                    "accountId": self._key(self.sources[edges[0]]),
+                    "pathLength": len(path),
+                    "maxAmount": float(self.amount[edges].max()),
+                    "timeSpan": int(self.steps[edges].max() - self.steps[edges].min()),
+                }
+            )
+        return rows
+
+    def r8(self, duration: int = 4, amount: float = 20000, min_hops: int = 2, max_hops: int = 6, limit: int = 5, budget: int = 2_000_000):
+        steps, amounts = self.steps, self.amount
+
+        def pair_ok(prev, cand):
+            return (steps[cand] > steps[prev]) & (steps[cand] < steps[prev] + duration) & (amounts[cand] < amounts[prev])
+
+        paths, truncated = self._walk(amounts > amount, pair_ok, min_hops, max_hops, limit, cycle=False, budget=budget)
+        return {"alerts": self._path_rows(paths), "truncated": truncated}
+
+    def r9(self, min_amount: float = 2000, min_hops: int = 3, max_hops: int = 12, limit: int = 5, budget: int = 2_000_000):
+        def pair_ok(prev, cand):
+            return np.ones(len(cand), dtype=bool)
+
+        paths, truncated = self._walk(self.amount > min_amount, pair_ok, min_hops, max_hops, limit, cycle=True, budget=budget)
+        return {"alerts": self._path_rows(paths), "truncated": truncated}
+
+    def r10(self, min_amount: float = 2000, min_hops: int = 3, max_hops: int = 12, limit: int = 5, budget: int = 2_000_000):
+        steps = self.steps
+
+        def pair_ok(prev, cand):
+            return steps[cand] > steps[prev]
+
+        paths, truncated = self._walk(self.amount > min_amount, pair_ok, min_hops, max_hops, limit, cycle=True, budget=budget)
+        return {"alerts": self._path_rows(paths), "truncated": truncated}
@@ -1,15 +1,24 @@
 """
 Export graph_* tables from Postgres to CSV files for Neo4j Data Importer.
 
-Outputs (relative to backend/):
+Outputs (relative to backend/; .csv.gz with --gzip):
   data/accounts.csv
   data/devices.csv
   data/transactions.csv
   data/account_device.csv
+
+Tables are streamed with server-side cursors and written in chunks, each table on
+its own connection and thread, so memory stays flat for any table size.
+
+Usage:
+  python backend/export_graph_to_csv.py [--gzip] [--chunk-size 10000] [--workers 4]
 """
 
+import argparse
 import csv
+import gzip
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -19,6 +28,8 @@ from sqlalchemy import create_engine, text
 
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
+CHUNK_SIZE = 10_000
+COMPRESS_LEVEL = 6
 
 
 def ensure_data_dir_exists():
@@ -36,7 +47,30 @@ def _row_to_list(row, columns):
     return processed
 
 
-def export_accounts(conn):
+def _open_output(path: Path, compress: bool):
+    if compress:
+        return gzip.open(path.with_name(path.name + ".gz"), "wt", newline="", compresslevel=COMPRESS_LEVEL)
+    return path.open("w", newline="")
+
+
+def _export(conn, query, headers, path: Path, chunk_size: int = CHUNK_SIZE, compress: bool = False):
+    """
+    Stream `query` through a server-side cursor and write it chunk by chunk, so
+    memory stays at one chunk however large the table is.
+    """
+    result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query).mappings()
+    count = 0
+    with _open_output(path, compress) as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for chunk in result.partitions():
+            writer.writerows(_row_to_list(row, headers) for row in chunk)
+            count += len(chunk)
+    print(f"Wrote {count} rows to {path}{'.gz' if compress else ''}")
+    return count
+
+
+def export_accounts(conn, **opts):
     query = text(
         """
         SELECT
@@ -49,18 +83,10 @@ def export_accounts(conn):
         """
     )
     headers = ["id", "account_number", "customer_name", "risk_score", "is_fraud"]
-    path = DATA_DIR / "accounts.csv"
-    result = conn.execute(query).mappings()
-    rows = list(result)
-    with path.open("w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        for row in rows:
-            writer.writerow(_row_to_list(row, headers))
-    print(f"Wrote {len(rows)} rows to {path}")
+    return _export(conn, query, headers, DATA_DIR / "accounts.csv", **opts)
 
 
-def export_devices(conn):
+def export_devices(conn, **opts):
     query = text(
         """
         SELECT
@@ -71,18 +97,10 @@ def export_devices(conn):
         """
     )
     headers = ["id", "device_id", "device_type"]
-    path = DATA_DIR / "devices.csv"
-    result = conn.execute(query).mappings()
-    rows = list(result)
-    with path.open("w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        for row in rows:
-            writer.writerow(_row_to_list(row, headers))
-    print(f"Wrote {len(rows)} rows to {path}")
+    return _export(conn, query, headers, DATA_DIR / "devices.csv", **opts)
 
 
-def export_transactions(conn):
+def export_transactions(conn, **opts):
     query = text(
         """
         SELECT
@@ -99,18 +117,10 @@ def export_transactions(conn):
         """
     )
     headers = ["id", "tx_ref", "from_account_id", "to_account_id", "amount", "channel", "timestamp", "is_flagged", "tags"]
-    path = DATA_DIR / "transactions.csv"
-    result = conn.execute(query).mappings()
-    rows = list(result)
-    with path.open("w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        for row in rows:
-            writer.writerow(_row_to_list(row, headers))
-    print(f"Wrote {len(rows)} rows to {path}")
+    return _export(conn, query, headers, DATA_DIR / "transactions.csv", **opts)
 
 
-def export_account_device(conn):
+def export_account_device(conn, **opts):
     query = text(
         """
         SELECT
@@ -120,31 +130,45 @@ def export_account_device(conn):
         """
     )
     headers = ["account_id", "device_id"]
-    path = DATA_DIR / "account_device.csv"
-    result = conn.execute(query).mappings()
-    rows = list(result)
-    with path.open("w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        for row in rows:
-            writer.writerow(_row_to_list(row, headers))
-    print(f"Wrote {len(rows)} rows to {path}")
+    return _export(conn, query, headers, DATA_DIR / "account_device.csv", **opts)
+
+
+EXPORTS = [export_accounts, export_devices, export_transactions, export_account_device]
+
+
+def _export_on_own_connection(engine, export_fn, **opts):
+    with engine.connect() as conn:
+        return export_fn(conn, **opts)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export graph_* tables to CSV")
+    parser.add_argument("--gzip", action="store_true", help="Write .csv.gz files")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows fetched and written per chunk")
+    parser.add_argument("--workers", type=int, default=len(EXPORTS), help="Tables exported concurrently (1 = one at a time)")
+    return parser.parse_args(argv)
 
 
 def main():
+    args = parse_args()
     load_dotenv()
     db_url = os.getenv("DATABASE_URL")
     if not db_url:
         raise SystemExit("DATABASE_URL is required in .env")
 
-    engine = create_engine(db_url)
+    workers = max(1, min(args.workers, len(EXPORTS)))
+    engine = create_engine(db_url, pool_size=workers)
     ensure_data_dir_exists()
-
-    with engine.connect() as conn:
-        export_accounts(conn)
-        export_devices(conn)
-        export_transactions(conn)
-        export_account_device(conn)
+    opts = {"chunk_size": args.chunk_size, "compress": args.gzip}
+
+    try:
+        # Each table streams on its own connection (server-side cursors cannot share one).
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="csv-export") as pool:
+            futures = [pool.submit(_export_on_own_connection, engine, fn, **opts) for fn in EXPORTS]
+            for fut in futures:
+                fut.result()
+    finally:
+        engine.dispose()
 
 
 if __name__ == "__main__":
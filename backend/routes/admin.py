@@ -0,0 +1,65 @@
+from flask import Blueprint, abort, jsonify, request
+
+from backend.services.neo4j_client import get_driver
+from backend.services.query_profiler import DB_HITS_THRESHOLD, ProfileStore, run_profile
+from backend.services.rule_queries import RULE_QUERIES
+from backend.services.slow_queries import slow_query_log
+
+admin_bp = Blueprint("admin", __name__)
+
+
+@admin_bp.route("/admin/query-profiles", methods=["GET"])
+def list_query_profiles():
+    store = ProfileStore()
+    return jsonify({"queries": sorted(RULE_QUERIES), "runs": store.runs(request.args.get("dataset"))})
+
+
+@admin_bp.route("/admin/query-profiles/<dataset>/<commit>", methods=["GET"])
+def get_query_profile(dataset: str, commit: str):
+    report = ProfileStore().load(dataset, commit)
+    if report is None:
+        abort(404, description="Profile run not found")
+    return jsonify(report)
+
+
+@admin_bp.route("/admin/query-profiles", methods=["POST"])
+def run_query_profiles():
+    payload = request.get_json(silent=True) or {}
+    names = payload.get("queries")
+    unknown = [n for n in names or [] if n not in RULE_QUERIES]
+    if unknown:
+        return jsonify({"status": "error", "message": f"unknown queries: {', '.join(unknown)}"}), 400
+    try:
+        threshold = float(payload.get("threshold", DB_HITS_THRESHOLD))
+    except (TypeError, ValueError):
+        threshold = DB_HITS_THRESHOLD
+    try:
+        with get_driver() as driver:
+            report = run_profile(
+                driver,
+                payload.get("dataset") or "default",
+                ProfileStore(),
+                names,
+                payload.get("commit"),
+                payload.get("baseline"),
+                threshold,
+            )
+    except Exception as exc:
+        return jsonify({"status": "error", "message": str(exc)}), 500
+    return jsonify(report)
+
+
+@admin_bp.route("/admin/slow-queries", methods=["GET"])
+def list_slow_queries():
+    try:
+        limit = int(request.args.get("limit", 50))
+    except ValueError:
+        limit = 50
+    kind = request.args.get("kind")  # sql | neo4j | neo4j_tx
+    return jsonify({"stats": slow_query_log.stats(), "entries": slow_query_log.entries(limit=limit, kind=kind)})
+
+
+@admin_bp.route("/admin/slow-queries", methods=["DELETE"])
+def clear_slow_queries():
+    slow_query_log.clear()
+    return jsonify({"status": "ok"})
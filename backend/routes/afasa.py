@@ -1,8 +1,10 @@
 from flask import Blueprint, jsonify, request, abort
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 
 from backend.db.session import get_session
 from backend.afasa.models import AfasaDisputedTransaction
+from backend.afasa.rollups import dispute_summary, dispute_trends, rebuild_dispute_rollups
 from backend.afasa.schemas import disputed_transaction_to_dict, verification_event_to_dict
 from backend.afasa.services import (
     initiate_disputed_transaction,
@@ -15,6 +17,9 @@ from backend.models.alert import Alert
 
 afasa_bp = Blueprint("afasa", __name__)
 
+DISPUTE_PAGE_SIZE = 50
+DISPUTE_PAGE_MAX = 500
+
 
 @afasa_bp.route("/afasa/disputes", methods=["POST"])
 def create_dispute():
@@ -42,19 +47,42 @@ def create_dispute():
         session.close()
 
 
+def _int_arg(name: str, default):
+    try:
+        return int(request.args[name])
+    except (KeyError, ValueError):
+        return default
+
+
 @afasa_bp.route("/afasa/disputes", methods=["GET"])
 def list_disputes():
+    """
+    Disputes in id order, a page at a time: ?limit= (default 50, max 500) and
+    ?after_id= the X-Next-After-Id header of the previous page (absent on the
+    last page). ?include_events=false leaves out verification_events.
+    """
     status_filter = request.args.get("status")
     suspicion_filter = request.args.get("suspicion_type")
+    limit = min(max(_int_arg("limit", DISPUTE_PAGE_SIZE), 1), DISPUTE_PAGE_MAX)
+    after_id = _int_arg("after_id", None)
+    include_events = request.args.get("include_events", "true").lower() not in {"0", "false", "no"}
     session = get_session()
     try:
-        query = select(AfasaDisputedTransaction)
+        query = select(AfasaDisputedTransaction).order_by(AfasaDisputedTransaction.id).limit(limit + 1)
         if status_filter:
             query = query.where(AfasaDisputedTransaction.status == status_filter)
         if suspicion_filter:
             query = query.where(AfasaDisputedTransaction.suspicion_type == suspicion_filter)
+        if after_id is not None:
+            query = query.where(AfasaDisputedTransaction.id > after_id)
+        if include_events:
+            # One IN query for the whole page instead of a lazy load per dispute.
+            query = query.options(selectinload(AfasaDisputedTransaction.verification_events))
         rows = session.execute(query).scalars().all()
-        return jsonify([disputed_transaction_to_dict(row) for row in rows])
+        response = jsonify([disputed_transaction_to_dict(row, include_events) for row in rows[:limit]])
+        if len(rows) > limit:
+            response.headers["X-Next-After-Id"] = str(rows[limit - 1].id)
+        return response
     finally:
         session.close()
 
@@ -123,16 +151,32 @@ def add_event(dispute_id: int):
 def report_summary():
     session = get_session()
     try:
-        total = session.execute(select(AfasaDisputedTransaction)).scalars().all()
-        summary = {
-            "total_disputes": len(total),
-            "by_status": {},
-            "by_suspicion": {},
-        }
-        for d in total:
-            summary["by_status"][d.status] = summary["by_status"].get(d.status, 0) + 1
-            summary["by_suspicion"][d.suspicion_type] = summary["by_suspicion"].get(d.suspicion_type, 0) + 1
-        return jsonify(summary)
+        return jsonify(dispute_summary(session))
+    finally:
+        session.close()
+
+
+@afasa_bp.route("/afasa/reports/trends", methods=["GET"])
+def report_trends():
+    bucket = request.args.get("bucket", "day")
+    try:
+        days = int(request.args.get("days", 90))
+    except ValueError:
+        days = 90
+    session = get_session()
+    try:
+        return jsonify({"bucket": bucket, "days": days, "series": dispute_trends(session, bucket, days)})
+    except ValueError as exc:
+        abort(400, description=str(exc))
+    finally:
+        session.close()
+
+
+@afasa_bp.route("/afasa/reports/rebuild", methods=["POST"])
+def report_rebuild():
+    session = get_session()
+    try:
+        return jsonify({"status": "ok", "rows": rebuild_dispute_rollups(session)})
     finally:
         session.close()
 
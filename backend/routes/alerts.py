@@ -1,8 +1,9 @@
 from flask import Blueprint, jsonify, request, abort
-from sqlalchemy import select, case, desc
+from sqlalchemy import select, case, desc, func
 
 from backend.db.session import get_session
 from backend.models import Alert, RuleDefinition, Case, Account
+from backend.services.http_cache import conditional, make_etag
 from backend.services.rule_executor import refresh_alerts
 
 alerts_bp = Blueprint("alerts", __name__)
@@ -29,48 +30,55 @@ def list_alerts():
     family_filter = request.args.get("family")
     session = get_session()
     try:
-        severity_order = case(
-            (Alert.severity == "CRITICAL", 4),
-            (Alert.severity == "HIGH", 3),
-            (Alert.severity == "MEDIUM", 2),
-            else_=1,
-        )
-        query = (
-            select(Alert, RuleDefinition.name, Account.account_number)
-            .join(RuleDefinition, Alert.rule_id == RuleDefinition.id)
-            .join(Account, Alert.subject_account_id == Account.id, isouter=True)
-            .order_by(desc(severity_order), Alert.created_at.desc())
-        )
-        if status_filter:
-            query = query.where(Alert.status == status_filter)
-        if family_filter and family_filter.upper() == "FAF":
-            query = query.where(RuleDefinition.name.like("FAF-%"))
-        # Always hide legacy GCASH-seeded alerts; UI should reflect Neo4j-driven anchors only
-        query = query.where((Account.account_number.is_(None)) | (~Account.account_number.like("GCASH-%")))
-
-        results = session.execute(query).all()
-        alerts = []
-        for alert, rule_name, account_number in results:
-            alerts.append(
-                {
-                    "id": alert.id,
-                    "rule_name": rule_name,
-                    "ruleKey": rule_name,
-                    "accountId": account_number,
-                    "severity": alert.severity,
-                    "status": alert.status,
-                    "summary": alert.summary,
-                    "is_afasa": alert.is_afasa,
-                    "afasa_suspicion_type": alert.afasa_suspicion_type,
-                    "afasa_risk_score": alert.afasa_risk_score,
-                    "created_at": alert.created_at.isoformat() if alert.created_at else None,
-                }
-            )
-        return jsonify(alerts)
+        # Alert rows change only by insert/delete (count, max id) or update (updated_at).
+        count, max_id, last_update = session.execute(select(func.count(Alert.id), func.max(Alert.id), func.max(Alert.updated_at))).one()
+        etag = make_etag(request.full_path, count, max_id, last_update)
+        return conditional(etag, lambda: _list_alerts(session, status_filter, family_filter))
     finally:
         session.close()
 
 
+def _list_alerts(session, status_filter, family_filter):
+    severity_order = case(
+        (Alert.severity == "CRITICAL", 4),
+        (Alert.severity == "HIGH", 3),
+        (Alert.severity == "MEDIUM", 2),
+        else_=1,
+    )
+    query = (
+        select(Alert, RuleDefinition.name, Account.account_number)
+        .join(RuleDefinition, Alert.rule_id == RuleDefinition.id)
+        .join(Account, Alert.subject_account_id == Account.id, isouter=True)
+        .order_by(desc(severity_order), Alert.created_at.desc())
+    )
+    if status_filter:
+        query = query.where(Alert.status == status_filter)
+    if family_filter and family_filter.upper() == "FAF":
+        query = query.where(RuleDefinition.name.like("FAF-%"))
+    # Always hide legacy GCASH-seeded alerts; UI should reflect Neo4j-driven anchors only
+    query = query.where((Account.account_number.is_(None)) | (~Account.account_number.like("GCASH-%")))
+
+    results = session.execute(query).all()
+    alerts = []
+    for alert, rule_name, account_number in results:
+        alerts.append(
+            {
+                "id": alert.id,
+                "rule_name": rule_name,
+                "ruleKey": rule_name,
+                "accountId": account_number,
+                "severity": alert.severity,
+                "status": alert.status,
+                "summary": alert.summary,
+                "is_afasa": alert.is_afasa,
+                "afasa_suspicion_type": alert.afasa_suspicion_type,
+                "afasa_risk_score": alert.afasa_risk_score,
+                "created_at": alert.created_at.isoformat() if alert.created_at else None,
+            }
+        )
+    return jsonify(alerts)
+
+
 @alerts_bp.route("/alerts/<int:alert_id>", methods=["GET"])
 def get_alert(alert_id: int):
     session = get_session()
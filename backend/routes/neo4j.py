@@ -1,6 +1,8 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 
-from backend.services.neo4j_client import check_connectivity, get_driver
+from backend.services.http_cache import conditional, graph_version, make_etag
+from backend.services.neo4j_client import check_connectivity, fetch_single, get_driver
+from backend.services.neighborhood import account_graph, flag_version, identifier_graph, limits_from_args, overlay_flags
 from backend.db.session import get_session
 from backend.models.investigator_action import InvestigatorAction
 
@@ -31,37 +33,18 @@ def _record_flag(anchor_id: str, anchor_type: str):
         session.close()
 
 
-def _flagged_map(anchor_ids, anchor_type: str):
-    if not anchor_ids:
-        return set()
-    session = get_session()
-    try:
-        rows = (
-            session.query(InvestigatorAction.anchor_id)
-            .filter(
-                InvestigatorAction.anchor_id.in_(list(anchor_ids)),
-                InvestigatorAction.anchor_type == anchor_type,
-                InvestigatorAction.action == "FLAG",
-            )
-            .all()
-        )
-        return {r.anchor_id for r in rows}
-    finally:
-        session.close()
+def _graph_view(build):
+    """Serve build(session) with an ETag from the graph version and the flag version."""
+    with get_driver() as driver:
+        with driver.session() as session:
+            etag = make_etag(request.full_path, graph_version(session), flag_version())
+            return conditional(etag, lambda: build(session))
 
 
-def _is_flagged(node: dict, labels=None):
-    labels = labels or []
-    if "Mule" in labels:
-        return True
-    if node.get("fraud_group") is not None:
-        return True
-    if node.get("flagged") is True:
-        return True
-    val = node.get("is_fraud")
-    if isinstance(val, str):
-        val = val.lower() in {"true", "1", "yes"}
-    return bool(val)
+def _graph_response(graph, not_found: str):
+    if graph is None:
+        return jsonify({"status": "error", "message": not_found}), 404
+    return jsonify({"status": "ok", **overlay_flags(graph)})
 
 
 @neo4j_bp.route("/neo4j/flag/account/<account_id>", methods=["POST"])
@@ -81,7 +64,7 @@ def neo4j_flag_account(account_id: str):
     try:
         with get_driver() as driver:
             with driver.session() as session:
-                session.run(cypher, accountId=account_id).consume()
+                session.execute_write(fetch_single, cypher, {"accountId": account_id})
     except Exception:
         pass
     return jsonify({"status": "ok", "accountId": account_id})
@@ -108,7 +91,7 @@ def neo4j_flag_device(device_id: str):
     try:
         with get_driver() as driver:
             with driver.session() as session:
-                session.run(cypher, deviceId=device_id).consume()
+                session.execute_write(fetch_single, cypher, {"deviceId": device_id})
     except Exception:
         pass
     return jsonify({"status": "ok", "deviceId": device_id})
@@ -116,316 +99,23 @@ def neo4j_flag_device(device_id: str):
 
 @neo4j_bp.route("/neo4j/graph/account/<account_id>", methods=["GET"])
 def neo4j_graph_account(account_id: str):
-    cypher = """
-    MATCH (a)
-    WHERE (a:Account AND a.account_number = $accountId)
-       OR (a:Mule AND a.id = $accountId)
-       OR (a:Client AND a.id = $accountId)
-    WITH a, labels(a) AS a_labels
-    OPTIONAL MATCH (a)-[r:HAS_EMAIL|HAS_PHONE|HAS_SSN]->(id)<-[r2:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(peer)
-    WITH a, a_labels,
-         collect(DISTINCT id) AS identifiers,
-         collect(DISTINCT {idNode: id, peer: peer, peerLabels: labels(peer)}) AS idPeers
-    OPTIONAL MATCH (a)-[:PERFORMED]->(txOut:Transaction)-[:TO]->(dst)
-    WITH a, a_labels, identifiers, idPeers,
-         collect({tx: txOut, other: dst, otherLabels: labels(dst), direction: 'OUT'}) AS outTx
-    OPTIONAL MATCH (src)-[:PERFORMED]->(txIn:Transaction)-[:TO]->(a)
-    RETURN a,
-           a_labels,
-           identifiers,
-           idPeers,
-           outTx AS outbound,
-           collect({tx: txIn, other: src, otherLabels: labels(src), direction: 'IN'}) AS inbound
-    """
-    with get_driver() as driver:
-        with driver.session() as session:
-            record = session.run(cypher, accountId=account_id).single()
-            if not record:
-                return jsonify({"status": "error", "message": "Account not found"}), 404
-
-            nodes = {}
-            edges = []
-
-            def add_node(key, label, ntype, extra=None):
-                if key in nodes:
-                    return
-                node = {"id": key, "label": label, "type": ntype}
-                if extra:
-                    node.update(extra)
-                nodes[key] = node
-
-            a = record["a"]
-            anchor_id = a.get("account_number") or a.get("accountId") or a.get("id")
-            anchor_label = a.get("customer_name") or a.get("name") or anchor_id
-            anchor_labels = record.get("a_labels") or []
-            flagged_anchor = _is_flagged(a, anchor_labels)
-            add_node(anchor_id, anchor_label, "Account", {"customerName": anchor_label, "isSubject": True, "isFlagged": flagged_anchor})
-
-            identifiers = record.get("identifiers") or []
-            for id_node in identifiers:
-                device_id = id_node.get("device_id") or id_node.get("email") or id_node.get("phoneNumber") or id_node.get("ssn")
-                if not device_id:
-                    continue
-                dev_type = "Device"
-                if "email" in id_node:
-                    dev_type = "Email"
-                elif "phoneNumber" in id_node:
-                    dev_type = "Phone"
-                elif "ssn" in id_node:
-                    dev_type = "SSN"
-                flagged_id = _is_flagged(id_node)
-                add_node(device_id, device_id, "Device", {"deviceType": dev_type, "isFlagged": flagged_id})
-                edges.append({"source": anchor_id, "target": device_id, "type": "HAS_IDENTIFIER"})
-
-            id_peers = record.get("idPeers") or []
-            for entry in id_peers:
-                id_node = entry.get("idNode") or {}
-                peer = entry.get("peer") or {}
-                peer_labels = entry.get("peerLabels") or []
-                device_id = id_node.get("device_id") or id_node.get("email") or id_node.get("phoneNumber") or id_node.get("ssn")
-                peer_id = peer.get("account_number") or peer.get("id")
-                if not device_id or not peer_id:
-                    continue
-                peer_label = peer.get("customer_name") or peer.get("name") or peer_id
-                flagged_peer = _is_flagged(peer, peer_labels)
-                add_node(peer_id, peer_label, "Account", {"customerName": peer_label, "isFlagged": flagged_peer})
-                flagged_id = _is_flagged(id_node)
-                add_node(device_id, device_id, "Device", {"deviceType": "Identifier", "isFlagged": flagged_id})
-                edges.append({"source": peer_id, "target": device_id, "type": "HAS_IDENTIFIER"})
-
-    def handle_tx(items, direction_label):
-        cap = 7
-        count = 0
-        for item in items or []:
-            if count >= cap:
-                break
-            tx = item.get("tx")
-            other = item.get("other")
-            other_labels = item.get("otherLabels") or []
-            direction = item.get("direction") or direction_label
-            if not tx or not other:
-                continue
-            tx_ref = tx.get("tx_ref") or tx.get("id")
-            add_node(tx_ref, tx_ref, "Transaction", {"amount": tx.get("amount"), "tags": tx.get("tags")})
-            other_id = other.get("account_number") or other.get("id")
-            other_label = other.get("customer_name") or other.get("name") or other_id
-            flagged_other = _is_flagged(other, other_labels)
-            add_node(other_id, other_label, "Account", {"customerName": other_label, "isFlagged": flagged_other})
-            if direction == "OUT":
-                edges.append({"source": anchor_id, "target": tx_ref, "type": "PERFORMS", "label": _edge_label(tx)})
-                edges.append({"source": tx_ref, "target": other_id, "type": "TO"})
-            else:
-                edges.append({"source": other_id, "target": tx_ref, "type": "PERFORMS", "label": _edge_label(tx)})
-                edges.append({"source": tx_ref, "target": anchor_id, "type": "TO"})
-            count += 1
-
-    handle_tx(record.get("outbound"), "OUT")
-    handle_tx(record.get("inbound"), "IN")
-
-    # Overlay flags from Postgres
-    account_ids = [n["id"] for n in nodes.values() if n["type"] == "Account"]
-    device_ids = [n["id"] for n in nodes.values() if n["type"] == "Device"]
-    flagged_accounts = _flagged_map(account_ids, "ACCOUNT")
-    flagged_devices = _flagged_map(device_ids, "DEVICE")
-    for n in nodes.values():
-        if n["id"] in flagged_accounts or n["id"] in flagged_devices:
-            n["isFlagged"] = True
-
-    return jsonify({"status": "ok", "nodes": list(nodes.values()), "edges": edges})
+    def build(session):
+        return _graph_response(account_graph(session, account_id, **limits_from_args(request.args, tx=7)), "Account not found")
 
-
-def _edge_label(tx):
-    parts = []
-    amount = tx.get("amount")
-    tags = tx.get("tags")
-    if amount is not None:
-        parts.append(f"{amount}")
-    if tags:
-        parts.append(str(tags))
-    return " / ".join(parts)
+    return _graph_view(build)
 
 
 @neo4j_bp.route("/neo4j/graph/device/<device_id>", methods=["GET"])
 def neo4j_graph_device(device_id: str):
-    cypher = """
-    MATCH (id)
-    WHERE (id:Device AND id.device_id = $deviceId)
-       OR (id:Email AND id.email = $deviceId)
-       OR (id:Phone AND id.phoneNumber = $deviceId)
-       OR (id:SSN AND id.ssn = $deviceId)
-    OPTIONAL MATCH (id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(a)
-    OPTIONAL MATCH (a)-[:PERFORMED]->(txOut:Transaction)-[:TO]->(dst)
-    OPTIONAL MATCH (src)-[:PERFORMED]->(txIn:Transaction)-[:TO]->(a)
-    RETURN id,
-           collect(DISTINCT {acc: a, accLabels: labels(a)}) AS accounts,
-           collect(DISTINCT {tx: txOut, other: dst, otherLabels: labels(dst), direction: 'OUT', acc: a, accLabels: labels(a)}) AS outbound,
-           collect(DISTINCT {tx: txIn, other: src, otherLabels: labels(src), direction: 'IN', acc: a, accLabels: labels(a)}) AS inbound
-    """
-    with get_driver() as driver:
-        with driver.session() as session:
-            record = session.run(cypher, deviceId=device_id).single()
-            if not record:
-                return jsonify({"status": "error", "message": "Device not found"}), 404
-
-            nodes = {}
-            edges = []
-
-            def add_node(key, label, ntype, extra=None):
-                if key in nodes:
-                    return
-                node = {"id": key, "label": label, "type": ntype}
-                if extra:
-                    node.update(extra)
-                nodes[key] = node
-
-            d = record["id"]
-            device_id_val = d.get("device_id") or d.get("email") or d.get("phoneNumber") or d.get("ssn")
-            device_type = "Device"
-            if "email" in d:
-                device_type = "Email"
-            elif "phoneNumber" in d:
-                device_type = "Phone"
-            elif "ssn" in d:
-                device_type = "SSN"
-            flagged_id = _is_flagged(d)
-            add_node(device_id_val, device_id_val, "Device", {"deviceType": device_type, "isSubject": True, "isFlagged": flagged_id})
-
-            for acc_entry in record["accounts"] or []:
-                acc = acc_entry.get("acc") or {}
-                acc_labels = acc_entry.get("accLabels") or []
-                acc_id = acc.get("account_number") or acc.get("id")
-                acc_label = acc.get("customer_name") or acc.get("name") or acc_id
-                flagged_acc = _is_flagged(acc, acc_labels)
-                add_node(acc_id, acc_label, "Account", {"customerName": acc_label, "isFlagged": flagged_acc})
-                edges.append({"source": acc_id, "target": device_id_val, "type": "HAS_IDENTIFIER"})
-
-            def handle_tx(items):
-                for item in items or []:
-                    tx = item.get("tx")
-                    other = item.get("other")
-                    acc = item.get("acc")
-                    acc_labels = item.get("accLabels") or []
-                    direction = item.get("direction")
-                    if not tx or not other or not acc:
-                        continue
-                    tx_ref = tx.get("tx_ref") or tx.get("id")
-                    add_node(tx_ref, tx_ref, "Transaction", {"amount": tx.get("amount"), "tags": tx.get("tags")})
-                    other_id = other.get("account_number") or other.get("id")
-                    other_label = other.get("customer_name") or other.get("name") or other_id
-                    acc_id = acc.get("account_number") or acc.get("id")
-                    acc_label = acc.get("customer_name") or acc.get("name") or acc_id
-                    flagged_acc = _is_flagged(acc, acc_labels)
-                    add_node(other_id, other_label, "Account", {"customerName": other_label})
-                    add_node(acc_id, acc_label, "Account", {"customerName": acc_label, "isFlagged": flagged_acc})
-                    if direction == "OUT":
-                        edges.append({"source": acc_id, "target": tx_ref, "type": "PERFORMS", "label": _edge_label(tx)})
-                        edges.append({"source": tx_ref, "target": other_id, "type": "TO"})
-                    else:
-                        edges.append({"source": other_id, "target": tx_ref, "type": "PERFORMS", "label": _edge_label(tx)})
-                        edges.append({"source": tx_ref, "target": acc_id, "type": "TO"})
-
-            handle_tx(record.get("outbound"))
-            handle_tx(record.get("inbound"))
-
-    # Overlay flags from Postgres
-    account_ids = [n["id"] for n in nodes.values() if n["type"] == "Account"]
-    device_ids = [n["id"] for n in nodes.values() if n["type"] == "Device"]
-    flagged_accounts = _flagged_map(account_ids, "ACCOUNT")
-    flagged_devices = _flagged_map(device_ids, "DEVICE")
-    for n in nodes.values():
-        if n["id"] in flagged_accounts or n["id"] in flagged_devices:
-            n["isFlagged"] = True
+    def build(session):
+        return _graph_response(identifier_graph(session, device_id, devices=True, **limits_from_args(request.args)), "Device not found")
 
-    return jsonify({"status": "ok", "nodes": list(nodes.values()), "edges": edges})
+    return _graph_view(build)
 
 
 @neo4j_bp.route("/neo4j/graph/identifier/<identifier>", methods=["GET"])
 def neo4j_graph_identifier(identifier: str):
-    cypher = """
-    MATCH (id)
-    WHERE (id:Email AND id.email = $identifier)
-       OR (id:Phone AND id.phoneNumber = $identifier)
-       OR (id:SSN AND id.ssn = $identifier)
-    OPTIONAL MATCH (id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(acc)
-    OPTIONAL MATCH (acc)-[:PERFORMED]->(txOut:Transaction)-[:TO]->(dst)
-    OPTIONAL MATCH (src)-[:PERFORMED]->(txIn:Transaction)-[:TO]->(acc)
-    RETURN id,
-           collect(DISTINCT {acc: acc, accLabels: labels(acc)}) AS accounts,
-           collect(DISTINCT {tx: txOut, other: dst, otherLabels: labels(dst), direction: 'OUT', acc: acc, accLabels: labels(acc)}) AS outbound,
-           collect(DISTINCT {tx: txIn, other: src, otherLabels: labels(src), direction: 'IN', acc: acc, accLabels: labels(acc)}) AS inbound
-    """
-    with get_driver() as driver:
-        with driver.session() as session:
-            record = session.run(cypher, identifier=identifier).single()
-            if not record:
-                return jsonify({"status": "error", "message": "Identifier not found"}), 404
-
-            nodes = {}
-            edges = []
-
-            def add_node(key, label, ntype, extra=None):
-                if key in nodes:
-                    return
-                node = {"id": key, "label": label, "type": ntype}
-                if extra:
-                    node.update(extra)
-                nodes[key] = node
-
-            id_node = record["id"]
-            device_id_val = id_node.get("device_id") or id_node.get("email") or id_node.get("phoneNumber") or id_node.get("ssn")
-            device_type = "Device"
-            if "email" in id_node:
-                device_type = "Email"
-            elif "phoneNumber" in id_node:
-                device_type = "Phone"
-            elif "ssn" in id_node:
-                device_type = "SSN"
-            add_node(device_id_val, device_id_val, "Device", {"deviceType": device_type, "isSubject": True})
-
-            for acc_entry in record.get("accounts") or []:
-                acc = acc_entry.get("acc") or {}
-                acc_labels = acc_entry.get("accLabels") or []
-                acc_id = acc.get("account_number") or acc.get("id")
-                acc_label = acc.get("customer_name") or acc.get("name") or acc_id
-                flagged_acc = _is_flagged(acc, acc_labels)
-                add_node(acc_id, acc_label, "Account", {"customerName": acc_label, "isFlagged": flagged_acc})
-                edges.append({"source": acc_id, "target": device_id_val, "type": "HAS_IDENTIFIER"})
-
-            def handle_tx(items):
-                for item in items or []:
-                    tx = item.get("tx")
-                    other = item.get("other")
-                    acc = item.get("acc")
-                    acc_labels = item.get("accLabels") or []
-                    direction = item.get("direction")
-                    if not tx or not other or not acc:
-                        continue
-                    tx_ref = tx.get("tx_ref") or tx.get("id")
-                    add_node(tx_ref, tx_ref, "Transaction", {"amount": tx.get("amount"), "tags": tx.get("tags")})
-                    other_id = other.get("account_number") or other.get("id")
-                    other_label = other.get("customer_name") or other.get("name") or other_id
-                    acc_id = acc.get("account_number") or acc.get("id")
-                    acc_label = acc.get("customer_name") or acc.get("name") or acc_id
-                    flagged_acc = _is_flagged(acc, acc_labels)
-                    add_node(other_id, other_label, "Account", {"customerName": other_label})
-                    add_node(acc_id, acc_label, "Account", {"customerName": acc_label, "isFlagged": flagged_acc})
-                    if direction == "OUT":
-                        edges.append({"source": acc_id, "target": tx_ref, "type": "PERFORMS", "label": _edge_label(tx)})
-                        edges.append({"source": tx_ref, "target": other_id, "type": "TO"})
-                    else:
-                        edges.append({"source": other_id, "target": tx_ref, "type": "PERFORMS", "label": _edge_label(tx)})
-                        edges.append({"source": tx_ref, "target": acc_id, "type": "TO"})
-
-            handle_tx(record.get("outbound"))
-            handle_tx(record.get("inbound"))
-
-    # Overlay flags from Postgres
-    account_ids = [n["id"] for n in nodes.values() if n["type"] == "Account"]
-    device_ids = [n["id"] for n in nodes.values() if n["type"] == "Device"]
-    flagged_accounts = _flagged_map(account_ids, "ACCOUNT")
-    flagged_devices = _flagged_map(device_ids, "DEVICE")
-    for n in nodes.values():
-        if n["id"] in flagged_accounts or n["id"] in flagged_devices:
-            n["isFlagged"] = True
+    def build(session):
+        return _graph_response(identifier_graph(session, identifier, **limits_from_args(request.args)), "Identifier not found")
 
-    return jsonify({"status": "ok", "nodes": list(nodes.values()), "edges": edges})
+    return _graph_view(build)
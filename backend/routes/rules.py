@@ -1,8 +1,9 @@
-from flask import Blueprint, jsonify, abort
-from sqlalchemy import select
+from flask import Blueprint, jsonify, abort, request
+from sqlalchemy import func, select
 
 from backend.db.session import get_session
 from backend.models import RuleDefinition
+from backend.services.http_cache import conditional, make_etag
 
 rules_bp = Blueprint("rules", __name__)
 
@@ -11,25 +12,31 @@ rules_bp = Blueprint("rules", __name__)
 def list_rules():
     session = get_session()
     try:
-        rules = session.execute(select(RuleDefinition)).scalars().all()
-        return jsonify(
-            [
-                {
-                    "id": rule.id,
-                    "name": rule.name,
-                    "description": rule.description,
-                    "cypher_query": rule.cypher_query,
-                    "severity": rule.severity,
-                    "enabled": rule.enabled,
-                    "created_at": rule.created_at.isoformat() if rule.created_at else None,
-                }
-                for rule in rules
-            ]
-        )
+        # Rules are only ever inserted (seeded by the rule engines), so count + newest id/created_at version the list.
+        version = session.execute(select(func.count(RuleDefinition.id), func.max(RuleDefinition.id), func.max(RuleDefinition.created_at))).one()
+        return conditional(make_etag(request.full_path, *version), lambda: _list_rules(session))
     finally:
         session.close()
 
 
+def _list_rules(session):
+    rules = session.execute(select(RuleDefinition)).scalars().all()
+    return jsonify(
+        [
+            {
+                "id": rule.id,
+                "name": rule.name,
+                "description": rule.description,
+                "cypher_query": rule.cypher_query,
+                "severity": rule.severity,
+                "enabled": rule.enabled,
+                "created_at": rule.created_at.isoformat() if rule.created_at else None,
+            }
+            for rule in rules
+        ]
+    )
+
+
 @rules_bp.route("/rules/<int:rule_id>", methods=["GET"])
 def get_rule(rule_id: int):
     session = get_session()
@@ -0,0 +1,124 @@
+"""
+Offline community detection for mule rings.
+
+Pulls account-to-account edges from Neo4j:
+  - TRANSACTED_WITH (weighted by number of transfers)
+  - shared identifiers (Email/Phone/SSN used by more than one account)
+runs connected components + Louvain (backend/services/community_detection.py),
+and writes the result back onto each account node:
+  - communityId    dense int, 1 = largest community
+  - communitySize  number of accounts in the community
+  - communityMules number of Mule accounts in the community (Mule nodes only)
+
+R3/R7 read these cached properties instead of re-aggregating neighbours per call,
+so re-run this after every data load.
+
+Env vars:
+  NEO4J_URI
+  NEO4J_USER (or NEO4J_USERNAME)
+  NEO4J_PASSWORD
+  COMMUNITY_MAX_SHARED   Skip identifiers shared by more accounts than this (default 50)
+
+Usage:
+  python backend/scripts/detect_communities.py
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.services.community_detection import detect_communities  # noqa: E402
+from backend.services.http_cache import bump_graph_version  # noqa: E402
+
+BATCH_SIZE = 1000
+
+TRANSACTED_EDGES = """
+MATCH (a)-[r:TRANSACTED_WITH]->(b)
+RETURN elementId(a) AS src, elementId(b) AS dst, count(r) AS weight
+"""
+
+SHARED_IDENTIFIER_GROUPS = """
+MATCH (id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(acc)
+WITH id, collect(DISTINCT elementId(acc)) AS accounts
+WHERE size(accounts) > 1 AND size(accounts) <= $maxShared
+RETURN accounts
+"""
+
+
+def load_edges(session, max_shared: int):
+    edges = []
+    for rec in session.run(TRANSACTED_EDGES):
+        edges.append((rec["src"], rec["dst"], rec["weight"]))
+    tx_edges = len(edges)
+    # Accounts sharing an identifier are linked pairwise. Identifiers used by very many
+    # accounts (shared office wifi, placeholder emails) are skipped: they would merge
+    # unrelated rings and the clique is quadratic in size.
+    for rec in session.run(SHARED_IDENTIFIER_GROUPS, maxShared=max_shared):
+        accounts = rec["accounts"]
+        for i in range(len(accounts)):
+            for j in range(i + 1, len(accounts)):
+                edges.append((accounts[i], accounts[j], 1.0))
+    print(f"Loaded {tx_edges} TRANSACTED_WITH edges and {len(edges) - tx_edges} shared-identifier edges")
+    return edges
+
+
+def write_communities(session, communities: dict):
+    session.run("MATCH (n) WHERE n.communityId IS NOT NULL REMOVE n.communityId, n.communitySize, n.communityMules").consume()
+    rows = [{"eid": eid, "communityId": cid, "communitySize": size} for eid, (cid, size) in communities.items()]
+    for start in range(0, len(rows), BATCH_SIZE):
+        session.run(
+            """
+            UNWIND $batch AS row
+            MATCH (n) WHERE elementId(n) = row.eid
+            SET n.communityId = row.communityId,
+                n.communitySize = row.communitySize
+            """,
+            batch=rows[start : start + BATCH_SIZE],
+        ).consume()
+    # Communities also hold non-Mule accounts; R3 thresholds on the Mules in a ring.
+    session.run(
+        """
+        MATCH (m:Mule) WHERE m.communityId IS NOT NULL
+        WITH m.communityId AS cid, collect(m) AS mules
+        UNWIND mules AS m
+        SET m.communityMules = size(mules)
+        """
+    ).consume()
+    session.run("DROP INDEX mule_community_size IF EXISTS").consume()
+    session.run("CREATE INDEX mule_community_mules IF NOT EXISTS FOR (m:Mule) ON (m.communityMules)").consume()
+
+
+def main():
+    load_dotenv()
+    uri = os.getenv("NEO4J_URI")
+    user = os.getenv("NEO4J_USER") or os.getenv("NEO4J_USERNAME")
+    password = os.getenv("NEO4J_PASSWORD")
+    if not all([uri, user, password]):
+        raise SystemExit("NEO4J_URI, NEO4J_USER/NEO4J_USERNAME, NEO4J_PASSWORD are required")
+    max_shared = int(os.getenv("COMMUNITY_MAX_SHARED", "50"))
+
+    driver = GraphDatabase.driver(uri, auth=(user, password))
+    try:
+        with driver.session() as session:
+            started = time.perf_counter()
+            edges = load_edges(session, max_shared)
+            communities = detect_communities(edges)
+            n_communities = len({cid for cid, _ in communities.values()})
+            print(f"Detected {n_communities} communities over {len(communities)} accounts in {time.perf_counter() - started:.1f}s")
+            write_communities(session, communities)
+            bump_graph_version(session)
+        print("Community ids written.")
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,194 +7,462 @@ Tables expected (from generate_graph_data.py):
   - graph_account_device (account_id, device_id)
   - graph_transactions (tx_ref, from_account_id, to_account_id, amount, channel, timestamp, is_flagged, tags)
 
+Accounts and devices are exported as hash partitions in parallel. USES and
+transaction relationships are split into a source x destination partition grid
+(backend/services/bulk_export.py). USES cells run one diagonal at a time, which
+keeps workers on distinct accounts and distinct devices. Transaction endpoints
+are both accounts, hashed into the same buckets, so those cells run in rounds
+where no bucket is used twice as source or destination; otherwise two workers
+could lock the same hub account at once. After every batch the key of its last
+row is appended to a checkpoint file (default ~/.cache/gcash-fraud/); a rerun
+after a failure continues each cell after that key. The file is removed once an
+export completes.
+
 Env vars:
   DATABASE_URL (Postgres)
   NEO4J_URI (e.g., neo4j+s://<aura-endpoint>)
   NEO4J_USER
   NEO4J_PASSWORD
+  EXPORT_WORKERS   Default for --workers (4)
+
+The default --mode two-phase writes all nodes first and then relationships by
+MATCH on the constrained keys (CREATE instead of MERGE with --fresh on an empty
+graph; a resumed --fresh export uses MERGE). --mode merge keeps the older per-row
+MERGE of both endpoints.
+
+Usage:
+  python backend/scripts/export_to_neo4j.py [--workers 4] [--batch-size 500] [--checkpoint PATH] [--reset]
+                                            [--mode two-phase|merge] [--fresh]
 """
 
+import argparse
+import csv
+import io
 import os
-from typing import Iterable, List, Dict
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Tuple
 
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
 from neo4j import GraphDatabase
 
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.services.bulk_export import Checkpoint, Throughput, grid_rounds, pair_rounds  # noqa: E402
+from backend.services.http_cache import bump_graph_version  # noqa: E402
+
 BATCH_SIZE = 500
+DEFAULT_CHECKPOINT = Path.home() / ".cache" / "gcash-fraud" / "export_to_neo4j.checkpoint"
 
 
-def chunk(items: Iterable[Dict], size: int):
-    batch = []
-    for item in items:
-        batch.append(item)
-        if len(batch) >= size:
-            yield batch
-            batch = []
-    if batch:
-        yield batch
+# (label, key) pairs every load MATCHes or MERGEs on.
+REQUIRED_CONSTRAINTS = {("Account", "account_number"), ("Device", "device_id"), ("Transaction", "tx_ref")}
 
 
 def create_constraints(driver):
     queries = [
-        "CREATE CONSTRAINT account_account_number IF NOT EXISTS ON (a:Account) ASSERT a.account_number IS UNIQUE",
-        "CREATE CONSTRAINT device_device_id IF NOT EXISTS ON (d:Device) ASSERT d.device_id IS UNIQUE",
-        "CREATE CONSTRAINT tx_tx_ref IF NOT EXISTS ON (t:Transaction) ASSERT t.tx_ref IS UNIQUE",
+        "CREATE CONSTRAINT account_account_number IF NOT EXISTS FOR (a:Account) REQUIRE a.account_number IS UNIQUE",
+        "CREATE CONSTRAINT device_device_id IF NOT EXISTS FOR (d:Device) REQUIRE d.device_id IS UNIQUE",
+        "CREATE CONSTRAINT tx_tx_ref IF NOT EXISTS FOR (t:Transaction) REQUIRE t.tx_ref IS UNIQUE",
     ]
     with driver.session() as session:
         for q in queries:
-            session.run(q)
-
-
-def export_accounts_devices(engine, driver):
-    with engine.connect() as conn:
-        accounts = conn.execute(text("SELECT account_number, customer_name, risk_score, is_fraud FROM graph_accounts")).mappings()
-        devices = conn.execute(text("SELECT device_id, device_type FROM graph_devices")).mappings()
-        account_device = conn.execute(
-            text(
-                """
-                SELECT a.account_number, d.device_id
-                FROM graph_account_device ad
-                JOIN graph_accounts a ON a.id = ad.account_id
-                JOIN graph_devices d ON d.id = ad.device_id
-                """
-            )
-        ).mappings()
+            session.run(q).consume()
 
-    with driver.session() as session:
-        for batch in chunk(accounts, BATCH_SIZE):
-            session.run(
-                """
-                UNWIND $batch AS row
-                MERGE (a:Account {account_number: row.account_number})
-                SET a.customer_name = row.customer_name,
-                    a.risk_score = row.risk_score,
-                    a.is_fraud = row.is_fraud
-                """,
-                batch=list(batch),
-            )
-
-        for batch in chunk(devices, BATCH_SIZE):
-            session.run(
-                """
-                UNWIND $batch AS row
-                MERGE (d:Device {device_id: row.device_id})
-                SET d.device_type = row.device_type
-                """,
-                batch=list(batch),
-            )
-
-        for batch in chunk(account_device, BATCH_SIZE):
-            session.run(
-                """
-                UNWIND $batch AS row
-                MERGE (a:Account {account_number: row.account_number})
-                MERGE (d:Device {device_id: row.device_id})
-                MERGE (a)-[:USES]->(d)
-                """,
-                batch=list(batch),
-            )
-
-
-def export_transactions(engine, driver):
-    with engine.connect() as conn:
-        tx_rows = list(
-            conn.execute(
-            text(
-                """
-                SELECT t.tx_ref,
-                       fa.account_number AS from_acct,
-                       ta.account_number AS to_acct,
-                       t.amount,
-                       t.channel,
-                       t.timestamp,
-                       t.is_flagged,
-                       t.tags
-                FROM graph_transactions t
-                JOIN graph_accounts fa ON fa.id = t.from_account_id
-                JOIN graph_accounts ta ON ta.id = t.to_account_id
-                """
-            )
-            ).mappings()
-        )
-        # Persist to transaction_logs for BSP 1213 alignment
-        for row in tx_rows:
-            conn.execute(
-                text(
-                    """
-                    INSERT INTO transaction_logs (
-                        tx_reference, sender_account_id, receiver_account_id,
-                        amount, currency, tx_datetime, ofi, rfi, channel,
-                        auth_method, device_fingerprint, device_details,
-                        ip_address, browser_user_agent, non_financial_action,
-                        network_reference, created_at
-                    ) VALUES (
-                        :tx_reference, :sender_account_id, :receiver_account_id,
-                        :amount, :currency, :tx_datetime, :ofi, :rfi, :channel,
-                        :auth_method, :device_fingerprint, :device_details,
-                        :ip_address, :browser_user_agent, :non_financial_action,
-                        :network_reference, NOW()
-                    )
-                    ON CONFLICT (tx_reference) DO NOTHING
-                    """
-                ),
-                {
-                    "tx_reference": row["tx_ref"],
-                    "sender_account_id": row["from_acct"],
-                    "receiver_account_id": row["to_acct"],
-                    "amount": row["amount"],
-                    "currency": "PHP",
-                    "tx_datetime": row["timestamp"],
-                    "ofi": "GCASH_CORE",
-                    "rfi": "GCASH_CORE",
-                    "channel": row["channel"],
-                    "auth_method": "OTP_SMS",
-                    "device_fingerprint": None,
-                    "device_details": None,
-                    "ip_address": None,
-                    "browser_user_agent": None,
-                    "non_financial_action": None,
-                    "network_reference": row["tags"],
-                },
-            )
 
+def missing_constraints(driver):
+    """Required (label, key) pairs without a uniqueness / node-key constraint."""
     with driver.session() as session:
-        for batch in chunk(tx_rows, BATCH_SIZE):
-            # convert datetime to iso for Aura compatibility
-            payload: List[Dict] = []
-            for row in batch:
-                payload.append(
-                    {
-                        "tx_ref": row["tx_ref"],
-                        "from_acct": row["from_acct"],
-                        "to_acct": row["to_acct"],
-                        "amount": float(row["amount"]),
-                        "channel": row["channel"],
-                        "timestamp": row["timestamp"].isoformat() if isinstance(row["timestamp"], datetime) else row["timestamp"],
-                        "is_flagged": row["is_flagged"],
-                        "tags": row["tags"],
-                    }
+        rows = session.run("SHOW CONSTRAINTS YIELD type, entityType, labelsOrTypes, properties").data()
+    present = {
+        (r["labelsOrTypes"][0], r["properties"][0])
+        for r in rows
+        if r["entityType"] == "NODE"
+        and r["type"] in ("UNIQUENESS", "NODE_PROPERTY_UNIQUENESS", "NODE_KEY")
+        and len(r["labelsOrTypes"] or []) == 1
+        and len(r["properties"] or []) == 1
+    }
+    return sorted(REQUIRED_CONSTRAINTS - present)
+
+
+def bucket(expr: str, param: str) -> str:
+    # hashtext() is int4; shift to non-negative before taking the partition.
+    return f"mod(hashtext({expr})::bigint + 2147483648, :parts) = :{param}"
+
+
+TX_SELECT = """
+SELECT t.tx_ref,
+       fa.account_number AS from_acct,
+       ta.account_number AS to_acct,
+       t.amount,
+       t.channel,
+       t.timestamp,
+       t.is_flagged,
+       t.tags
+FROM graph_transactions t
+JOIN graph_accounts fa ON fa.id = t.from_account_id
+JOIN graph_accounts ta ON ta.id = t.to_account_id
+"""
+
+# transaction_logs columns that vary per row; the rest are constants filled in by
+# the set-based INSERT below.
+STAGE_COLUMNS = (
+    "tx_reference",
+    "sender_account_id",
+    "receiver_account_id",
+    "amount",
+    "tx_datetime",
+    "channel",
+    "network_reference",
+)
+
+CREATE_STAGE = """
+CREATE TEMP TABLE tx_log_stage (
+    tx_reference TEXT,
+    sender_account_id TEXT,
+    receiver_account_id TEXT,
+    amount NUMERIC,
+    tx_datetime TIMESTAMPTZ,
+    channel TEXT,
+    network_reference TEXT
+) ON COMMIT DROP
+"""
+
+MERGE_STAGE = """
+INSERT INTO transaction_logs (
+    tx_reference, sender_account_id, receiver_account_id,
+    amount, currency, tx_datetime, ofi, rfi, channel,
+    auth_method, network_reference, created_at
+)
+SELECT
+    tx_reference, sender_account_id, receiver_account_id,
+    amount, 'PHP', tx_datetime, 'GCASH_CORE', 'GCASH_CORE', channel,
+    'OTP_SMS', network_reference, NOW()
+FROM tx_log_stage
+ON CONFLICT (tx_reference) DO NOTHING
+"""
+
+COPY_NULL = "\\N"
+
+TX_MERGE = """
+UNWIND $batch AS row
+MERGE (src:Account {account_number: row.from_acct})
+MERGE (dst:Account {account_number: row.to_acct})
+MERGE (tx:Transaction {tx_ref: row.tx_ref})
+SET tx.amount = row.amount,
+    tx.channel = row.channel,
+    tx.timestamp = datetime(row.timestamp),
+    tx.is_flagged = row.is_flagged,
+    tx.tags = row.tags
+MERGE (src)-[:PERFORMS]->(tx)
+MERGE (tx)-[:TO]->(dst)
+"""
+
+
+def neo4j_tx_payload(row) -> Dict:
+    # convert datetime to iso for Aura compatibility
+    return {
+        "tx_ref": row["tx_ref"],
+        "from_acct": row["from_acct"],
+        "to_acct": row["to_acct"],
+        "amount": float(row["amount"]),
+        "channel": row["channel"],
+        "timestamp": row["timestamp"].isoformat() if isinstance(row["timestamp"], datetime) else row["timestamp"],
+        "is_flagged": row["is_flagged"],
+        "tags": row["tags"],
+    }
+
+
+def stage_csv(rows) -> io.StringIO:
+    """CSV for COPY ... (FORMAT csv, NULL '\\N'); None is written as \\N so it loads as NULL."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    for row in rows:
+        writer.writerow(
+            [
+                COPY_NULL if value is None else value
+                for value in (
+                    row["tx_ref"],
+                    row["from_acct"],
+                    row["to_acct"],
+                    row["amount"],
+                    row["timestamp"],
+                    row["channel"],
+                    row["tags"],
                 )
-            session.run(
-                """
-                UNWIND $batch AS row
-                MERGE (src:Account {account_number: row.from_acct})
-                MERGE (dst:Account {account_number: row.to_acct})
-                MERGE (tx:Transaction {tx_ref: row.tx_ref})
-                SET tx.amount = row.amount,
-                    tx.channel = row.channel,
-                    tx.timestamp = datetime(row.timestamp),
-                    tx.is_flagged = row.is_flagged,
-                    tx.tags = row.tags
-                MERGE (src)-[:PERFORMS]->(tx)
-                MERGE (tx)-[:TO]->(dst)
-                """,
-                batch=payload,
-            )
+            ]
+        )
+    buf.seek(0)
+    return buf
+
+
+def copy_transaction_logs(engine, batch_size: int = BATCH_SIZE):
+    """
+    Persist graph_transactions to transaction_logs for BSP 1213 alignment: stream
+    through a server-side cursor, COPY each batch into a temp staging table, then
+    move everything with a single INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+    Memory stays at one batch regardless of table size.
+    """
+    staged = 0
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute(CREATE_STAGE)
+        copy_sql = f"COPY tx_log_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(text(TX_SELECT)).mappings()
+            for batch in result.partitions():
+                cur.copy_expert(copy_sql, stage_csv(batch))
+                staged += len(batch)
+        cur.execute(MERGE_STAGE)
+        inserted = cur.rowcount
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    print(f"transaction_logs: {staged} rows staged, {inserted} new")
+
+
+ACCOUNTS_SQL = f"""
+SELECT account_number, customer_name, risk_score, is_fraud
+FROM graph_accounts
+WHERE {bucket("account_number", "part")}
+ORDER BY account_number
+"""
+
+# {verb} is MERGE, or CREATE for a --fresh load into an empty graph.
+ACCOUNTS_WRITE = """
+UNWIND $batch AS row
+{verb} (a:Account {{account_number: row.account_number}})
+SET a.customer_name = row.customer_name,
+    a.risk_score = row.risk_score,
+    a.is_fraud = row.is_fraud
+"""
+ACCOUNTS_MERGE = ACCOUNTS_WRITE.format(verb="MERGE")
+
+DEVICES_SQL = f"""
+SELECT device_id, device_type
+FROM graph_devices
+WHERE {bucket("device_id", "part")}
+ORDER BY device_id
+"""
+
+DEVICES_WRITE = """
+UNWIND $batch AS row
+{verb} (d:Device {{device_id: row.device_id}})
+SET d.device_type = row.device_type
+"""
+DEVICES_MERGE = DEVICES_WRITE.format(verb="MERGE")
+
+ACCOUNT_DEVICE_SQL = f"""
+SELECT a.account_number, d.device_id
+FROM graph_account_device ad
+JOIN graph_accounts a ON a.id = ad.account_id
+JOIN graph_devices d ON d.id = ad.device_id
+WHERE {bucket("a.account_number", "src_part")}
+  AND {bucket("d.device_id", "dst_part")}
+ORDER BY a.account_number, d.device_id
+"""
+
+ACCOUNT_DEVICE_MERGE = """
+UNWIND $batch AS row
+MERGE (a:Account {account_number: row.account_number})
+MERGE (d:Device {device_id: row.device_id})
+MERGE (a)-[:USES]->(d)
+"""
+
+TX_CELL_SQL = f"""
+{TX_SELECT}
+WHERE {bucket("fa.account_number", "src_part")}
+  AND {bucket("ta.account_number", "dst_part")}
+ORDER BY t.tx_ref
+"""
+
+
+# Two-phase load: every node first, then relationships by MATCH on the
+# constrained keys. Relationship rows then cost index seeks only, never a MERGE
+# on the endpoints; with --fresh the relationships themselves are CREATEd.
+TX_NODES_SQL = f"""
+{TX_SELECT}
+WHERE {bucket("t.tx_ref", "part")}
+ORDER BY t.tx_ref
+"""
+
+TX_NODES_WRITE = """
+UNWIND $batch AS row
+{verb} (tx:Transaction {{tx_ref: row.tx_ref}})
+SET tx.amount = row.amount,
+    tx.channel = row.channel,
+    tx.timestamp = datetime(row.timestamp),
+    tx.is_flagged = row.is_flagged,
+    tx.tags = row.tags
+"""
+
+TX_RELS_SQL = f"""
+SELECT t.tx_ref,
+       fa.account_number AS from_acct,
+       ta.account_number AS to_acct
+FROM graph_transactions t
+JOIN graph_accounts fa ON fa.id = t.from_account_id
+JOIN graph_accounts ta ON ta.id = t.to_account_id
+WHERE {bucket("fa.account_number", "src_part")}
+  AND {bucket("ta.account_number", "dst_part")}
+ORDER BY t.tx_ref
+"""
+
+TX_RELS_WRITE = """
+UNWIND $batch AS row
+MATCH (src:Account {{account_number: row.from_acct}})
+MATCH (dst:Account {{account_number: row.to_acct}})
+MATCH (tx:Transaction {{tx_ref: row.tx_ref}})
+{verb} (src)-[:PERFORMS]->(tx)
+{verb} (tx)-[:TO]->(dst)
+"""
+
+ACCOUNT_DEVICE_WRITE = """
+UNWIND $batch AS row
+MATCH (a:Account {{account_number: row.account_number}})
+MATCH (d:Device {{device_id: row.device_id}})
+{verb} (a)-[:USES]->(d)
+"""
+
+
+ACCOUNT_KEY = ("account_number",)
+DEVICE_KEY = ("device_id",)
+ACCOUNT_DEVICE_KEY = ("account_number", "device_id")
+TX_KEY = ("tx_ref",)
+
+
+@dataclass
+class Stage:
+    name: str
+    sql: str
+    cypher: str
+    key: Tuple[str, ...]  # output columns of the sql's ORDER BY, used to resume a cell
+    payload: Callable[..., Dict] = dict
+    grid: bool = False  # relationship stage: partition by (src, dst) and run by diagonals
+    same_endpoints: bool = False  # both ends are Accounts: run by pair_rounds instead
+
+
+def build_stages(mode: str = "two-phase", fresh: bool = False):
+    if mode == "merge":
+        return [
+            Stage("accounts", ACCOUNTS_SQL, ACCOUNTS_MERGE, ACCOUNT_KEY),
+            Stage("devices", DEVICES_SQL, DEVICES_MERGE, DEVICE_KEY),
+            Stage("account_device", ACCOUNT_DEVICE_SQL, ACCOUNT_DEVICE_MERGE, ACCOUNT_DEVICE_KEY, grid=True),
+            Stage("transactions", TX_CELL_SQL, TX_MERGE, TX_KEY, payload=neo4j_tx_payload, grid=True, same_endpoints=True),
+        ]
+    verb = "CREATE" if fresh else "MERGE"
+    return [
+        Stage("accounts", ACCOUNTS_SQL, ACCOUNTS_WRITE.format(verb=verb), ACCOUNT_KEY),
+        Stage("devices", DEVICES_SQL, DEVICES_WRITE.format(verb=verb), DEVICE_KEY),
+        Stage("transaction_nodes", TX_NODES_SQL, TX_NODES_WRITE.format(verb=verb), TX_KEY, payload=neo4j_tx_payload),
+        Stage("account_device", ACCOUNT_DEVICE_SQL, ACCOUNT_DEVICE_WRITE.format(verb=verb), ACCOUNT_DEVICE_KEY, grid=True),
+        Stage("transactions", TX_RELS_SQL, TX_RELS_WRITE.format(verb=verb), TX_KEY, grid=True, same_endpoints=True),
+    ]
+
+
+@dataclass
+class ExportContext:
+    engine: object
+    driver: object
+    checkpoint: Checkpoint
+    throughput: Throughput
+    partitions: int
+    batch_size: int
+
+
+def _write_batch(tx, cypher: str, rows):
+    tx.run(cypher, batch=rows).consume()
+
+
+def resume_sql(stage: Stage) -> str:
+    """The stage's query restricted to rows after :after_0, :after_1, ... in its key order."""
+    columns = ", ".join(stage.key)
+    after = ", ".join(f":after_{i}" for i in range(len(stage.key)))
+    return f"SELECT * FROM ({stage.sql}) AS cell WHERE ({columns}) > ({after}) ORDER BY {columns}"
+
+
+def export_cell(ctx: ExportContext, stage: Stage, cell: tuple):
+    """Stream one partition (or grid cell) in key order and write it batch by batch."""
+    cell_id = f"{stage.name}:{'-'.join(str(c) for c in cell)}"
+    if ctx.checkpoint.is_done(cell_id):
+        ctx.throughput.skip(stage.name)
+        return
+    if stage.grid:
+        params = {"parts": ctx.partitions, "src_part": cell[0], "dst_part": cell[1]}
+    else:
+        params = {"parts": ctx.partitions, "part": cell[0]}
+    sql = stage.sql
+    after = ctx.checkpoint.position(cell_id)
+    if after is not None:
+        sql = resume_sql(stage)
+        params.update({f"after_{i}": value for i, value in enumerate(after)})
+    with ctx.engine.connect() as conn, ctx.driver.session() as session:
+        result = conn.execution_options(stream_results=True, yield_per=ctx.batch_size).execute(text(sql), params).mappings()
+        for batch in result.partitions():
+            rows = [stage.payload(row) for row in batch]
+            # execute_write retries transient errors such as deadlocks.
+            session.execute_write(_write_batch, stage.cypher, rows)
+            ctx.checkpoint.mark(cell_id, len(rows), [batch[-1][k] for k in stage.key])
+            ctx.throughput.add(stage.name, len(rows))
+    ctx.checkpoint.finish(cell_id)
+
+
+def export_cells(ctx: ExportContext, stage: Stage, cells):
+    for cell in cells:
+        export_cell(ctx, stage, cell)
+
+
+def run_stage(ctx: ExportContext, pool: ThreadPoolExecutor, stage: Stage):
+    # Each round is a list of groups; a worker runs the cells of its group in order.
+    if stage.same_endpoints:
+        rounds = pair_rounds(ctx.partitions)
+    elif stage.grid:
+        rounds = [[[cell] for cell in cells] for cells in grid_rounds(ctx.partitions)]
+    else:
+        rounds = [[[(p,)] for p in range(ctx.partitions)]]
+    ctx.throughput.begin(stage.name)
+    for groups in rounds:
+        futures = [pool.submit(export_cells, ctx, stage, cells) for cells in groups]
+        wait(futures)
+        # Let the whole round finish (and checkpoint) before surfacing a failure.
+        for fut in futures:
+            fut.result()
+    ctx.throughput.end(stage.name)
+    r = ctx.throughput.report()[stage.name]
+    print(
+        f"{stage.name}: {r['rows']} rows in {r['seconds']}s ({r['rows_per_second']} rows/s), "
+        f"{r['skipped_cells']} cells already done"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export graph tables from Postgres into Neo4j")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("EXPORT_WORKERS", "4")), help="Concurrent Neo4j writers (also the partition count)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per UNWIND batch")
+    parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT), help="File recording export progress per cell")
+    parser.add_argument("--reset", action="store_true", help="Discard an existing checkpoint and export everything")
+    parser.add_argument(
+        "--mode",
+        choices=["two-phase", "merge"],
+        default="two-phase",
+        help="two-phase: nodes first, then relationships by MATCH on constrained keys; merge: MERGE everything per row",
+    )
+    parser.add_argument("--fresh", action="store_true", help="Target graph is empty: CREATE instead of MERGE (two-phase only)")
+    return parser.parse_args(argv)
 
 
 def main():
+    args = parse_args()
     load_dotenv()
     pg_url = os.getenv("DATABASE_URL")
     neo_uri = os.getenv("NEO4J_URI")
@@ -204,15 +472,47 @@ def main():
     if not all([pg_url, neo_uri, neo_user, neo_password]):
         raise SystemExit("DATABASE_URL, NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD are required")
 
-    engine = create_engine(pg_url)
-    driver = GraphDatabase.driver(neo_uri, auth=(neo_user, neo_password))
+    workers = max(1, args.workers)
+    if args.reset:
+        Path(args.checkpoint).unlink(missing_ok=True)
+    if args.fresh and args.mode != "two-phase":
+        raise SystemExit("--fresh requires --mode two-phase")
+    checkpoint = Checkpoint(
+        args.checkpoint,
+        meta={"resume": "keyset", "partitions": workers, "mode": args.mode, "fresh": args.fresh},
+    )
+    if checkpoint.resumed:
+        print(f"Resuming: {checkpoint.resumed} cells started or done ({args.checkpoint})")
 
+    engine = create_engine(pg_url, pool_size=workers + 1)
+    driver = GraphDatabase.driver(neo_uri, auth=(neo_user, neo_password))
+    ctx = ExportContext(engine, driver, checkpoint, Throughput(), partitions=workers, batch_size=args.batch_size)
+    completed = False
     try:
         create_constraints(driver)
-        export_accounts_devices(engine, driver)
-        export_transactions(engine, driver)
+        missing = missing_constraints(driver)
+        if missing:
+            raise SystemExit(f"Missing uniqueness constraints for {missing}; refusing to load without key indexes")
+        # A resumed run may replay a batch that committed before its checkpoint line was
+        # written; CREATE would then hit the key constraints or duplicate relationships.
+        fresh = args.fresh and not checkpoint.resumed
+        if args.fresh and checkpoint.resumed:
+            print("Resuming a --fresh export: writing with MERGE")
+        if fresh:
+            with driver.session() as session:
+                existing = session.run("MATCH (n) WHERE n:Account OR n:Device OR n:Transaction RETURN count(n) > 0 AS any").single()["any"]
+            if existing:
+                raise SystemExit("--fresh given but the graph already has Account/Device/Transaction nodes")
+        copy_transaction_logs(engine, args.batch_size)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="neo4j-export") as pool:
+            for stage in build_stages(args.mode, fresh):
+                run_stage(ctx, pool, stage)
+        with driver.session() as session:
+            bump_graph_version(session)  # invalidates graph view ETags
+        completed = True
         print("Export complete.")
     finally:
+        checkpoint.close(completed=completed)
         driver.close()
         engine.dispose()
 
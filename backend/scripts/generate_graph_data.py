@@ -73,6 +73,8 @@ transactions_table = Table(
     Column("timestamp", DateTime, nullable=False),
     Column("is_flagged", Boolean, default=False, nullable=False),
     Column("tags", String(255), nullable=True),
+    # Hourly step, filled by generate_benchmark_graph.py
+    Column("global_step", Integer, nullable=True),
 )
 
 
@@ -0,0 +1,81 @@
+"""
+PROFILE every registered rule query and flag plan regressions.
+
+Runs each query in backend/services/rule_queries.py with PROFILE (the query
+executes, with its route's default parameters), stores db hits, rows and the
+operator tree under <QUERY_PROFILE_DIR>/<dataset>/<commit>.json and compares
+with the previous run on the same dataset (or --baseline). A risky operator
+(AllNodesScan, CartesianProduct, Eager) appearing, db hits growing past
+--threshold, or a query starting to fail is reported as a regression.
+
+Env vars:
+  NEO4J_URI
+  NEO4J_USER (or NEO4J_USERNAME)
+  NEO4J_PASSWORD
+  QUERY_PROFILE_DIR   Where runs are stored (default backend/data/query_profiles)
+  GIT_COMMIT          Commit id to record when .git is not available
+
+Usage:
+  python backend/scripts/profile_rule_queries.py --dataset xavier
+  python backend/scripts/profile_rule_queries.py --dataset xavier --queries R8 R9 --baseline 1a2b3c4 --fail-on-regression
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.services.query_profiler import DB_HITS_THRESHOLD, ProfileStore, run_profile  # noqa: E402
+from backend.services.rule_queries import RULE_QUERIES  # noqa: E402
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Profile rule queries and flag plan regressions")
+    parser.add_argument("--dataset", default="default", help="Name of the loaded dataset; runs are compared per dataset")
+    parser.add_argument("--queries", nargs="+", choices=sorted(RULE_QUERIES), help="Subset of queries (default: all)")
+    parser.add_argument("--baseline", help="Commit to compare with (default: latest other run on this dataset)")
+    parser.add_argument("--commit", help="Commit id to record (default: git HEAD)")
+    parser.add_argument("--threshold", type=float, default=DB_HITS_THRESHOLD, help="Relative db-hit growth counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    load_dotenv()
+    uri = os.getenv("NEO4J_URI")
+    user = os.getenv("NEO4J_USER") or os.getenv("NEO4J_USERNAME")
+    password = os.getenv("NEO4J_PASSWORD")
+    if not all([uri, user, password]):
+        raise SystemExit("NEO4J_URI, NEO4J_USER/NEO4J_USERNAME, NEO4J_PASSWORD are required")
+
+    store = ProfileStore()
+    driver = GraphDatabase.driver(uri, auth=(user, password))
+    try:
+        report = run_profile(driver, args.dataset, store, args.queries, args.commit, args.baseline, args.threshold)
+    finally:
+        driver.close()
+
+    print(f"Dataset {report['dataset']} @ {report['commit']} (baseline {report['baseline'] or 'none'})")
+    for name, entry in report["queries"].items():
+        if "error" in entry:
+            print(f"  {name:14} ERROR {entry['error']}")
+            continue
+        risky = f"  risky: {', '.join(entry['riskyOperators'])}" if entry["riskyOperators"] else ""
+        print(f"  {name:14} dbHits={entry['dbHits']:>10} rows={entry['rows']:>6} {entry['timeMs']:>8.1f}ms{risky}")
+    for reg in report["regressions"]:
+        print(f"REGRESSION {reg['query']} [{reg['kind']}] {reg['detail']}")
+    print(f"Saved {store.path_for(report['dataset'], report['commit'])}")
+    if report["regressions"] and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
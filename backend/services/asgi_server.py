@@ -0,0 +1,269 @@
+"""
+Small ASGI toolkit behind backend/asgi.py. It has four parts:
+
+- a path router for native async handlers, with patterns in Flask syntax
+  ("/x/<id>") so the metric labels match the Flask routes;
+- JSON responses that use the Flask app's serializer, compression, CORS
+  headers and ETag rules;
+- a WSGI bridge that runs the Flask app on a thread pool for every other
+  route. asgiref's WsgiToAsgi would run them all on a single thread;
+- lifespan handling for the async Neo4j driver.
+"""
+
+import asyncio
+import io
+import logging
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.http import parse_accept_header, parse_etags
+
+from backend.services.compression import compress_body, negotiate_encoding
+from backend.services.http_cache import CACHE_CONTROL
+from backend.services.json_provider import dumps_bytes
+from backend.services.metrics import end_request, start_request
+from backend.services.slow_queries import set_tags
+
+logger = logging.getLogger(__name__)
+
+# Same headers as the Flask app's add_cors_headers hook.
+CORS_HEADERS = (
+    ("Access-Control-Allow-Origin", "*"),
+    ("Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, OPTIONS"),
+    ("Access-Control-Allow-Headers", "Content-Type, Authorization"),
+    ("Access-Control-Expose-Headers", "ETag, X-Next-After-Id"),
+)
+
+
+class Request:
+    def __init__(self, scope: Dict[str, Any], body: bytes = b""):
+        self.scope = scope
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query_string = scope.get("query_string", b"").decode("latin-1")
+        self.args = MultiDict(parse_qsl(self.query_string, keep_blank_values=True))
+        self.headers = Headers([(k.decode("latin-1"), v.decode("latin-1")) for k, v in scope.get("headers", [])])
+        self.body = body
+
+    @property
+    def full_path(self) -> str:
+        # Same shape as flask.Request.full_path, so ETags match across serving modes.
+        return f"{self.path}?{self.query_string}"
+
+    @property
+    def if_none_match(self):
+        return parse_etags(self.headers.get("If-None-Match"))
+
+    @property
+    def accept_encodings(self):
+        return parse_accept_header(self.headers.get("Accept-Encoding"))
+
+
+class JSONResponse:
+    def __init__(self, payload: Any = None, status: int = 200, etag: Optional[str] = None):
+        self.body = b"" if status == 304 else dumps_bytes(payload) + b"\n"
+        self.status = status
+        self.etag = etag
+
+    @classmethod
+    def not_modified(cls, etag: str) -> "JSONResponse":
+        return cls(status=304, etag=etag)
+
+    def encode(self, request: Request) -> Tuple[List[Tuple[bytes, bytes]], bytes]:
+        headers = Headers(CORS_HEADERS)
+        body = self.body
+        if self.status != 304:
+            headers["Content-Type"] = "application/json"
+        weak = False
+        if self.status == 200:
+            headers["Vary"] = "Accept-Encoding"
+            encoding = negotiate_encoding(request.accept_encodings, len(body))
+            if encoding:
+                body = compress_body(body, encoding)
+                headers["Content-Encoding"] = encoding
+                weak = True
+        if self.etag:
+            headers["ETag"] = f'{"W/" if weak else ""}"{self.etag}"'
+            headers["Cache-Control"] = CACHE_CONTROL
+        headers["Content-Length"] = str(len(body))
+        return [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()], body
+
+
+Handler = Callable[..., Awaitable[Optional[JSONResponse]]]
+
+
+class Router:
+    def __init__(self):
+        self._routes: List[Tuple[str, str, "re.Pattern[str]", Handler]] = []
+
+    def add(self, method: str, pattern: str, handler: Handler):
+        regex = re.compile("^" + re.sub(r"<(\w+)>", r"(?P<\1>[^/]+)", pattern) + "$")
+        self._routes.append((method, pattern, regex, handler))
+
+    def route(self, pattern: str, methods=("GET",)):
+        def decorator(handler: Handler) -> Handler:
+            for method in methods:
+                self.add(method, pattern, handler)
+            return handler
+
+        return decorator
+
+    def match(self, method: str, path: str):
+        for route_method, pattern, regex, handler in self._routes:
+            m = regex.match(path)
+            if m and route_method == method:
+                return pattern, handler, m.groupdict()
+        return None
+
+
+def wsgi_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        # The body is already buffered, so its real length replaces any chunked framing.
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name, value = raw_name.decode("latin-1"), raw_value.decode("latin-1")
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+        elif name not in ("content-length", "transfer-encoding"):
+            key = "HTTP_" + name.upper().replace("-", "_")
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+class WsgiBridge:
+    """Serves a WSGI app from ASGI, one pool thread per in-flight request."""
+
+    def __init__(self, wsgi_app, threads: int = 32):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+
+    def _run(self, environ):
+        started = {}
+        chunks: List[bytes] = []
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = headers
+            return chunks.append
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    chunks.append(chunk)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in started["headers"]]
+        return started["status"], headers, b"".join(chunks)
+
+    async def __call__(self, scope, receive, send, body: Optional[bytes] = None):
+        if body is None:
+            body = await read_body(receive)
+        loop = asyncio.get_running_loop()
+        status, headers, content = await loop.run_in_executor(self.executor, self._run, wsgi_environ(scope, body))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": content})
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class AsgiApp:
+    """
+    Routes matched by `router` run natively. A handler may return None to pass
+    the request on to `fallback` (e.g. after warming a cache). Everything else
+    goes straight to `fallback`.
+    """
+
+    def __init__(self, router: Router, fallback: WsgiBridge, metrics=None, on_startup=None, on_shutdown=None):
+        self.router = router
+        self.fallback = fallback
+        self.metrics = metrics
+        self.on_startup = on_startup
+        self.on_shutdown = on_shutdown
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    if self.on_startup:
+                        await self.on_startup()
+                except Exception as exc:
+                    await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.on_shutdown:
+                    await self.on_shutdown()
+                self.fallback.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        match = self.router.match(scope["method"], scope["path"])
+        if match is None:
+            await self.fallback(scope, receive, send)
+            return
+        pattern, handler, params = match
+        request = Request(scope, await read_body(receive))
+        started = time.perf_counter()
+        counter = start_request()
+        set_tags(endpoint=pattern, method=request.method)
+        try:
+            try:
+                response = await handler(request, **params)
+            except Exception:
+                logger.exception("%s %s failed", request.method, request.path)
+                response = JSONResponse({"status": "error", "message": "Internal Server Error"}, 500)
+            if response is None:
+                await self.fallback(scope, receive, send, body=request.body)
+                return
+            headers, body = response.encode(request)
+            await send({"type": "http.response.start", "status": response.status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            if self.metrics is not None:
+                self.metrics.observe(
+                    request.method, pattern, response.status, time.perf_counter() - started, counter.sql, counter.neo4j, len(body)
+                )
+        finally:
+            end_request()
+            set_tags()
@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def grid_rounds(partitions: int) -> List[List[Tuple[int, int]]]:
+    """
+    Schedule the partitions x partitions grid of relationship cells (src bucket,
+    dst bucket) as diagonals: round r holds cells (i, (i + r) % partitions).
+    Within a round no two cells share a source or a destination bucket. That only
+    keeps workers off each other's nodes when sources and destinations are
+    different node sets (Account -> Device); see pair_rounds() for Account -> Account.
+    """
+    return [[(i, (i + r) % partitions) for i in range(partitions)] for r in range(partitions)]
+
+
+def pair_rounds(partitions: int) -> List[List[List[Tuple[int, int]]]]:
+    """
+    Schedule for a grid whose sources and destinations are bucketed over the same
+    nodes (Account -> Account). Each round is a list of worker groups, each group a
+    list of cells run one after another:
+
+    - a round-robin tournament pairs up buckets, and the group for pair {a, b}
+      takes both cells (a, b) and (b, a);
+    - each bucket's own cell (a, a) goes to the round where it sits out (odd
+      counts) or to one final round of its own (even counts).
+
+    No bucket appears in two groups of the same round, so concurrent workers never
+    touch the same endpoint node, at the price of about half the parallelism.
+    """
+    slots = list(range(partitions)) + ([None] if partitions % 2 else [])
+    n = len(slots)
+    rounds = []
+    for _ in range(n - 1):
+        groups = []
+        for i in range(n // 2):
+            a, b = slots[i], slots[n - 1 - i]
+            if a is None or b is None:
+                bye = b if a is None else a
+                groups.append([(bye, bye)])
+            else:
+                groups.append([(a, b), (b, a)])
+        rounds.append(groups)
+        # Circle method: keep the first slot fixed, rotate the rest.
+        slots = [slots[0], slots[-1]] + slots[1:-1]
+    if partitions % 2 == 0:
+        rounds.append([[(i, i)] for i in range(partitions)])
+    return rounds
+
+
+class Checkpoint:
+    """
+    Append-only record of export progress per cell (one JSON line per batch).
+
+    Each cell is read in key order, so its progress is the key of the last row
+    written: a resumed cell continues after that key (keyset), not at a batch
+    number, and rows added or removed since the failed run cannot shift which
+    rows are skipped. A finished cell gets a final "done" line.
+
+    The first line stores the export parameters; cell membership depends on the
+    partition count, so a file written with different parameters is discarded
+    rather than trusted.
+    """
+
+    def __init__(self, path, meta: Dict[str, Any]):
+        self.path = Path(path)
+        self.meta = meta
+        self._lock = threading.Lock()
+        self._after: Dict[str, List[Any]] = {}
+        self._done = set()
+        self.resumed = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._load()
+        self._fh = open(self.path, "a", encoding="utf-8")
+        if self.path.stat().st_size == 0:
+            self._write({"meta": meta})
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = [line for line in f if line.strip()]
+        except FileNotFoundError:
+            return
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+        if len(records) < len(lines):
+            # A crash mid-write left a torn last line; rewrite without it so appends stay line-aligned.
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(r) + "\n" for r in records)
+        if not records or records[0].get("meta") != self.meta:
+            if records:
+                print(f"Checkpoint {self.path} was written with {records[0].get('meta')}; starting over")
+            self.path.unlink(missing_ok=True)
+            return
+        for r in records[1:]:
+            if r.get("done"):
+                self._done.add(r["cell"])
+            elif "after" in r:
+                self._after[r["cell"]] = r["after"]
+        self.resumed = len(self._done | set(self._after))
+
+    def _write(self, record: Dict[str, Any]):
+        self._fh.write(json.dumps(record) + "\n")
+        self._fh.flush()
+
+    def is_done(self, cell_id: str) -> bool:
+        with self._lock:
+            return cell_id in self._done
+
+    def position(self, cell_id: str) -> Optional[List[Any]]:
+        """Key of the last row written for the cell, or None if it has not started."""
+        with self._lock:
+            return self._after.get(cell_id)
+
+    def mark(self, cell_id: str, rows: int, after: List[Any]):
+        with self._lock:
+            self._after[cell_id] = after
+            self._write({"cell": cell_id, "after": after, "rows": rows})
+
+    def finish(self, cell_id: str):
+        with self._lock:
+            self._done.add(cell_id)
+            self._write({"cell": cell_id, "done": True})
+
+    def close(self, completed: bool = False):
+        self._fh.close()
+        if completed:
+            os.remove(self.path)
+
+
+class Throughput:
+    """Rows written per entity type, timed from begin() to end() of each export stage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def begin(self, entity: str):
+        with self._lock:
+            self._stats[entity] = {"rows": 0, "batches": 0, "skipped": 0, "start": time.perf_counter(), "end": None}
+
+    def add(self, entity: str, rows: int):
+        with self._lock:
+            s = self._stats[entity]
+            s["rows"] += rows
+            s["batches"] += 1
+
+    def skip(self, entity: str):
+        with self._lock:
+            self._stats[entity]["skipped"] += 1
+
+    def end(self, entity: str):
+        with self._lock:
+            self._stats[entity]["end"] = time.perf_counter()
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            out = {}
+            for entity, s in self._stats.items():
+                elapsed = max((s["end"] or time.perf_counter()) - s["start"], 1e-9)
+                out[entity] = {
+                    "rows": int(s["rows"]),
+                    "batches": int(s["batches"]),
+                    "skipped_cells": int(s["skipped"]),
+                    "seconds": round(elapsed, 2),
+                    "rows_per_second": round(s["rows"] / elapsed, 1) if s["rows"] else 0.0,
+                }
+            return out
@@ -0,0 +1,134 @@
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+
+Edge = Tuple[Hashable, Hashable, float]
+
+
+def build_adjacency(edges: Iterable[Edge]) -> Dict[Hashable, Dict[Hashable, float]]:
+    """
+    Fold (src, dst, weight) edges into an undirected weighted adjacency map.
+    Parallel edges are summed; self-loops are dropped.
+    """
+    adj: Dict[Hashable, Dict[Hashable, float]] = defaultdict(dict)
+    for src, dst, weight in edges:
+        if src is None or dst is None or src == dst:
+            continue
+        w = float(weight or 1.0)
+        adj[src][dst] = adj[src].get(dst, 0.0) + w
+        adj[dst][src] = adj[dst].get(src, 0.0) + w
+    return adj
+
+
+def connected_components(adj: Dict[Hashable, Dict[Hashable, float]]) -> List[List[Hashable]]:
+    """Union-find over the adjacency map; components are returned largest first."""
+    parent = {node: node for node in adj}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for node, neighbors in adj.items():
+        for other in neighbors:
+            ra, rb = find(node), find(other)
+            if ra != rb:
+                parent[rb] = ra
+
+    groups: Dict[Hashable, List[Hashable]] = defaultdict(list)
+    for node in adj:
+        groups[find(node)].append(node)
+    return sorted((sorted(g, key=str) for g in groups.values()), key=lambda g: (-len(g), str(g[0])))
+
+
+def _one_level(adj, resolution: float):
+    """Local-moving phase of Louvain. Returns (node -> community, improved)."""
+    degree = {n: sum(nbrs.values()) + nbrs.get(n, 0.0) for n, nbrs in adj.items()}
+    m2 = sum(degree.values())
+    community = {n: n for n in adj}
+    if m2 == 0:
+        return community, False
+    tot = dict(degree)
+    nodes = sorted(adj, key=str)
+    improved = False
+    moved = True
+    while moved:
+        moved = False
+        for node in nodes:
+            current = community[node]
+            k_i = degree[node]
+            links: Dict[Hashable, float] = defaultdict(float)
+            for nbr, w in adj[node].items():
+                if nbr != node:
+                    links[community[nbr]] += w
+            tot[current] -= k_i
+            best, best_gain = current, links.get(current, 0.0) - resolution * tot[current] * k_i / m2
+            for comm, w_in in links.items():
+                gain = w_in - resolution * tot[comm] * k_i / m2
+                if gain > best_gain + 1e-12:
+                    best, best_gain = comm, gain
+            tot[best] += k_i
+            if best != current:
+                community[node] = best
+                moved = True
+                improved = True
+    return community, improved
+
+
+def _aggregate(adj, community):
+    agg: Dict[Hashable, Dict[Hashable, float]] = defaultdict(dict)
+    for node, nbrs in adj.items():
+        cu = community[node]
+        agg.setdefault(cu, {})
+        for nbr, w in nbrs.items():
+            cv = community[nbr]
+            if cu == cv and nbr != node:
+                # Internal edges are seen from both ends; halve so the self-loop keeps the edge weight.
+                w = w / 2.0
+            agg[cu][cv] = agg[cu].get(cv, 0.0) + w
+    return agg
+
+
+def louvain(adj: Dict[Hashable, Dict[Hashable, float]], resolution: float = 1.0, max_levels: int = 10) -> Dict[Hashable, Hashable]:
+    """
+    Multi-level Louvain modularity optimisation. Deterministic (nodes are visited
+    in sorted order) so repeated runs on the same graph give the same partition.
+    """
+    partition = {n: n for n in adj}
+    level_adj = adj
+    for _ in range(max_levels):
+        community, improved = _one_level(level_adj, resolution)
+        if not improved:
+            break
+        partition = {n: community[c] for n, c in partition.items()}
+        level_adj = _aggregate(level_adj, community)
+    return partition
+
+
+def detect_communities(edges: Iterable[Edge], resolution: float = 1.0, min_size: int = 2) -> Dict[Hashable, Tuple[int, int]]:
+    """
+    Connected components first (cheap, splits the problem), then Louvain inside
+    each component large enough to contain more than one ring.
+    Returns node -> (communityId, communitySize); ids are dense ints, largest community first.
+    """
+    adj = build_adjacency(edges)
+    groups: List[List[Hashable]] = []
+    for component in connected_components(adj):
+        if len(component) < min_size:
+            continue
+        if len(component) <= 3:
+            groups.append(component)
+            continue
+        sub = {n: adj[n] for n in component}
+        by_comm: Dict[Hashable, List[Hashable]] = defaultdict(list)
+        for node, comm in louvain(sub, resolution=resolution).items():
+            by_comm[comm].append(node)
+        groups.extend(g for g in by_comm.values() if len(g) >= min_size)
+
+    groups.sort(key=lambda g: (-len(g), str(min(g, key=str))))
+    result: Dict[Hashable, Tuple[int, int]] = {}
+    for community_id, group in enumerate(groups, start=1):
+        for node in group:
+            result[node] = (community_id, len(group))
+    return result
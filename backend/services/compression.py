@@ -0,0 +1,64 @@
+"""
+after_request hook that brotli/gzip-compresses text responses above
+COMPRESS_MIN_BYTES, picking the encoding from Accept-Encoding. Brotli is used
+only when the `brotli` package is installed.
+"""
+
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+COMPRESSIBLE = {
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+ENCODINGS = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def negotiate_encoding(accept_encodings, size: int):
+    """Encoding to use for a body of `size` bytes, or None. No Accept-Encoding header means identity only."""
+    if not accept_encodings or size < COMPRESS_MIN_BYTES:
+        return None
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def compress_response(response):
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding(request.accept_encodings, response.content_length or 0)
+    if not encoding:
+        return response
+    response.set_data(compress_body(response.get_data(), encoding))
+    response.headers["Content-Encoding"] = encoding
+    # The bytes differ per encoding, so a strong validator must not be shared.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
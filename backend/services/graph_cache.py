@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+def graph_fingerprint(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> str:
+    """
+    Stable content hash of a nodes/edges graph. Node and edge order, and key order
+    inside each dict, do not change the fingerprint.
+    """
+    norm_nodes = sorted((json.dumps(n, sort_keys=True, default=str) for n in nodes))
+    norm_edges = sorted((json.dumps(e, sort_keys=True, default=str) for e in edges))
+    payload = json.dumps({"nodes": norm_nodes, "edges": norm_edges}, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._data: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                now = time.monotonic()
+                for k in [k for k, (exp, _) in self._data.items() if exp <= now]:
+                    del self._data[k]
+                if len(self._data) >= self.max_entries:
+                    # Drop the entry closest to expiry.
+                    del self._data[min(self._data, key=lambda k: self._data[k][0])]
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses, "ttl_seconds": self.ttl_seconds}
+
+
+class RenderCache:
+    """
+    Content-addressed on-disk cache for rendered graph images.
+
+    Files are named <fingerprint>.<ext>, so identical graphs share one render.
+    A hit bumps the file's mtime; when the directory exceeds max_bytes the
+    least-recently-used files are removed. Counters are per process; sizes are
+    read from disk so several workers can share one directory.
+    """
+
+    def __init__(self, directory, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, fingerprint: str, ext: str = "png") -> Path:
+        return self.directory / f"{fingerprint}.{ext}"
+
+    def get(self, fingerprint: str, ext: str = "png") -> Optional[str]:
+        path = self.path_for(fingerprint, ext)
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return str(path)
+
+    def put(self, fingerprint: str, data: bytes, ext: str = "png") -> str:
+        path = self.path_for(fingerprint, ext)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so a concurrent reader never sees a partial image.
+        tmp_path = self.directory / f".{fingerprint}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return str(path)
+
+    def read_marker(self, fingerprint: str, ext: str) -> Optional[Tuple[float, str]]:
+        """(mtime, text) of a state file written with put(), without counting a hit or miss."""
+        path = self.path_for(fingerprint, ext)
+        try:
+            return path.stat().st_mtime, path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def discard(self, fingerprint: str, ext: str):
+        self.path_for(fingerprint, ext).unlink(missing_ok=True)
+
+    def _entries(self):
+        entries = []
+        for p in self.directory.iterdir():
+            if p.name.startswith("."):
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        return entries
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, p in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                if keep is not None and p == keep:
+                    continue
+                try:
+                    p.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            self.evictions += removed
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": str(self.directory),
+                "files": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+            }
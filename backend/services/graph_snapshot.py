@@ -0,0 +1,309 @@
+"""
+Compact, memory-mappable snapshot of the graph_* tables.
+
+A snapshot is a directory of .npy arrays plus meta.json:
+
+  account_number.npy   S<n>    interned account numbers, sorted; the position is the account index
+  account_risk.npy     float32 risk_score (NaN when unknown)
+  account_fraud.npy    bool
+  device_id.npy        S<n>    interned device ids, sorted; the position is the device index
+  out_offsets.npy      int64   CSR over senders: edges of account i are out_*[out_offsets[i]:out_offsets[i+1]]
+  out_targets.npy      int32   receiver account index
+  out_amount.npy       float64
+  out_timestamp.npy    int64   epoch seconds
+  out_step.npy         int32   global_step (-1 when the source has none)
+  out_flagged.npy      bool
+  out_tx_ref.npy       S<n>
+  in_offsets.npy       int64   CSR over receivers
+  in_edges.npy         int64   position of the edge in the out_* arrays
+  ad_offsets.npy       int64   CSR account -> device
+  ad_targets.npy       int32
+  da_offsets.npy       int64   CSR device -> account
+  da_targets.npy       int32
+
+Arrays are opened with np.load(mmap_mode="r"), so opening costs milliseconds and
+every process (gunicorn workers, batch jobs) shares one page-cached copy.
+
+The snapshot path is a symlink to a versioned sibling directory (.<name>.<hex>).
+write_snapshot fills a new version and repoints the link with one os.replace;
+GraphSnapshot resolves the link once, so a reader loads every array from the
+same version even while a rebuild swaps the link underneath it.
+"""
+
+import csv
+import gzip
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+ARRAYS = (
+    "account_number",
+    "account_risk",
+    "account_fraud",
+    "device_id",
+    "out_offsets",
+    "out_targets",
+    "out_amount",
+    "out_timestamp",
+    "out_step",
+    "out_flagged",
+    "out_tx_ref",
+    "in_offsets",
+    "in_edges",
+    "ad_offsets",
+    "ad_targets",
+    "da_offsets",
+    "da_targets",
+)
+
+
+def _truthy(values: Iterable[Any]) -> np.ndarray:
+    return np.array([v in (True, 1, "1", "t", "true", "True", "TRUE") for v in values], dtype=bool)
+
+
+def _floats(values: Iterable[Any]) -> np.ndarray:
+    return np.array([float(v) if v not in (None, "") else np.nan for v in values], dtype=np.float64)
+
+
+def _epoch_seconds(values: Iterable[Any]) -> np.ndarray:
+    text = [v.isoformat() if hasattr(v, "isoformat") else str(v) for v in values]
+    return np.array(text, dtype="datetime64[us]").astype("datetime64[s]").astype(np.int64)
+
+
+def _csr(rows: np.ndarray, n_rows: int):
+    """Offsets and the stable ordering that groups edge positions by `rows`."""
+    order = np.argsort(rows, kind="stable")
+    offsets = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=offsets[1:])
+    return offsets, order
+
+
+def _intern(db_ids: np.ndarray, keys: List[str]):
+    """Sort entities by key; return the sorted keys and a db id -> dense index mapper."""
+    keys_arr = np.array(keys, dtype="S")
+    order = np.argsort(keys_arr, kind="stable")
+    dense_of_row = np.empty(len(order), dtype=np.int64)
+    dense_of_row[order] = np.arange(len(order))
+    id_order = np.argsort(db_ids)
+    sorted_ids = db_ids[id_order]
+
+    def to_dense(ids) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        pos = np.searchsorted(sorted_ids, ids)
+        if len(ids) and (pos.max(initial=0) >= len(sorted_ids) or not np.array_equal(sorted_ids[pos], ids)):
+            raise ValueError("reference to an unknown id")
+        return dense_of_row[id_order[pos]]
+
+    return keys_arr[order], order, to_dense
+
+
+def build_arrays(accounts: Dict[str, list], devices: Dict[str, list], links: Dict[str, list], transactions: Dict[str, list]) -> Dict[str, np.ndarray]:
+    """
+    Column dicts (as read from the graph_* tables) -> snapshot arrays.
+    Rows reference accounts/devices by their database id; the snapshot uses dense indexes.
+    """
+    acc_numbers, acc_order, acc_dense = _intern(np.asarray(accounts["id"], dtype=np.int64), accounts["account_number"])
+    dev_ids, _, dev_dense = _intern(np.asarray(devices["id"], dtype=np.int64), devices["device_id"])
+    n_acc, n_dev = len(acc_numbers), len(dev_ids)
+
+    src = acc_dense(transactions["from_account_id"])
+    dst = acc_dense(transactions["to_account_id"])
+    out_offsets, out_order = _csr(src, n_acc)
+    dst_sorted = dst[out_order]
+    in_offsets, in_order = _csr(dst_sorted, n_acc)
+
+    steps = transactions.get("global_step")
+    step_arr = np.array([int(s) if s not in (None, "") else -1 for s in steps], dtype=np.int32) if steps else np.full(len(src), -1, dtype=np.int32)
+
+    link_acc = acc_dense(links["account_id"])
+    link_dev = dev_dense(links["device_id"])
+    ad_offsets, ad_order = _csr(link_acc, n_acc)
+    da_offsets, da_order = _csr(link_dev, n_dev)
+
+    return {
+        "account_number": acc_numbers,
+        "account_risk": _floats(accounts["risk_score"])[acc_order].astype(np.float32),
+        "account_fraud": _truthy(accounts["is_fraud"])[acc_order],
+        "device_id": dev_ids,
+        "out_offsets": out_offsets,
+        "out_targets": dst_sorted.astype(np.int32),
+        "out_amount": _floats(transactions["amount"])[out_order],
+        "out_timestamp": _epoch_seconds(transactions["timestamp"])[out_order],
+        "out_step": step_arr[out_order],
+        "out_flagged": _truthy(transactions["is_flagged"])[out_order],
+        "out_tx_ref": np.array(transactions["tx_ref"], dtype="S")[out_order],
+        "in_offsets": in_offsets,
+        "in_edges": in_order.astype(np.int64),
+        "ad_offsets": ad_offsets,
+        "ad_targets": link_dev[ad_order].astype(np.int32),
+        "da_offsets": da_offsets,
+        "da_targets": link_acc[da_order].astype(np.int32),
+    }
+
+
+def write_snapshot(path, arrays: Dict[str, np.ndarray], source: str = "") -> Path:
+    """Write a new version directory and atomically repoint the ``path`` symlink at it.
+
+    The version the link pointed at before stays on disk for readers that resolved it
+    just before the swap; anything older is removed.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    version = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    version.mkdir()
+    for name in ARRAYS:
+        np.save(version / f"{name}.npy", arrays[name], allow_pickle=False)
+    meta = {
+        "version": FORMAT_VERSION,
+        "source": source,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "accounts": int(len(arrays["account_number"])),
+        "devices": int(len(arrays["device_id"])),
+        "transactions": int(len(arrays["out_targets"])),
+        "account_device_links": int(len(arrays["ad_targets"])),
+    }
+    with open(version / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    previous = None
+    if path.is_symlink():
+        previous = os.readlink(path)
+    elif path.exists():
+        # Snapshot written before versioned directories: move it aside once so the link can take its place.
+        previous = f".{path.name}.{uuid.uuid4().hex}"
+        os.replace(path, path.with_name(previous))
+    link = path.with_name(f".{path.name}.{uuid.uuid4().hex}.link")
+    os.symlink(version.name, link)
+    os.replace(link, path)
+
+    keep = {version.name, previous}
+    for stale in path.parent.glob(f".{path.name}.*"):
+        if stale.name not in keep:
+            if stale.is_dir() and not stale.is_symlink():
+                shutil.rmtree(stale, ignore_errors=True)
+            else:
+                stale.unlink(missing_ok=True)
+    return path
+
+
+def _read_csv(data_dir: Path, name: str) -> Dict[str, list]:
+    # export_graph_to_csv.py writes accounts.csv; generate_benchmark_graph.py writes graph_accounts.csv.
+    candidates = [data_dir / f"{prefix}{name}.csv{ext}" for prefix in ("", "graph_") for ext in ("", ".gz")]
+    path = next((p for p in candidates if p.exists()), None)
+    if path is None:
+        raise FileNotFoundError(f"no {name}.csv in {data_dir}")
+    columns: Dict[str, list] = {}
+    with (gzip.open(path, "rt", newline="") if path.suffix == ".gz" else path.open(newline="")) as f:
+        reader = csv.reader(f)
+        headers = next(reader)
+        for h in headers:
+            columns[h] = []
+        for row in reader:
+            for h, v in zip(headers, row):
+                columns[h].append(v)
+    return columns
+
+
+def arrays_from_csv(data_dir) -> Dict[str, np.ndarray]:
+    """CSV files from export_graph_to_csv.py (backend/data) or generate_benchmark_graph.py, optionally gzipped."""
+    data_dir = Path(data_dir)
+    return build_arrays(
+        _read_csv(data_dir, "accounts"),
+        _read_csv(data_dir, "devices"),
+        _read_csv(data_dir, "account_device"),
+        _read_csv(data_dir, "transactions"),
+    )
+
+
+def arrays_from_database(conn, chunk_size: int = 50_000) -> Dict[str, np.ndarray]:
+    """Read the graph_* tables with server-side cursors."""
+    from sqlalchemy import text
+
+    tx_columns = ["id", "tx_ref", "from_account_id", "to_account_id", "amount", '"timestamp"', "is_flagged"]
+    has_step = conn.execute(
+        text("SELECT 1 FROM information_schema.columns WHERE table_name = 'graph_transactions' AND column_name = 'global_step'")
+    ).first()
+    if has_step:
+        tx_columns.append("global_step")
+
+    def read(sql: str) -> Dict[str, list]:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(text(sql))
+        keys = list(result.keys())
+        columns: Dict[str, list] = {k: [] for k in keys}
+        for chunk in result.partitions():
+            for row in chunk:
+                for k, v in zip(keys, row):
+                    columns[k].append(v)
+        return columns
+
+    return build_arrays(
+        read("SELECT id, account_number, risk_score, is_fraud FROM graph_accounts"),
+        read("SELECT id, device_id FROM graph_devices"),
+        read("SELECT account_id, device_id FROM graph_account_device"),
+        read(f"SELECT {', '.join(tx_columns)} FROM graph_transactions"),
+    )
+
+
+class GraphSnapshot:
+    """Read-only view over a snapshot directory; arrays are memory-mapped by default."""
+
+    def __init__(self, path, mmap: bool = True):
+        # Resolve the link once: meta.json and every array then come from the same version.
+        self.path = Path(path).resolve()
+        with open(self.path / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported snapshot version {self.meta.get('version')}")
+        mode = "r" if mmap else None
+        for name in ARRAYS:
+            setattr(self, name, np.load(self.path / f"{name}.npy", mmap_mode=mode, allow_pickle=False))
+
+    @property
+    def n_accounts(self) -> int:
+        return len(self.account_number)
+
+    def account_index(self, account_number: str) -> Optional[int]:
+        key = account_number.encode("utf-8")
+        pos = int(np.searchsorted(self.account_number, key))
+        if pos < self.n_accounts and self.account_number[pos] == key:
+            return pos
+        return None
+
+    def account_key(self, index: int) -> str:
+        return self.account_number[index].decode("utf-8")
+
+    def out_edges(self, index: int) -> slice:
+        return slice(int(self.out_offsets[index]), int(self.out_offsets[index + 1]))
+
+    def received_edges(self, index: int) -> np.ndarray:
+        """Positions (into the out_* arrays) of edges received by account `index`."""
+        return self.in_edges[int(self.in_offsets[index]) : int(self.in_offsets[index + 1])]
+
+    def in_sources(self, index: int) -> np.ndarray:
+        """Sender account index of each edge received by account `index`."""
+        edges = self.received_edges(index)
+        return np.searchsorted(self.out_offsets, edges, side="right") - 1
+
+    def devices_of(self, index: int) -> np.ndarray:
+        return self.ad_targets[int(self.ad_offsets[index]) : int(self.ad_offsets[index + 1])]
+
+    def accounts_on_device(self, device_index: int) -> np.ndarray:
+        return self.da_targets[int(self.da_offsets[device_index]) : int(self.da_offsets[device_index + 1])]
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.out_offsets)
+
+    def in_degree(self) -> np.ndarray:
+        return np.diff(self.in_offsets)
+
+    def edge_sources(self) -> np.ndarray:
+        """Sender index per edge (materialised; len = transactions)."""
+        return np.repeat(np.arange(self.n_accounts, dtype=np.int32), self.out_degree())
@@ -0,0 +1,64 @@
+"""
+Conditional GET helpers: ETags derived from cheap version queries, so a repeat
+request whose data has not changed gets a 304 before the expensive query and
+JSON serialization run.
+"""
+
+import hashlib
+import os
+import time
+from typing import Callable, Optional
+
+from flask import Response, make_response, request
+
+from backend.services.neo4j_client import fetch_single
+
+# Browsers may store the response but must revalidate it on every use.
+CACHE_CONTROL = "private, no-cache"
+
+# Neo4j loaders (export_to_neo4j.py, detect_communities.py) bump this node when they
+# change the graph. Databases loaded by other means have no GraphMeta node; their
+# graph ETags then roll over every GRAPH_ETAG_TTL seconds instead.
+GRAPH_VERSION_CYPHER = "MATCH (m:GraphMeta {id: 'graph'}) RETURN m.version AS version"
+BUMP_GRAPH_VERSION_CYPHER = """
+    MERGE (m:GraphMeta {id: 'graph'})
+    SET m.version = coalesce(m.version, 0) + 1, m.updatedAt = datetime()
+    RETURN m.version AS version
+    """
+GRAPH_ETAG_TTL = int(os.getenv("GRAPH_ETAG_TTL", "300"))
+
+
+def make_etag(*parts) -> str:
+    return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:24]
+
+
+def graph_version(session) -> str:
+    return graph_version_from_record(session.execute_read(fetch_single, GRAPH_VERSION_CYPHER))
+
+
+def graph_version_from_record(record) -> str:
+    if record and record["version"] is not None:
+        return f"v{record['version']}"
+    return f"t{int(time.time() // max(GRAPH_ETAG_TTL, 1))}"
+
+
+def bump_graph_version(session) -> Optional[int]:
+    record = session.execute_write(fetch_single, BUMP_GRAPH_VERSION_CYPHER)
+    return record["version"] if record else None
+
+
+def conditional(etag: str, build: Callable[[], object]) -> Response:
+    """
+    304 if the request's If-None-Match already has `etag`; otherwise build() the
+    response and tag it. Error responses are returned untagged.
+    """
+    # Weak comparison: compressed responses carry the weak form of the same tag.
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
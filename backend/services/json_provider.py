@@ -0,0 +1,87 @@
+"""
+Flask JSON provider backed by orjson (falls back to the stdlib encoder).
+
+Neo4j values (temporal, spatial, nodes/relationships) are converted in the same
+pass as everything else, so routes can return raw driver properties. Stdlib
+types keep Flask's default formatting (datetimes as HTTP dates, Decimal/UUID as
+strings). JSON_SERIALIZER=stdlib forces the stdlib encoder.
+"""
+
+import dataclasses
+import decimal
+import json
+import os
+import uuid
+from datetime import date
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+from neo4j.graph import Node, Path, Relationship
+from neo4j.spatial import Point
+from neo4j.time import Date, DateTime, Duration, Time
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+SERIALIZER = "orjson" if orjson is not None and os.getenv("JSON_SERIALIZER", "orjson") == "orjson" else "stdlib"
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+
+
+def json_default(o: Any) -> Any:
+    if isinstance(o, (DateTime, Date, Time, Duration)):
+        return o.iso_format()
+    if isinstance(o, Point):
+        point = {"srid": o.srid, "x": o[0], "y": o[1]}
+        if len(o) > 2:
+            point["z"] = o[2]
+        return point
+    if isinstance(o, (Node, Relationship)):
+        return dict(o)
+    if isinstance(o, Path):
+        return [dict(n) for n in o.nodes]
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "tolist"):  # numpy arrays and scalars
+        return o.tolist()
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    if SERIALIZER == "orjson":
+        try:
+            return orjson.dumps(obj, default=json_default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib encoder handles those
+    return json.dumps(obj, default=json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Compact, unsorted output; jsonify() responses are encoded straight to bytes."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            kwargs.setdefault("default", json_default)
+            return json.dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if SERIALIZER == "orjson" and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import requests
+
+from backend.services.graph_cache import TTLCache
+
+
+SYSTEM_PROMPT = "You are a fraud analyst. Be concise."
+
+
+def build_prompt(rule_key: str, anchor: str, graph: Dict[str, Any]) -> str:
+    capped = [part for part, hit in (graph.get("truncated") or {}).items() if hit]
+    return (
+        f"Assess this fraud case. Rule={rule_key}, Anchor={anchor}. "
+        f"Nodes: {len(graph['nodes'])}, Edges: {len(graph['edges'])}. "
+        + (f"Only the most recent entries are shown for: {', '.join(capped)}. " if capped else "")
+        + "Flagged nodes may indicate known fraud. Provide a concise risk assessment and next action."
+    )
+
+
+class OpenAIBackend:
+    """Chat-completions backend. Returns (text, cacheable); errors are not cacheable."""
+
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str], model: str = "gpt-4o", timeout: float = 15):
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.calls = 0
+
+    def complete(self, prompt: str) -> Tuple[str, bool]:
+        if not self.api_key:
+            return "OpenAI key not configured; no assessment generated.", False
+        self.calls += 1
+        try:
+            resp = requests.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                },
+                json={
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt},
+                    ],
+                    "max_tokens": 180,
+                },
+                timeout=self.timeout,
+            )
+            print(f"[AI-ASSESS] status={resp.status_code} body={resp.text[:500]}")
+            if resp.ok:
+                data = resp.json()
+                return data["choices"][0]["message"]["content"], True
+            return f"OpenAI error: {resp.text}", False
+        except Exception as exc:
+            return f"OpenAI call failed: {exc}", False
+
+
+class StubBackend:
+    """Deterministic local backend for tests and offline demos; never leaves the process."""
+
+    name = "stub"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def complete(self, prompt: str) -> Tuple[str, bool]:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return f"[stub assessment] {prompt}", True
+
+
+def backend_from_env():
+    kind = (os.getenv("AI_ASSESS_BACKEND") or "openai").lower()
+    if kind == "stub":
+        return StubBackend()
+    return OpenAIBackend(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        model=os.getenv("OPENAI_MODEL", "gpt-4o"),
+        timeout=float(os.getenv("OPENAI_TIMEOUT", "15")),
+    )
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key: one caller computes, the rest wait for its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+        try:
+            call.value = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.value, False
+
+
+class AssessmentService:
+    """
+    LLM assessments cached by (rule, anchor, graph fingerprint) with a TTL.
+    A changed neighborhood changes the fingerprint, so stale assessments are never
+    served for a graph that has moved on. Concurrent identical requests share one call.
+    """
+
+    def __init__(self, backend, ttl_seconds: float = 3600, max_entries: int = 2048):
+        self.backend = backend
+        self._cache = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def assess(self, rule_key: str, anchor: str, graph: Dict[str, Any], fingerprint: str) -> Tuple[str, bool]:
+        """Return (assessment, cached)."""
+        key = (rule_key, anchor, fingerprint)
+
+        def compute():
+            # Checked inside the flight so a caller queued behind a leader sees its result.
+            hit = self._cache.get(key)
+            if hit is not None:
+                return hit, True
+            result, cacheable = self.backend.complete(build_prompt(rule_key, anchor, graph))
+            if cacheable:
+                self._cache.set(key, result)
+            return result, False
+
+        (text, cached), shared = self._flight.do(key, compute)
+        with self._lock:
+            if cached or shared:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return text, cached or shared
+
+    def stats(self) -> Dict[str, Any]:
+        cache_stats = self._cache.stats()
+        with self._lock:
+            return {
+                "backend": self.backend.name,
+                "entries": cache_stats["entries"],
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self._flight.coalesced,
+                "backend_calls": self.backend.calls,
+                "ttl_seconds": cache_stats["ttl_seconds"],
+            }
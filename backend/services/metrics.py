@@ -0,0 +1,154 @@
+import bisect
+import contextvars
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Per-request query counters. Work handed to a thread pool only counts towards the
+# request when submitted under a copy of the request context (see submit_in_context).
+_counters: contextvars.ContextVar[Optional["QueryCounter"]] = contextvars.ContextVar("query_counters", default=None)
+
+
+class QueryCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sql = 0
+        self.neo4j = 0
+
+    def add(self, kind: str):
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+
+
+def start_request() -> QueryCounter:
+    counter = QueryCounter()
+    _counters.set(counter)
+    return counter
+
+
+def end_request():
+    _counters.set(None)
+
+
+def count_query(kind: str):
+    """Record one SQL statement (kind="sql") or Cypher query (kind="neo4j") for the current request."""
+    counter = _counters.get()
+    if counter is not None:
+        counter.add(kind)
+
+
+def submit_in_context(pool, fn, *args):
+    """pool.submit that keeps the caller's request counters (one context copy per task)."""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def install_sqlalchemy(engine):
+    """Count every statement the engine sends to the database, ORM or Core."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        count_query("sql")
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) keyed by a label tuple."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # bucket counts..., +Inf count, sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict[str, object]]:
+        with self._lock:
+            out = {}
+            for labels, series in self._series.items():
+                cumulative, running = [], 0
+                for count in series[:-1]:
+                    running += count
+                    cumulative.append(running)
+                out[labels] = {"buckets": list(zip(self.buckets + (float("inf"),), cumulative)), "count": running, "sum": series[-1]}
+            return out
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request metrics: latency, SQL and Neo4j queries per request, and
+    response bytes, rendered in the Prometheus text format. Values are per process;
+    under gunicorn each worker reports its own series.
+    """
+
+    LABELS = ("method", "endpoint")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.sql_queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.neo4j_queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+
+    def observe(self, method: str, endpoint: str, status: int, seconds: float, sql: int, neo4j: int, size: int):
+        labels = (method, endpoint)
+        self.latency.observe(labels, seconds)
+        self.sql_queries.observe(labels, sql)
+        self.neo4j_queries.observe(labels, neo4j)
+        self.response_bytes.observe(labels, size)
+        with self._lock:
+            key = (method, endpoint, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_total Requests handled, by endpoint and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        with self._lock:
+            requests_total = dict(self._requests)
+        for (method, endpoint, status), count in sorted(requests_total.items()):
+            lines.append(f"http_requests_total{_labels(self.LABELS + ('status',), (method, endpoint, status))} {count}")
+
+        for name, help_text, hist in (
+            ("http_request_duration_seconds", "Request latency in seconds.", self.latency),
+            ("http_request_sql_queries", "SQL statements executed per request.", self.sql_queries),
+            ("http_request_neo4j_queries", "Neo4j queries executed per request.", self.neo4j_queries),
+            ("http_response_size_bytes", "Response body size in bytes.", self.response_bytes),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, data in sorted(hist.snapshot().items()):
+                for bound, count in data["buckets"]:
+                    le = f'le="{_fmt(bound)}"'
+                    lines.append(f"{name}_bucket{_labels(self.LABELS, labels, le)} {count}")
+                lines.append(f"{name}_sum{_labels(self.LABELS, labels)} {_fmt(data['sum'])}")
+                lines.append(f"{name}_count{_labels(self.LABELS, labels)} {data['count']}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,212 @@
+"""
+Account / identifier neighborhoods as {"nodes", "edges", "truncated"} graphs.
+
+Shared by the graph view routes (routes/neo4j.py) and the AI assessment in
+app.py. The Cypher (services/rule_queries.py) returns map projections with only
+the properties rendered here, so no full nodes cross the wire.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func
+
+from backend.db.session import get_session
+from backend.models.investigator_action import InvestigatorAction
+from backend.services.neo4j_client import fetch_single
+from backend.services.rule_queries import (
+    ACCOUNT_GRAPH_CYPHER,
+    DEVICE_GRAPH_CYPHER,
+    IDENTIFIER_GRAPH_CYPHER,
+    neighborhood_params,
+)
+
+
+def is_flagged(node: Dict[str, Any]) -> bool:
+    if node.get("mule") or node.get("fraud_group") is not None or node.get("flagged"):
+        return True
+    val = node.get("is_fraud")
+    if isinstance(val, str):
+        val = val.lower() in {"true", "1", "yes"}
+    return bool(val)
+
+
+def edge_label(tx: Dict[str, Any]) -> str:
+    parts = []
+    if tx.get("amount") is not None:
+        parts.append(f"{tx['amount']}")
+    if tx.get("tags"):
+        parts.append(str(tx["tags"]))
+    return " / ".join(parts)
+
+
+class GraphBuilder:
+    """Collects projected rows into nodes keyed by id and edges without duplicates."""
+
+    def __init__(self):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.edges = []
+        self._edge_keys = set()
+
+    def _add(self, key, node) -> Optional[str]:
+        if not key:
+            return None
+        if key not in self.nodes:
+            self.nodes[key] = node
+        return key
+
+    def account(self, acc: Optional[Dict[str, Any]], subject: bool = False) -> Optional[str]:
+        acc = acc or {}
+        key = acc.get("key")
+        label = acc.get("name") or key
+        node = {"id": key, "label": label, "type": "Account", "customerName": label, "isFlagged": is_flagged(acc)}
+        if subject:
+            node["isSubject"] = True
+        return self._add(key, node)
+
+    def identifier(self, ident: Optional[Dict[str, Any]], subject: bool = False) -> Optional[str]:
+        ident = ident or {}
+        key = ident.get("key")
+        node = {"id": key, "label": key, "type": "Device", "deviceType": ident.get("kind") or "Device", "isFlagged": is_flagged(ident)}
+        if subject:
+            node["isSubject"] = True
+        return self._add(key, node)
+
+    def transaction(self, tx: Optional[Dict[str, Any]]) -> Optional[str]:
+        tx = tx or {}
+        key = tx.get("key")
+        return self._add(key, {"id": key, "label": key, "type": "Transaction", "amount": tx.get("amount"), "tags": tx.get("tags")})
+
+    def edge(self, source: str, target: str, etype: str, label: Optional[str] = None):
+        key = (source, target, etype)
+        if key in self._edge_keys:
+            return
+        self._edge_keys.add(key)
+        edge = {"source": source, "target": target, "type": etype}
+        if label is not None:
+            edge["label"] = label
+        self.edges.append(edge)
+
+    def transfer(self, account: Optional[str], item: Dict[str, Any], outbound: bool):
+        """account -PERFORMS-> tx -TO-> other (or the reverse for inbound)."""
+        tx = item.get("tx") or {}
+        tx_key = self.transaction(tx)
+        other = self.account(item.get("other"))
+        if not account or not tx_key or not other:
+            return
+        src, dst = (account, other) if outbound else (other, account)
+        self.edge(src, tx_key, "PERFORMS", edge_label(tx))
+        self.edge(tx_key, dst, "TO")
+
+    def graph(self, truncated=None) -> Dict[str, Any]:
+        return {"nodes": list(self.nodes.values()), "edges": self.edges, "truncated": dict(truncated or {})}
+
+
+def account_query(account_id: str, **limits) -> Tuple[str, Dict[str, Any]]:
+    return ACCOUNT_GRAPH_CYPHER, dict(neighborhood_params(**limits), accountId=account_id)
+
+
+def identifier_query(identifier: str, devices: bool = False, **limits) -> Tuple[str, Dict[str, Any]]:
+    cypher = DEVICE_GRAPH_CYPHER if devices else IDENTIFIER_GRAPH_CYPHER
+    return cypher, dict(neighborhood_params(**limits), identifier=identifier)
+
+
+def account_graph_from_record(record) -> Optional[Dict[str, Any]]:
+    if not record:
+        return None
+    g = GraphBuilder()
+    anchor = g.account(record["anchor"], subject=True)
+    for ident in record["identifiers"] or []:
+        key = g.identifier(ident)
+        if key and anchor:
+            g.edge(anchor, key, "HAS_IDENTIFIER")
+    for entry in record["idPeers"] or []:
+        key = g.identifier(entry.get("identifier"))
+        peer = g.account(entry.get("peer"))
+        if key and peer:
+            g.edge(peer, key, "HAS_IDENTIFIER")
+    for item in record["outbound"] or []:
+        g.transfer(anchor, item, outbound=True)
+    for item in record["inbound"] or []:
+        g.transfer(anchor, item, outbound=False)
+    return g.graph(record["truncated"])
+
+
+def identifier_graph_from_record(record) -> Optional[Dict[str, Any]]:
+    if not record:
+        return None
+    g = GraphBuilder()
+    anchor = g.identifier(record["anchor"], subject=True)
+    for acc in record["accounts"] or []:
+        key = g.account(acc)
+        if key and anchor:
+            g.edge(key, anchor, "HAS_IDENTIFIER")
+    for item in record["outbound"] or []:
+        g.transfer(item.get("account"), item, outbound=True)
+    for item in record["inbound"] or []:
+        g.transfer(item.get("account"), item, outbound=False)
+    return g.graph(record["truncated"])
+
+
+def account_graph(session, account_id: str, **limits) -> Optional[Dict[str, Any]]:
+    """Neighborhood of an Account/Mule/Client/Merchant, or None if it does not exist."""
+    cypher, params = account_query(account_id, **limits)
+    return account_graph_from_record(session.execute_read(fetch_single, cypher, params))
+
+
+def identifier_graph(session, identifier: str, devices: bool = False, **limits) -> Optional[Dict[str, Any]]:
+    """
+    Neighborhood of an Email/Phone/SSN identifier (and Device nodes when `devices`):
+    the accounts sharing it and their transactions. None if it does not exist.
+    """
+    cypher, params = identifier_query(identifier, devices, **limits)
+    return identifier_graph_from_record(session.execute_read(fetch_single, cypher, params))
+
+
+def limits_from_args(args, **defaults) -> Dict[str, int]:
+    """Per-direction caps for the graph views; ?txLimit=, ?peerLimit=, ?identifierLimit=, ?accountLimit= override."""
+    limits = dict(defaults)
+    for key in ("tx", "peer", "identifier", "account"):
+        try:
+            value = int(args.get(f"{key}Limit"))
+        except (TypeError, ValueError):
+            continue
+        limits[key] = value
+    return limits
+
+
+def _flagged_ids(session, anchor_ids, anchor_type: str):
+    if not anchor_ids:
+        return set()
+    rows = (
+        session.query(InvestigatorAction.anchor_id)
+        .filter(
+            InvestigatorAction.anchor_id.in_(list(anchor_ids)),
+            InvestigatorAction.anchor_type == anchor_type,
+            InvestigatorAction.action == "FLAG",
+        )
+        .all()
+    )
+    return {r.anchor_id for r in rows}
+
+
+def overlay_flags(graph: Dict[str, Any]) -> Dict[str, Any]:
+    """Mark nodes an investigator flagged in Postgres (investigator_actions)."""
+    session = get_session()
+    try:
+        flagged = _flagged_ids(session, [n["id"] for n in graph["nodes"] if n["type"] == "Account"], "ACCOUNT")
+        flagged |= _flagged_ids(session, [n["id"] for n in graph["nodes"] if n["type"] == "Device"], "DEVICE")
+    finally:
+        session.close()
+    for n in graph["nodes"]:
+        if n["id"] in flagged:
+            n["isFlagged"] = True
+    return graph
+
+
+def flag_version() -> int:
+    # Investigator actions are append-only, so the newest id changes with every flag.
+    session = get_session()
+    try:
+        return session.query(func.max(InvestigatorAction.id)).scalar() or 0
+    finally:
+        session.close()
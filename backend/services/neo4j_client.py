@@ -1,29 +1,226 @@
+import inspect
 import os
+import threading
+import time
 from contextlib import contextmanager
 
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
 
+from backend.services.metrics import count_query
+from backend.services.slow_queries import query_tags, slow_query_log
+
 load_dotenv()
 
+# Every session in the process shares one bookmark manager. A read that follows a
+# write (an investigator flag, a GraphMeta bump) then waits on whichever cluster
+# member serves it until that member has the write. Reads can still go to secondaries.
+bookmarks = GraphDatabase.bookmark_manager()
+
+_shared_driver = None
+_shared_lock = threading.Lock()
+
+
+def _statement(query) -> str:
+    return getattr(query, "text", query)
+
+
+def _run_params(args, kwargs):
+    parameters = args[1] if len(args) > 1 else kwargs.get("parameters")
+    extra = {k: v for k, v in kwargs.items() if k != "parameters"}
+    return dict(parameters or {}, **extra)
+
+
+def _call_params(fn, args, kwargs):
+    """Arguments of a transaction function by parameter name (so they can be redacted by name)."""
+    try:
+        bound = inspect.signature(fn).bind_partial(None, *args, **kwargs).arguments
+        return {k: v for i, (k, v) in enumerate(bound.items()) if i > 0}
+    except (TypeError, ValueError):
+        return {f"arg{i}": v for i, v in enumerate(args)}
+
+
+class _TimedResult:
+    """Result proxy that logs the query once it has been fully consumed, if it was slow."""
+
+    def __init__(self, result, statement, params, started):
+        self._result = result
+        self._statement = statement
+        self._params = params
+        self._started = started
+        self._logged = False
+
+    def _done(self):
+        if not self._logged:
+            self._logged = True
+            slow_query_log.record("neo4j", self._statement, self._params, (time.perf_counter() - self._started) * 1000)
+
+    def __iter__(self):
+        for record in self._result:
+            yield record
+        self._done()
+
+    def consume(self):
+        summary = self._result.consume()
+        self._done()
+        return summary
+
+    def single(self, *args, **kwargs):
+        record = self._result.single(*args, **kwargs)
+        self._done()
+        return record
+
+    def data(self, *args, **kwargs):
+        rows = self._result.data(*args, **kwargs)
+        self._done()
+        return rows
+
+    def values(self, *args, **kwargs):
+        rows = self._result.values(*args, **kwargs)
+        self._done()
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._result, name)
+
+
+def _timed_run(target, args, kwargs):
+    count_query("neo4j")
+    started = time.perf_counter()
+    result = target.run(*args, **kwargs)
+    return _TimedResult(result, _statement(args[0] if args else kwargs.get("query")), _run_params(args, kwargs), started)
+
+
+class _InstrumentedTransaction:
+    def __init__(self, tx):
+        self._tx = tx
+
+    def run(self, *args, **kwargs):
+        return _timed_run(self._tx, args, kwargs)
+
+    def __enter__(self):
+        self._tx.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._tx.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._tx, name)
+
+
+class _InstrumentedSession:
+    def __init__(self, session):
+        self._session = session
+
+    def run(self, *args, **kwargs):
+        return _timed_run(self._session, args, kwargs)
+
+    def _managed(self, method, fn, args, kwargs):
+        name = getattr(fn, "__name__", "transaction")
+
+        def work(tx, *a, **kw):
+            with query_tags(function=name):
+                return fn(_InstrumentedTransaction(tx), *a, **kw)
+
+        started = time.perf_counter()
+        try:
+            return method(work, *args, **kwargs)
+        finally:
+            # The whole transaction function, retries and many small queries included.
+            slow_query_log.record("neo4j_tx", name, _call_params(fn, args, kwargs), (time.perf_counter() - started) * 1000)
+
+    def execute_read(self, fn, *args, **kwargs):
+        return self._managed(self._session.execute_read, fn, args, kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        return self._managed(self._session.execute_write, fn, args, kwargs)
+
+    def begin_transaction(self, *args, **kwargs):
+        return _InstrumentedTransaction(self._session.begin_transaction(*args, **kwargs))
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._session.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+class InstrumentedDriver:
+    """
+    Driver proxy that counts every Cypher query towards the current request's
+    metrics and logs slow queries and transaction functions to slow_query_log.
+    """
+
+    def __init__(self, driver):
+        self._driver = driver
+
+    def session(self, *args, **kwargs):
+        kwargs.setdefault("bookmark_manager", bookmarks)
+        return _InstrumentedSession(self._driver.session(*args, **kwargs))
+
+    def execute_query(self, *args, **kwargs):
+        count_query("neo4j")
+        started = time.perf_counter()
+        try:
+            return self._driver.execute_query(*args, **kwargs)
+        finally:
+            # Driver options end in "_" (database_, routing_, ...); everything else is a parameter.
+            params = dict(args[1] if len(args) > 1 else kwargs.get("parameters_") or {}, **{k: v for k, v in kwargs.items() if not k.endswith("_")})
+            slow_query_log.record("neo4j", _statement(args[0] if args else kwargs.get("query_")), params, (time.perf_counter() - started) * 1000)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._driver.close()
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+def instrument_driver(driver):
+    return InstrumentedDriver(driver) if driver is not None else None
+
+
+def fetch_single(tx, cypher: str, params=None):
+    """Transaction function for execute_read/execute_write: the query's only record, or None."""
+    return tx.run(cypher, **(params or {})).single()
+
+
+def fetch_all(tx, cypher: str, params=None):
+    return list(tx.run(cypher, **(params or {})))
+
+
+def neo4j_settings():
+    return os.getenv("NEO4J_URI"), os.getenv("NEO4J_USER") or os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD")
+
+
+def shared_driver():
+    """The process-wide driver (and connection pool), created on first use."""
+    global _shared_driver
+    with _shared_lock:
+        if _shared_driver is None:
+            uri, user, password = neo4j_settings()
+            if not all([uri, user, password]):
+                raise RuntimeError("NEO4J_URI, NEO4J_USER, and NEO4J_PASSWORD must be set.")
+            _shared_driver = instrument_driver(GraphDatabase.driver(uri, auth=(user, password)))
+        return _shared_driver
+
 
 @contextmanager
 def get_driver():
-    uri = os.getenv("NEO4J_URI")
-    user = os.getenv("NEO4J_USER")
-    password = os.getenv("NEO4J_PASSWORD")
-    if not all([uri, user, password]):
-        raise RuntimeError("NEO4J_URI, NEO4J_USER, and NEO4J_PASSWORD must be set.")
-    driver = GraphDatabase.driver(uri, auth=(user, password))
-    try:
-        yield driver
-    finally:
-        driver.close()
+    # Kept as a context manager for existing callers; the shared driver is not closed per use.
+    yield shared_driver()
 
 
 def check_connectivity():
     with get_driver() as driver:
         driver.verify_connectivity()
         with driver.session() as session:
-            result = session.run("RETURN 1 AS ok").single()
+            result = session.execute_read(fetch_single, "RETURN 1 AS ok")
             return {"ok": result["ok"]}
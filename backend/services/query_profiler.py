@@ -0,0 +1,200 @@
+"""
+PROFILE runs of the registered rule queries (services/rule_queries.py).
+
+Each run records, per query, total db hits, rows, elapsed time and the operator
+tree, and is stored as <QUERY_PROFILE_DIR>/<dataset>/<commit>.json. A run is
+compared with the previous run on the same dataset; regressions are:
+  - a risky operator (AllNodesScan, CartesianProduct, Eager) that was not in the baseline plan
+  - db hits growing by more than the threshold
+  - a query that used to succeed now failing
+"""
+
+import json
+import os
+import re
+import subprocess
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.services.rule_queries import RULE_QUERIES, RuleQuery
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_PROFILE_DIR = PROJECT_ROOT / "backend" / "data" / "query_profiles"
+
+RISKY_OPERATORS = ("AllNodesScan", "CartesianProduct", "Eager")
+DB_HITS_THRESHOLD = 0.5
+# Growth below this many db hits is noise, whatever the ratio.
+DB_HITS_MIN_DELTA = 1000
+
+
+def current_commit() -> str:
+    commit = os.getenv("GIT_COMMIT")
+    if commit:
+        return commit[:12]
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _operator_name(op: Dict[str, Any]) -> str:
+    # Neo4j 5 reports e.g. "AllNodesScan@neo4j"
+    return str(op.get("operatorType", "?")).split("@", 1)[0]
+
+
+def plan_tree(profile: Dict[str, Any]) -> Dict[str, Any]:
+    args = profile.get("args") or {}
+    return {
+        "operator": _operator_name(profile),
+        "details": args.get("Details"),
+        "rows": profile.get("rows", args.get("Rows", 0)),
+        "dbHits": profile.get("dbHits", args.get("DbHits", 0)),
+        "children": [plan_tree(child) for child in profile.get("children") or []],
+    }
+
+
+def _walk(tree: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    yield tree
+    for child in tree["children"]:
+        yield from _walk(child)
+
+
+def summarize_plan(tree: Dict[str, Any]) -> Dict[str, Any]:
+    ops = Counter(node["operator"] for node in _walk(tree))
+    return {
+        "dbHits": sum(node["dbHits"] or 0 for node in _walk(tree)),
+        "rows": tree["rows"],
+        "operators": dict(sorted(ops.items())),
+        "riskyOperators": sorted(op for op in ops if op in RISKY_OPERATORS),
+    }
+
+
+def profile_query(session, query: RuleQuery, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    overrides = dict(overrides or {})
+    if query.sample_query and query.sample_param and overrides.get(query.sample_param) is None:
+        record = session.run(query.sample_query).single()
+        overrides[query.sample_param] = record["value"] if record else None
+    cypher, params = query.cypher(overrides)
+    started = time.perf_counter()
+    summary = session.run("PROFILE " + cypher, **params).consume()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    tree = plan_tree(summary.profile or {})
+    return dict(summarize_plan(tree), params=params, timeMs=round(elapsed_ms, 1), plan=tree)
+
+
+def profile_rules(driver, names: Optional[List[str]] = None, overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    names = names or list(RULE_QUERIES)
+    results = {}
+    for name in names:
+        query = RULE_QUERIES.get(name)
+        if query is None:
+            results[name] = {"error": f"unknown query {name}"}
+            continue
+        try:
+            with driver.session() as session:
+                results[name] = profile_query(session, query, (overrides or {}).get(name))
+        except Exception as exc:
+            results[name] = {"error": str(exc)}
+    return results
+
+
+def compare_profiles(baseline: Optional[Dict[str, Any]], current: Dict[str, Any], threshold: float = DB_HITS_THRESHOLD) -> List[Dict[str, Any]]:
+    """Regressions of `current` against `baseline` (or risky operators, when there is no baseline)."""
+    found = []
+    old_queries = (baseline or {}).get("queries", {})
+    for name, entry in current.get("queries", {}).items():
+        old = old_queries.get(name)
+        if "error" in entry:
+            if old and "error" not in old:
+                found.append({"query": name, "kind": "error", "detail": entry["error"]})
+            continue
+        if old is None or "error" in old:
+            for op in entry["riskyOperators"]:
+                found.append({"query": name, "kind": "risky_operator", "detail": f"{op} in plan"})
+            continue
+        for op in sorted(set(entry["riskyOperators"]) - set(old["riskyOperators"])):
+            found.append({"query": name, "kind": "new_operator", "detail": f"{op} appeared (not in {baseline.get('commit')})"})
+        before, after = old["dbHits"], entry["dbHits"]
+        if after - before > DB_HITS_MIN_DELTA and (before == 0 or (after - before) / before > threshold):
+            found.append({"query": name, "kind": "db_hits", "detail": f"db hits {before} -> {after}", "before": before, "after": after})
+    return found
+
+
+class ProfileStore:
+    def __init__(self, root=None):
+        self.root = Path(root or os.getenv("QUERY_PROFILE_DIR") or DEFAULT_PROFILE_DIR)
+
+    @staticmethod
+    def _safe(part: str) -> str:
+        part = re.sub(r"[^A-Za-z0-9_.-]", "_", part)
+        # "." and ".." would resolve to the store root or its parent.
+        return "_" if re.fullmatch(r"\.*", part) else part
+
+    def path_for(self, dataset: str, commit: str) -> Path:
+        return self.root / self._safe(dataset) / f"{self._safe(commit)}.json"
+
+    def save(self, report: Dict[str, Any]) -> Path:
+        path = self.path_for(report["dataset"], report["commit"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+        os.replace(tmp, path)
+        return path
+
+    def load(self, dataset: str, commit: str) -> Optional[Dict[str, Any]]:
+        path = self.path_for(dataset, commit)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def runs(self, dataset: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Stored runs, newest first, without the per-query plans."""
+        dirs = [self.root / self._safe(dataset)] if dataset else [p for p in self.root.glob("*") if p.is_dir()]
+        out = []
+        for d in dirs:
+            for path in d.glob("*.json"):
+                with open(path, "r", encoding="utf-8") as f:
+                    report = json.load(f)
+                out.append(
+                    {
+                        "dataset": report.get("dataset"),
+                        "commit": report.get("commit"),
+                        "created_at": report.get("created_at"),
+                        "baseline": report.get("baseline"),
+                        "regressions": len(report.get("regressions", [])),
+                    }
+                )
+        return sorted(out, key=lambda r: r["created_at"] or "", reverse=True)
+
+    def latest(self, dataset: str, exclude_commit: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        for run in self.runs(dataset):
+            if run["commit"] != exclude_commit:
+                return self.load(dataset, run["commit"])
+        return None
+
+
+def run_profile(
+    driver,
+    dataset: str,
+    store: ProfileStore,
+    names: Optional[List[str]] = None,
+    commit: Optional[str] = None,
+    baseline_commit: Optional[str] = None,
+    threshold: float = DB_HITS_THRESHOLD,
+) -> Dict[str, Any]:
+    commit = commit or current_commit()
+    baseline = store.load(dataset, baseline_commit) if baseline_commit else store.latest(dataset, exclude_commit=commit)
+    report = {
+        "dataset": dataset,
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "baseline": baseline.get("commit") if baseline else None,
+        "queries": profile_rules(driver, names),
+    }
+    report["regressions"] = compare_profiles(baseline, report, threshold)
+    store.save(report)
+    return report
@@ -0,0 +1,222 @@
+import math
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from html import escape
+from typing import Any, Dict, List
+
+from backend.services.graph_cache import RenderCache, graph_fingerprint
+
+HANDLE_RE = re.compile(r"^[0-9a-f]{64}\.(png|svg)$")
+
+
+class RenderQueueFull(RuntimeError):
+    """Raised when the render queue is at capacity; callers should retry later."""
+
+
+def _node_style(n: Dict[str, Any]):
+    color = "#6ba7ff" if n.get("type") == "Account" else "#6adedc" if n.get("type") == "Device" else "#ffd166"
+    if n.get("isFlagged"):
+        color = "#e63946"
+    if n.get("isSubject"):
+        color = "#ff8c42"
+    shape = "ellipse"
+    if n.get("type") == "Device":
+        shape = "diamond"
+    if n.get("type") == "Transaction":
+        shape = "box"
+    return color, shape
+
+
+def graph_to_dot(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> str:
+    dot_lines = ["digraph G {", 'rankdir="LR";', 'node [style=filled,fontname="Arial"];']
+    for n in nodes:
+        color, shape = _node_style(n)
+        label = n.get("label") or n.get("id")
+        dot_lines.append(f'"{n["id"]}" [label="{label}", color="#0c1a36", fillcolor="{color}", shape="{shape}"];')
+    for e in edges:
+        lbl = e.get("type") or ""
+        dot_lines.append(f'"{e["source"]}" -> "{e["target"]}" [label="{lbl}", color="#a5b4d0"];')
+    dot_lines.append("}")
+    return "\n".join(dot_lines)
+
+
+def graph_to_svg(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> str:
+    """
+    Pure-Python SVG for small graphs: subject in the centre, everything else on a
+    circle around it. No layout engine, no subprocess.
+    """
+    size = 640
+    cx = cy = size / 2
+    radius = size / 2 - 70
+    positions = {}
+    ring = [n for n in nodes if not n.get("isSubject")]
+    for n in nodes:
+        if n.get("isSubject"):
+            positions[n["id"]] = (cx, cy)
+    for i, n in enumerate(ring):
+        angle = 2 * math.pi * i / max(len(ring), 1)
+        positions[n["id"]] = (cx + radius * math.cos(angle), cy + radius * math.sin(angle))
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="0 0 {size} {size}" font-family="Arial" font-size="10">',
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="22" refY="5" markerWidth="6" markerHeight="6" orient="auto">'
+        '<path d="M0,0 L10,5 L0,10 z" fill="#a5b4d0"/></marker></defs>',
+        '<rect width="100%" height="100%" fill="#ffffff"/>',
+    ]
+    for e in edges:
+        src, dst = positions.get(e["source"]), positions.get(e["target"])
+        if not src or not dst:
+            continue
+        parts.append(
+            f'<line x1="{src[0]:.1f}" y1="{src[1]:.1f}" x2="{dst[0]:.1f}" y2="{dst[1]:.1f}" stroke="#a5b4d0" marker-end="url(#arrow)"/>'
+        )
+    for n in nodes:
+        x, y = positions[n["id"]]
+        color, shape = _node_style(n)
+        if shape == "diamond":
+            parts.append(f'<polygon points="{x:.1f},{y - 16:.1f} {x + 16:.1f},{y:.1f} {x:.1f},{y + 16:.1f} {x - 16:.1f},{y:.1f}" fill="{color}" stroke="#0c1a36"/>')
+        elif shape == "box":
+            parts.append(f'<rect x="{x - 18:.1f}" y="{y - 10:.1f}" width="36" height="20" fill="{color}" stroke="#0c1a36"/>')
+        else:
+            parts.append(f'<ellipse cx="{x:.1f}" cy="{y:.1f}" rx="18" ry="12" fill="{color}" stroke="#0c1a36"/>')
+        label = escape(str(n.get("label") or n.get("id"))[:32])
+        parts.append(f'<text x="{x:.1f}" y="{y + 26:.1f}" text-anchor="middle">{label}</text>')
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+class RenderService:
+    """
+    Graph rendering off the request thread.
+
+    - Graphviz renders run on a bounded pool (max_workers concurrent `dot` processes).
+    - At most max_pending renders may be queued or running; beyond that submit()
+      raises RenderQueueFull instead of piling up work.
+    - Each render is killed after `timeout` seconds.
+    - Small graphs can be rendered to SVG in-process, skipping the pool entirely.
+    - Queued and failed renders leave "<handle>.pending" / "<handle>.failed" files in
+      the render cache, evicted with the images.
+
+    Handles are content addresses ("<fingerprint>.<ext>"), so any worker sharing the
+    render cache directory can tell whether an image is ready, still rendering or
+    failed. A handle none of them knows about (never submitted, or its files were
+    evicted) is "unknown"; submitting the graph again renders it anew.
+    """
+
+    def __init__(self, cache: RenderCache, max_workers: int = 2, max_pending: int = 16, timeout: float = 20, svg_max_nodes: int = 40):
+        self.cache = cache
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.svg_max_nodes = svg_max_nodes
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graph-render")
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.rejected = 0
+        self.failures = 0
+        self.completed = 0
+
+    def _resolve_format(self, fmt: str, nodes) -> str:
+        fmt = (fmt or "png").lower()
+        if fmt == "auto":
+            return "svg" if len(nodes) <= self.svg_max_nodes else "png"
+        return fmt if fmt in {"png", "svg"} else "png"
+
+    def _run_dot(self, handle: str, fingerprint: str, dot_src: str) -> str:
+        try:
+            proc = subprocess.run(
+                ["dot", "-Tpng"],
+                input=dot_src.encode("utf-8"),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=True,
+                timeout=self.timeout,
+            )
+            path = self.cache.put(fingerprint, proc.stdout, "png")
+            with self._lock:
+                self.completed += 1
+            return path
+        except Exception as exc:
+            print(f"dot render failed: {exc}")
+            self.cache.put(fingerprint, str(exc).encode("utf-8"), "png.failed")
+            with self._lock:
+                self.failures += 1
+            raise
+        finally:
+            self.cache.discard(fingerprint, "png.pending")
+            with self._lock:
+                self._inflight.pop(handle, None)
+
+    def submit(self, nodes, edges, fmt: str = "png") -> str:
+        """Queue a render (or return the cached one) and return its handle."""
+        fmt = self._resolve_format(fmt, nodes)
+        fingerprint = graph_fingerprint(nodes, edges)
+        handle = f"{fingerprint}.{fmt}"
+        if self.cache.get(fingerprint, fmt):
+            return handle
+        if fmt == "svg":
+            self.cache.put(fingerprint, graph_to_svg(nodes, edges).encode("utf-8"), "svg")
+            return handle
+        with self._lock:
+            if handle in self._inflight:
+                return handle
+            if len(self._inflight) >= self.max_pending:
+                self.rejected += 1
+                raise RenderQueueFull(f"render queue full ({self.max_pending} pending)")
+            self.cache.discard(fingerprint, f"{fmt}.failed")
+            self.cache.put(fingerprint, b"", f"{fmt}.pending")
+            # Submitted under the lock: _run_dot's cleanup needs the lock too, so the
+            # entry is always registered before it can be removed.
+            self._inflight[handle] = self._pool.submit(self._run_dot, handle, fingerprint, graph_to_dot(nodes, edges))
+        return handle
+
+    def status(self, handle: str) -> Dict[str, Any]:
+        if not HANDLE_RE.match(handle or ""):
+            return {"handle": handle, "status": "invalid"}
+        fingerprint, _, fmt = handle.partition(".")
+        path = self.cache.get(fingerprint, fmt or "png")
+        if path:
+            return {"handle": handle, "status": "ready", "path": path, "format": fmt}
+        with self._lock:
+            if handle in self._inflight:
+                return {"handle": handle, "status": "pending", "format": fmt}
+        failed = self.cache.read_marker(fingerprint, f"{fmt}.failed")
+        if failed:
+            return {"handle": handle, "status": "failed", "error": failed[1], "format": fmt}
+        # Queued by another worker; a marker older than the longest possible queue
+        # wait was left behind by a worker that died.
+        pending = self.cache.read_marker(fingerprint, f"{fmt}.pending")
+        if pending and time.time() - pending[0] < self.timeout * (self.max_pending + 1):
+            return {"handle": handle, "status": "pending", "format": fmt}
+        return {"handle": handle, "status": "unknown", "format": fmt}
+
+    def wait(self, handle: str, timeout: float) -> Dict[str, Any]:
+        with self._lock:
+            future = self._inflight.get(handle)
+        if future is not None and timeout > 0:
+            try:
+                future.result(timeout=timeout)
+            except (FutureTimeout, Exception):
+                pass
+        return self.status(handle)
+
+    def render(self, nodes, edges, fmt: str = "png", wait: float = 0) -> Dict[str, Any]:
+        """Submit and wait up to `wait` seconds; returns the handle status (ready/pending/failed/rejected)."""
+        try:
+            handle = self.submit(nodes, edges, fmt)
+        except RenderQueueFull as exc:
+            return {"handle": None, "status": "rejected", "error": str(exc)}
+        return self.wait(handle, wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._inflight),
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "failed": self.failures,
+                "rejected": self.rejected,
+                "timeout_seconds": self.timeout,
+            }
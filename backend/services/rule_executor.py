@@ -15,7 +15,7 @@ from backend.models.alert import STATUS_VALUES
 from backend.services.faf_engine import evaluate_account
 from backend.services.feature_builder import build_features_for_account
 from backend.afasa.services import evaluate_and_tag_alert
-from backend.services.neo4j_client import get_driver
+from backend.services.neo4j_client import fetch_all, get_driver
 
 
 def _get_or_create_account(session, account_number: str, customer_name: str):
@@ -71,7 +71,7 @@ def _neo4j_mule_detections(limit: int = 20):
     """
     with get_driver() as driver:
         with driver.session() as session:
-            result = session.run(cypher, limit=limit)
+            result = session.execute_read(fetch_all, cypher, {"limit": limit})
             detections = []
             for record in result:
                 data = record.data()
@@ -106,11 +106,7 @@ def _neo4j_identity_detections(limit: int = 10, min_risky: int = 2):
     """
     with get_driver() as driver:
         with driver.session() as session:
-            result = session.run(
-                cypher,
-                minRiskyAccounts=min_risky,
-                limit=limit,
-            )
+            result = session.execute_read(fetch_all, cypher, {"minRiskyAccounts": min_risky, "limit": limit})
             detections = []
             for record in result:
                 anchor = record["anchor"] or {}
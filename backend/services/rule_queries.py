@@ -0,0 +1,345 @@
+"""
+Cypher behind the Neo4j rule fetchers and graph views.
+
+The fetchers and the query profiler (services/query_profiler.py) both read from
+here, so a profile always reflects the text the API actually runs. RULE_QUERIES
+registers each query with the parameters its route uses by default.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+R1_CYPHER = """
+    MATCH (a:Mule)
+    RETURN
+      a.id   AS accountId,
+      a.name AS customerName,
+      1.0    AS riskScore,
+      true   AS isFraud
+    ORDER BY accountId
+    LIMIT $limit
+    """
+
+R2_CYPHER = """
+    MATCH (id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(risky:Mule)
+    WITH id, collect(DISTINCT risky) AS riskyAccounts, count(DISTINCT risky) AS riskyCount
+    MATCH (id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(acc)
+    WITH id, riskyCount, collect(DISTINCT acc) AS allAccounts
+    WHERE riskyCount >= $minRiskyAccounts
+    RETURN
+      CASE
+        WHEN id.email IS NOT NULL THEN id.email
+        WHEN id.phoneNumber IS NOT NULL THEN id.phoneNumber
+        ELSE id.ssn
+      END AS deviceId,
+      head(labels(id)) AS deviceType,
+      size(allAccounts) AS totalAccounts,
+      riskyCount AS riskyAccounts
+    ORDER BY riskyAccounts DESC, totalAccounts DESC
+    LIMIT $limit
+    """
+
+# Communities written before communityMules existed fall back to the live count.
+R3_HAS_COMMUNITIES_CYPHER = "MATCH (m:Mule) WHERE m.communityMules IS NOT NULL RETURN m LIMIT 1"
+
+# ringSize counts the other Mules in the community, like the distinct Mule peers of R3_LIVE_CYPHER.
+R3_COMMUNITY_CYPHER = """
+    MATCH (m:Mule)
+    WHERE m.communityMules >= $minRisky + 1
+    RETURN
+      m.id   AS accountId,
+      m.name AS customerName,
+      1.0    AS riskScore,
+      true   AS isFraud,
+      m.communityId   AS communityId,
+      m.communitySize AS communitySize,
+      m.communityMules - 1 AS ringSize
+    ORDER BY ringSize DESC, accountId
+    LIMIT $limit
+    """
+
+R3_LIVE_CYPHER = """
+    MATCH (m:Mule)-[:TRANSACTED_WITH]-(peer:Mule)
+    WITH m, collect(DISTINCT peer) AS peers, size(collect(DISTINCT peer)) AS ringSize
+    WHERE ringSize >= $minRisky
+    RETURN
+      m.id   AS accountId,
+      m.name AS customerName,
+      1.0    AS riskScore,
+      true   AS isFraud,
+      null   AS communityId,
+      null   AS communitySize,
+      ringSize AS ringSize
+    ORDER BY ringSize DESC, accountId
+    LIMIT $limit
+    """
+
+R7_CYPHER = """
+    MATCH (src:Mule)-[:PERFORMED]->(tx:Transaction)-[:TO]->(dst)
+    WHERE dst:Client OR dst:Mule
+    WITH dst, collect(DISTINCT src) AS riskySenders, count(DISTINCT src) AS riskyCount, count(DISTINCT tx) AS txCount
+    WHERE riskyCount >= $minRiskyAccounts
+    RETURN
+      dst.id   AS accountId,
+      coalesce(dst.name, dst.id) AS customerName,
+      1.0    AS riskScore,
+      (dst:Mule) AS isFraud,
+      riskyCount AS riskySenders,
+      txCount AS txCount,
+      dst.communityId   AS communityId,
+      dst.communitySize AS communitySize
+    ORDER BY riskyCount DESC, txCount DESC
+    LIMIT $limit
+    """
+
+# Neighborhood lookups for the graph views and AI assessment. Each part of the
+# neighborhood is an independent subquery with its own LIMIT, so a hub account
+# costs (identifiers + peers + outbound + inbound) rows instead of their product.
+# Subqueries fetch one row past the cap; the extra row only sets `truncated`.
+# Transactions are ordered most recent first, then by amount. Nodes come back
+# as map projections holding only what services/neighborhood.py renders.
+TX_ORDER = "coalesce(tx.timestamp, tx.globalStep, tx.step) DESC, tx.amount DESC"
+
+
+def _account_map(var: str) -> str:
+    return (
+        f"{var} {{.fraud_group, .flagged, .is_fraud, key: coalesce({var}.account_number, {var}.accountId, {var}.id), "
+        f"name: coalesce({var}.customer_name, {var}.name), mule: {var}:Mule}}"
+    )
+
+
+def _identifier_map(var: str) -> str:
+    return (
+        f"{var} {{.fraud_group, .flagged, .is_fraud, key: coalesce({var}.device_id, {var}.email, {var}.phoneNumber, {var}.ssn), "
+        f"kind: CASE WHEN {var}.email IS NOT NULL THEN 'Email' WHEN {var}.phoneNumber IS NOT NULL THEN 'Phone' "
+        f"WHEN {var}.ssn IS NOT NULL THEN 'SSN' ELSE 'Device' END}}"
+    )
+
+
+TX_MAP = "tx {.amount, .tags, key: coalesce(tx.tx_ref, tx.id)}"
+
+ACCOUNT_GRAPH_CYPHER = f"""
+    MATCH (a)
+    WHERE (a:Account AND a.account_number = $accountId)
+       OR (a:Mule AND a.id = $accountId)
+       OR (a:Client AND a.id = $accountId)
+       OR (a:Merchant AND a.id = $accountId)
+    WITH a LIMIT 1
+    CALL {{
+      WITH a
+      MATCH (a)-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]->(id)
+      WITH DISTINCT id LIMIT $identifierFetch
+      RETURN collect({_identifier_map("id")}) AS identifiers
+    }}
+    CALL {{
+      WITH a
+      MATCH (a)-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]->(id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(peer)
+      WHERE peer <> a
+      WITH DISTINCT id, peer LIMIT $peerFetch
+      RETURN collect({{identifier: {_identifier_map("id")}, peer: {_account_map("peer")}}}) AS idPeers
+    }}
+    CALL {{
+      WITH a
+      MATCH (a)-[:PERFORMED]->(tx:Transaction)-[:TO]->(dst)
+      WITH tx, dst ORDER BY {TX_ORDER} LIMIT $txFetch
+      RETURN collect({{tx: {TX_MAP}, other: {_account_map("dst")}}}) AS outbound
+    }}
+    CALL {{
+      WITH a
+      MATCH (src)-[:PERFORMED]->(tx:Transaction)-[:TO]->(a)
+      WITH tx, src ORDER BY {TX_ORDER} LIMIT $txFetch
+      RETURN collect({{tx: {TX_MAP}, other: {_account_map("src")}}}) AS inbound
+    }}
+    RETURN {_account_map("a")} AS anchor,
+           identifiers[..$identifierLimit] AS identifiers,
+           idPeers[..$peerLimit] AS idPeers,
+           outbound[..$txLimit] AS outbound,
+           inbound[..$txLimit] AS inbound,
+           {{identifiers: size(identifiers) > $identifierLimit, peers: size(idPeers) > $peerLimit,
+             outbound: size(outbound) > $txLimit, inbound: size(inbound) > $txLimit}} AS truncated
+    """
+
+
+def _identifier_graph_cypher(match_identifier: str) -> str:
+    return f"""
+    {match_identifier}
+    WITH id LIMIT 1
+    CALL {{
+      WITH id
+      MATCH (id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(acc)
+      WITH DISTINCT acc LIMIT $accountFetch
+      RETURN collect(acc) AS accs
+    }}
+    WITH id, accs, accs[..$accountLimit] AS shown
+    CALL {{
+      WITH shown
+      UNWIND shown AS acc
+      MATCH (acc)-[:PERFORMED]->(tx:Transaction)-[:TO]->(dst)
+      WITH acc, tx, dst ORDER BY {TX_ORDER} LIMIT $txFetch
+      RETURN collect({{tx: {TX_MAP}, other: {_account_map("dst")}, account: coalesce(acc.account_number, acc.accountId, acc.id)}}) AS outbound
+    }}
+    CALL {{
+      WITH shown
+      UNWIND shown AS acc
+      MATCH (src)-[:PERFORMED]->(tx:Transaction)-[:TO]->(acc)
+      WITH acc, tx, src ORDER BY {TX_ORDER} LIMIT $txFetch
+      RETURN collect({{tx: {TX_MAP}, other: {_account_map("src")}, account: coalesce(acc.account_number, acc.accountId, acc.id)}}) AS inbound
+    }}
+    RETURN {_identifier_map("id")} AS anchor,
+           [acc IN shown | {_account_map("acc")}] AS accounts,
+           outbound[..$txLimit] AS outbound,
+           inbound[..$txLimit] AS inbound,
+           {{accounts: size(accs) > $accountLimit, outbound: size(outbound) > $txLimit, inbound: size(inbound) > $txLimit}} AS truncated
+    """
+
+
+IDENTIFIER_GRAPH_CYPHER = _identifier_graph_cypher(
+    """MATCH (id)
+    WHERE (id:Email AND id.email = $identifier)
+       OR (id:Phone AND id.phoneNumber = $identifier)
+       OR (id:SSN AND id.ssn = $identifier)"""
+)
+
+DEVICE_GRAPH_CYPHER = _identifier_graph_cypher(
+    """MATCH (id)
+    WHERE (id:Device AND id.device_id = $identifier)
+       OR (id:Email AND id.email = $identifier)
+       OR (id:Phone AND id.phoneNumber = $identifier)
+       OR (id:SSN AND id.ssn = $identifier)"""
+)
+
+NEIGHBORHOOD_LIMITS = {
+    "tx": int(os.getenv("NEIGHBORHOOD_TX_LIMIT", "25")),
+    "peer": int(os.getenv("NEIGHBORHOOD_PEER_LIMIT", "50")),
+    "identifier": int(os.getenv("NEIGHBORHOOD_IDENTIFIER_LIMIT", "25")),
+    "account": int(os.getenv("NEIGHBORHOOD_ACCOUNT_LIMIT", "50")),
+}
+
+
+def neighborhood_params(**limits: Optional[int]) -> Dict[str, int]:
+    """Cap parameters for the *_GRAPH_CYPHER queries; tx=, peer=, identifier=, account= override the env defaults."""
+    params = {}
+    for key, default in NEIGHBORHOOD_LIMITS.items():
+        value = limits.get(key)
+        value = max(1, int(value)) if value is not None else default
+        params[f"{key}Limit"] = value
+        params[f"{key}Fetch"] = value + 1
+    return params
+
+
+def clamp_hops(min_hops: int, max_hops: int) -> Tuple[int, int]:
+    min_hops = max(1, min_hops)
+    return min_hops, max(min_hops, min(max_hops, 15))
+
+
+def _name_filter(name: Optional[str]) -> str:
+    return " {name: $name}" if name else ""
+
+
+def r8_cypher(name: Optional[str], min_hops: int, max_hops: int) -> str:
+    return f"""
+    MATCH p=(c1:Client{_name_filter(name)})
+    (
+      (:Client)-[t1:TRANSACTED_WITH]->(:Client)-[t2:TRANSACTED_WITH]->(:Client)
+      WHERE t1.globalStep + $duration > t2.globalStep > t1.globalStep
+        AND t2.amount < t1.amount
+        AND t1.amount > $amount
+    ){{{min_hops},{max_hops}}}(c2:Client)
+    RETURN p
+    LIMIT $limit
+    """
+
+
+def r9_cypher(name: Optional[str], min_hops: int, max_hops: int) -> str:
+    return f"""
+    MATCH p=(c:Client{_name_filter(name)})-[r:TRANSACTED_WITH WHERE r.amount > $minAmount]->{{{min_hops},{max_hops}}}(c)
+    RETURN p
+    LIMIT $limit
+    """
+
+
+def r10_cypher(name: Optional[str], min_hops: int, max_hops: int) -> str:
+    return f"""
+    MATCH p=(c:Client{_name_filter(name)})
+    (
+      (:Client)-[r1:TRANSACTED_WITH]->(:Client)-[r2:TRANSACTED_WITH]->(:Client)
+      WHERE r2.globalStep > r1.globalStep
+        AND r1.amount > $minAmount
+        AND r2.amount > $minAmount
+    ){{{min_hops},{max_hops}}}(c)
+    RETURN p
+    LIMIT $limit
+    """
+
+
+def _fixed(cypher: str) -> Callable[[Dict[str, Any]], str]:
+    return lambda params: cypher
+
+
+def _hops(builder: Callable[[Optional[str], int, int], str]) -> Callable[[Dict[str, Any]], str]:
+    def build(params: Dict[str, Any]) -> str:
+        return builder(params.get("name"), *clamp_hops(params["minHops"], params["maxHops"]))
+
+    return build
+
+
+@dataclass
+class RuleQuery:
+    name: str
+    description: str
+    build: Callable[[Dict[str, Any]], str]
+    params: Dict[str, Any] = field(default_factory=dict)
+    # Query returning a single `value` to use for the parameter named by sample_param
+    sample_query: Optional[str] = None
+    sample_param: Optional[str] = None
+
+    def cypher(self, overrides: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        params = dict(self.params, **(overrides or {}))
+        return self.build(params), params
+
+
+RULE_QUERIES: Dict[str, RuleQuery] = {
+    q.name: q
+    for q in (
+        RuleQuery("R1", "Mule accounts", _fixed(R1_CYPHER), {"limit": 50}),
+        RuleQuery("R2", "Identifiers shared by risky accounts", _fixed(R2_CYPHER), {"minRiskyAccounts": 2, "limit": 20}),
+        RuleQuery("R3", "Mule rings from cached communities", _fixed(R3_COMMUNITY_CYPHER), {"minRisky": 3, "limit": 20}),
+        RuleQuery("R3_LIVE", "Mule rings from distinct mule peers", _fixed(R3_LIVE_CYPHER), {"minRisky": 3, "limit": 20}),
+        RuleQuery("R7", "Hubs receiving from many mules", _fixed(R7_CYPHER), {"minRiskyAccounts": 3, "limit": 20}),
+        RuleQuery(
+            "R8",
+            "Progressive decreasing chains within a step window",
+            _hops(r8_cypher),
+            {"name": "Aubree David", "duration": 4000, "amount": 50000, "minHops": 5, "maxHops": 10, "limit": 5},
+        ),
+        RuleQuery(
+            "R9",
+            "High-value cycles",
+            _hops(r9_cypher),
+            {"name": "Aubree David", "minAmount": 1200000, "minHops": 10, "maxHops": 12, "limit": 5},
+        ),
+        RuleQuery(
+            "R10",
+            "Time-ordered high-value cycles",
+            _hops(r10_cypher),
+            {"name": "Aubree David", "minAmount": 800000, "minHops": 3, "maxHops": 8, "limit": 5},
+        ),
+        RuleQuery(
+            "ACCOUNT_GRAPH",
+            "Account neighborhood for graph views and AI assessment",
+            _fixed(ACCOUNT_GRAPH_CYPHER),
+            dict(neighborhood_params(), accountId=None),
+            sample_query="MATCH (m:Mule) RETURN m.id AS value ORDER BY m.id LIMIT 1",
+            sample_param="accountId",
+        ),
+        RuleQuery(
+            "IDENTIFIER_GRAPH",
+            "Identifier neighborhood for graph views and AI assessment",
+            _fixed(IDENTIFIER_GRAPH_CYPHER),
+            dict(neighborhood_params(), identifier=None),
+            sample_query="MATCH (id)<-[:HAS_EMAIL|HAS_PHONE|HAS_SSN]-(:Mule) RETURN coalesce(id.email, id.phoneNumber, id.ssn) AS value LIMIT 1",
+            sample_param="identifier",
+        ),
+    )
+}
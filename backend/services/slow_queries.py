@@ -0,0 +1,147 @@
+import contextvars
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+STATEMENT_MAX_CHARS = 2000
+PARAM_MAX_CHARS = 64
+PARAM_MAX_ITEMS = 10
+REDACTED = "***"
+# Parameter names whose values are never captured: credentials, customer identifiers and
+# free-text lookups (search boxes, $q/$qLower, identifier resolution), which can hold any of them.
+SENSITIVE_PARAM = re.compile(
+    r"pass|secret|token|api_?key|auth|otp|pin\b|ssn|email|phone|card|cvv|name|identifier|account|query|search|^q(lower)?$",
+    re.IGNORECASE,
+)
+
+# Caller tags (endpoint, rule, ...) attached to every query recorded in this context.
+_tags: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("query_tags", default={})
+
+
+def current_tags() -> Dict[str, str]:
+    return dict(_tags.get())
+
+
+def set_tags(**tags):
+    """Replace the tags for the current context (e.g. at the start of a request)."""
+    _tags.set({k: str(v) for k, v in tags.items() if v is not None})
+
+
+@contextmanager
+def query_tags(**tags):
+    """Add tags (e.g. rule="R7") for queries run inside the block."""
+    token = _tags.set(dict(_tags.get(), **{k: str(v) for k, v in tags.items() if v is not None}))
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+def _redact_value(value: Any) -> Any:
+    if isinstance(value, str):
+        return value if len(value) <= PARAM_MAX_CHARS else value[:PARAM_MAX_CHARS] + f"...({len(value)} chars)"
+    if isinstance(value, (list, tuple)):
+        if len(value) > PARAM_MAX_ITEMS:
+            return f"<{type(value).__name__} of {len(value)}>"
+        return [_redact_value(v) for v in value]
+    if isinstance(value, dict):
+        return redact_params(value)
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return f"<{type(value).__name__}>"
+
+
+def redact_params(params: Any) -> Any:
+    """Copy of query parameters safe to keep in memory and show in the admin API."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: REDACTED if SENSITIVE_PARAM.search(str(k)) else _redact_value(v) for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        # executemany batches
+        if params and isinstance(params[0], dict):
+            return [redact_params(params[0]), f"... {len(params)} parameter sets"] if len(params) > 1 else [redact_params(params[0])]
+        # Positional parameters have no name to judge by; keep only non-text values.
+        return [REDACTED if isinstance(v, (str, bytes)) else _redact_value(v) for v in params]
+    return _redact_value(params)
+
+
+class SlowQueryLog:
+    """Fixed-size ring buffer of queries slower than `threshold_ms`, newest last."""
+
+    def __init__(self, threshold_ms: float = 500.0, capacity: int = 200):
+        self.threshold_ms = threshold_ms
+        self._entries: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, kind: str, statement: str, params: Any, duration_ms: float, **extra) -> bool:
+        if duration_ms < self.threshold_ms:
+            return False
+        statement = " ".join(str(statement).split())
+        entry = {
+            "at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "kind": kind,
+            "durationMs": round(duration_ms, 1),
+            "statement": statement[:STATEMENT_MAX_CHARS],
+            "params": redact_params(params),
+            "tags": current_tags(),
+        }
+        entry.update(extra)
+        with self._lock:
+            self._entries.append(entry)
+            self.recorded += 1
+        return True
+
+    def entries(self, limit: Optional[int] = None, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [e for e in self._entries if kind is None or e["kind"] == kind]
+        items.reverse()
+        return items[:limit] if limit else items
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "thresholdMs": self.threshold_ms,
+                "capacity": self._entries.maxlen,
+                "buffered": len(self._entries),
+                "recorded": self.recorded,
+            }
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=float(os.getenv("SLOW_QUERY_MS", "500")),
+    capacity=int(os.getenv("SLOW_QUERY_BUFFER", "200")),
+)
+
+
+def install_slow_sql_log(engine, log: SlowQueryLog = slow_query_log):
+    """Time every statement on the engine and log the slow ones."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["slow_query_started"].pop()
+        # Prefer the named parameters SQLAlchemy compiled; the DBAPI ones may be positional.
+        compiled = getattr(context, "compiled_parameters", None) if context is not None else None
+        if compiled:
+            parameters = compiled if executemany else compiled[0]
+        log.record("sql", statement, parameters, (time.perf_counter() - started) * 1000)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("slow_query_started"):
+            conn.info["slow_query_started"].pop()
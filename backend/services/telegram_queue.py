@@ -0,0 +1,300 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Telegram's flood-control wait for a 429 response (parameters.retry_after), else None."""
+    response = getattr(exc, "response", None)
+    if response is None or getattr(response, "status_code", None) != 429:
+        return None
+    try:
+        return float(response.json().get("parameters", {}).get("retry_after", 1))
+    except Exception:
+        return 1.0
+
+
+class SeenStore:
+    """
+    Persistent set of alert keys that were already pushed, each with an expiry.
+    Stored as a small JSON file ({key: expires_at_epoch}) so a restarted agent does
+    not re-send everything it sent in the last `ttl_seconds`.
+
+    claim() only reserves a key while its message is queued; mark() records it once
+    the send succeeded, discard() frees it again if the send failed.
+    """
+
+    def __init__(self, path, ttl_seconds: float = 86400):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._data: Dict[str, float] = {}
+        self._pending = set()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        now = time.time()
+        self._data = {k: float(v) for k, v in raw.items() if float(v) > now}
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            expires = self._data.get(key)
+            if expires is None:
+                return False
+            if expires <= time.time():
+                del self._data[key]
+                return False
+            return True
+
+    def claim(self, key: str) -> bool:
+        """Reserve `key` for sending; False if it was already sent (and not expired) or is being sent."""
+        now = time.time()
+        with self._lock:
+            expires = self._data.get(key)
+            if key in self._pending or (expires is not None and expires > now):
+                return False
+            self._pending.add(key)
+            return True
+
+    def mark(self, key: str):
+        """Record `key` as sent for the next `ttl_seconds`."""
+        with self._lock:
+            self._pending.discard(key)
+            self._data[key] = time.time() + self.ttl_seconds
+
+    def discard(self, key: str):
+        with self._lock:
+            self._pending.discard(key)
+            self._data.pop(key, None)
+
+    def save(self):
+        now = time.time()
+        with self._lock:
+            self._data = {k: v for k, v in self._data.items() if v > now}
+            snapshot = dict(self._data)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class SendQueue:
+    """
+    Single background sender for Telegram API calls.
+
+    Calls are spaced at most `rate_per_second` apart (Telegram allows roughly one
+    message per second per chat). A 429 is retried after the server's retry_after;
+    other errors are logged and dropped so one bad message never blocks the queue.
+    Optional on_success/on_failure callbacks run on the sender thread afterwards.
+    """
+
+    def __init__(self, rate_per_second: float = 1.0, max_retries: int = 3, sleep: Callable[[float], None] = time.sleep):
+        self.min_interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self.max_retries = max_retries
+        self._sleep = sleep
+        self._queue: "queue.Queue" = queue.Queue()
+        self._last_sent = 0.0
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self._thread = threading.Thread(target=self._run, name="telegram-send", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, fn: Callable[..., Any], *args, on_success: Optional[Callable[[], Any]] = None, on_failure: Optional[Callable[[], Any]] = None, **kwargs):
+        self._queue.put((fn, args, kwargs, on_success, on_failure))
+
+    def _send(self, fn, args, kwargs) -> bool:
+        for attempt in range(self.max_retries + 1):
+            wait = self._last_sent + self.min_interval - time.monotonic()
+            if wait > 0:
+                self._sleep(wait)
+            try:
+                fn(*args, **kwargs)
+                self._last_sent = time.monotonic()
+                with self._lock:
+                    self.sent += 1
+                return True
+            except Exception as exc:
+                self._last_sent = time.monotonic()
+                retry_after = retry_after_seconds(exc)
+                if retry_after is None or attempt == self.max_retries:
+                    print(f"Telegram send failed: {exc}")
+                    with self._lock:
+                        self.failed += 1
+                    return False
+                with self._lock:
+                    self.rate_limited += 1
+                self._sleep(retry_after)
+
+    def _run(self):
+        while True:
+            fn, args, kwargs, on_success, on_failure = self._queue.get()
+            try:
+                callback = on_success if self._send(fn, args, kwargs) else on_failure
+                if callback is not None:
+                    callback()
+            except Exception as exc:
+                print(f"Telegram send callback failed: {exc}")
+            finally:
+                self._queue.task_done()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued call was attempted; False if `timeout` ran out first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.02)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "sent": self.sent,
+                "failed": self.failed,
+                "rate_limited": self.rate_limited,
+            }
+
+
+class UpdateQueueFull(RuntimeError):
+    """Raised when the webhook update queue is at capacity."""
+
+
+class UpdateQueue:
+    """
+    Background processing for Telegram webhook updates.
+
+    The webhook only enqueues and returns, so Telegram gets its 200 immediately and
+    stops retrying. Updates are de-duplicated by update_id (Telegram redelivers
+    until acknowledged); `remember` ids are kept. Workers record queue wait and
+    processing time for the most recent `window` updates.
+
+    Worker threads start on the first submit() and exit on stop(), so an app
+    that never receives a webhook (e.g. in tests) runs none.
+    """
+
+    def __init__(self, handler: Callable[[dict], Any], workers: int = 2, max_pending: int = 100, remember: int = 1000, window: int = 500):
+        self.handler = handler
+        self.remember = remember
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._seen_ids: "OrderedDict[Any, None]" = OrderedDict()
+        self._waits: deque = deque(maxlen=window)
+        self._durations: deque = deque(maxlen=window)
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.processed = 0
+        self.errors = 0
+        self.workers = max(1, workers)
+        self._threads: List[threading.Thread] = []
+
+    def _start(self):
+        # Called with self._lock held.
+        if not self._threads:
+            self._threads = [threading.Thread(target=self._run, name=f"telegram-update-{i}", daemon=True) for i in range(self.workers)]
+            for t in self._threads:
+                t.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Let the workers finish the queued updates, then exit. A later submit() starts new ones."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for t in threads:
+            t.join(timeout)
+
+    def submit(self, update: dict) -> bool:
+        """Queue an update; False if its update_id was already accepted."""
+        update_id = update.get("update_id")
+        with self._lock:
+            if update_id is not None and update_id in self._seen_ids:
+                self.duplicates += 1
+                return False
+            try:
+                self._queue.put_nowait((time.monotonic(), update))
+            except queue.Full:
+                self.rejected += 1
+                raise UpdateQueueFull(f"update queue full ({self._queue.maxsize} pending)")
+            self._start()
+            if update_id is not None:
+                self._seen_ids[update_id] = None
+                while len(self._seen_ids) > self.remember:
+                    self._seen_ids.popitem(last=False)
+            self.accepted += 1
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            enqueued_at, update = item
+            started = time.monotonic()
+            failed = False
+            try:
+                self.handler(update)
+            except Exception as exc:
+                print(f"[TELEGRAM-WEBHOOK] update {update.get('update_id')} failed: {exc}")
+                failed = True
+            finally:
+                with self._lock:
+                    self._waits.append(started - enqueued_at)
+                    self._durations.append(time.monotonic() - started)
+                    self.processed += 1
+                    self.errors += int(failed)
+                self._queue.task_done()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.02)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._queue.qsize(),
+                "max_pending": self._queue.maxsize,
+                "workers": len(self._threads),
+                "accepted": self.accepted,
+                "duplicates": self.duplicates,
+                "rejected": self.rejected,
+                "processed": self.processed,
+                "errors": self.errors,
+                "queue_wait_ms": _percentiles(self._waits),
+                "processing_ms": _percentiles(self._durations),
+            }
+
+
+def _percentiles(samples) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+    return {"p50": pick(0.5), "p95": pick(0.95), "max": round(ordered[-1] * 1000, 1)}
@@ -0,0 +1,72 @@
+import heapq
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+SEVERITY_RANK = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+
+
+def severity_rank(sev: Optional[str]) -> int:
+    return SEVERITY_RANK.get(sev, 3)
+
+
+def priority_score(rule_key: str, rec: Dict[str, Any]) -> float:
+    """
+    Composite 0..1 priority used to order alerts of the same severity.
+    Per rule it is monotone in the column the rule query sorts by, so a rule's
+    rows arrive best-first and a TopKSelector can stop reading them early.
+    """
+    if rule_key == "R1":
+        return float(rec.get("riskScore") or 0)
+    if rule_key == "R2":
+        return min(1.0, (rec.get("riskyAccounts") or 0) / 10.0)
+    if rule_key == "R3":
+        return min(1.0, (rec.get("ringSize") or 0) / 10.0)
+    if rule_key == "R7":
+        return min(1.0, (rec.get("riskySenders") or 0) / 10.0)
+    risk = rec.get("afasa_risk_score")
+    return risk / 100.0 if risk is not None else 0.5
+
+
+class TopKSelector:
+    """
+    Bounded heap of the k best alerts by (severity rank, -priority, arrival order).
+    Callers ask `accepts()` before doing any per-row work (flag lookups, dict
+    construction) and only `push()` rows that can still make the cut.
+    """
+
+    def __init__(self, k: int):
+        self.k = max(0, k)
+        self._heap: List[Tuple] = []  # stores negated keys: heap[0] is the current worst
+        self._seq = itertools.count()
+        self.considered = 0
+        self.skipped = 0
+
+    def _key(self, severity: str, priority: float, seq: int) -> Tuple:
+        return (severity_rank(severity), -priority, seq)
+
+    def accepts(self, severity: str, priority: float) -> bool:
+        self.considered += 1
+        if len(self._heap) < self.k:
+            return True
+        if self.k == 0:
+            self.skipped += 1
+            return False
+        worst = self._heap[0]
+        # A new row always arrives later than anything in the heap, so it only
+        # wins on strictly better (severity, priority).
+        ok = (severity_rank(severity), -priority) < (-worst[0], -worst[1])
+        if not ok:
+            self.skipped += 1
+        return ok
+
+    def push(self, severity: str, priority: float, item: Any):
+        rank, neg_prio, seq = self._key(severity, priority, next(self._seq))
+        entry = (-rank, -neg_prio, -seq, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif self.k:
+            heapq.heappushpop(self._heap, entry)
+
+    def results(self) -> List[Any]:
+        ordered = sorted(self._heap, key=lambda e: (-e[0], -e[1], -e[2]))
+        return [e[3] for e in ordered]
@@ -10,13 +10,34 @@ Env vars:
   TELEGRAM_CHAT_ID         Chat/channel id to send messages to
   TELEGRAM_AGENT_ENDPOINT  Defaults to http://localhost:5005/api/ai-agent/top?limit=5
   TELEGRAM_AGENT_INTERVAL  Poll interval seconds (default 180)
+  TELEGRAM_AGENT_WORKERS   Concurrent assessment requests (default 4)
+  TELEGRAM_AGENT_STATE     JSON file of already-sent alerts (default ~/.cache/gcash-fraud/telegram_agent_seen.json)
+  TELEGRAM_AGENT_SEEN_TTL  Seconds before a sent alert may be sent again (default 86400)
+  TELEGRAM_SEND_RATE       Max Telegram calls per second (default 1)
+
+Each cycle only handles alerts not sent within TELEGRAM_AGENT_SEEN_TTL. Alert
+messages go out through a rate-limited send queue. An alert counts as sent only
+once its message was delivered; only then is its assessment requested on a small
+worker pool and queued behind it. If the alert send fails, nothing is assessed
+and the alert is retried next cycle. A failed assessment is logged and not
+retried, so the alert message is never sent twice.
 """
 
 import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import requests
 from dotenv import load_dotenv
 
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.services.telegram_queue import SeenStore, SendQueue  # noqa: E402
+
 
 def fetch_top(endpoint: str):
     resp = requests.get(endpoint, timeout=10)
@@ -68,6 +89,68 @@ def format_alert(a: dict) -> str:
     return f"• [{sev}] {prefix}{rule}: {summary}\n    anchor: {anchor}{afasa}{actions}"
 
 
+def alert_key(a: dict) -> str:
+    rule = a.get("ruleKey") or a.get("rule") or ""
+    anchor = a.get("accountId") or a.get("deviceId") or a.get("id") or ""
+    return f"{rule}|{anchor}"
+
+
+def request_assessment(assess_endpoint: str, a: dict):
+    anchor = a.get("accountId") or a.get("deviceId")
+    if not anchor:
+        return None
+    resp = requests.post(
+        assess_endpoint,
+        json={"ruleKey": a.get("ruleKey") or a.get("rule"), "anchor": anchor, "wait": 20},
+        timeout=30,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _mark_sent(seen: SeenStore, key: str):
+    seen.mark(key)
+    seen.save()
+
+
+def run_cycle(alerts, seen: SeenStore, sender: SendQueue, pool: ThreadPoolExecutor, token: str, chat_id: str, assess_endpoint: str):
+    fresh = [a for a in alerts or [] if seen.claim(alert_key(a))]
+    skipped = len(alerts or []) - len(fresh)
+
+    def assess_and_send(a: dict):
+        try:
+            data = request_assessment(assess_endpoint, a)
+        except Exception as exc:
+            print(f"Agent assess error for {alert_key(a)}: {exc}")
+            return
+        if data is None:
+            return
+        assess_text = data.get("assessment") or "No assessment."
+        img_path = data.get("image_path")
+        if img_path and os.path.exists(img_path):
+            sender.enqueue(send_photo, token, chat_id, img_path, assess_text[:1000])
+        else:
+            sender.enqueue(send_message, token, chat_id, f"Assessment:\n{assess_text}")
+
+    def delivered(key: str, a: dict):
+        _mark_sent(seen, key)
+        # Only assess alerts that went out; a failed one is retried (and assessed) next cycle.
+        pool.submit(assess_and_send, a)
+
+    for a in fresh:
+        key = alert_key(a)
+        sender.enqueue(
+            send_message,
+            token,
+            chat_id,
+            f"🔍 Search & Destroy (unflagged suspects)\n{format_alert(a)}",
+            on_success=lambda key=key, a=a: delivered(key, a),
+            on_failure=lambda key=key: seen.discard(key),
+        )
+    seen.save()
+    return len(fresh), skipped
+
+
 def main():
     load_dotenv()
     token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -75,39 +158,25 @@ def main():
     endpoint = os.getenv("TELEGRAM_AGENT_ENDPOINT", "http://localhost:5005/api/ai-agent/top?limit=5")
     interval = int(os.getenv("TELEGRAM_AGENT_INTERVAL", "180"))
     assess_endpoint = os.getenv("TELEGRAM_ASSESS_ENDPOINT", "http://localhost:5005/api/ai-agent/assess")
+    workers = int(os.getenv("TELEGRAM_AGENT_WORKERS", "4"))
+    state_path = os.getenv("TELEGRAM_AGENT_STATE", str(Path.home() / ".cache" / "gcash-fraud" / "telegram_agent_seen.json"))
+    seen_ttl = float(os.getenv("TELEGRAM_AGENT_SEEN_TTL", "86400"))
+    send_rate = float(os.getenv("TELEGRAM_SEND_RATE", "1"))
 
     if not token or not chat_id:
         print("Set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID before running.")
         return
 
-    print(f"Starting Telegram agent. Polling {endpoint} every {interval}s")
+    seen = SeenStore(state_path, ttl_seconds=seen_ttl)
+    sender = SendQueue(rate_per_second=send_rate)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-assess")
+    print(f"Starting Telegram agent. Polling {endpoint} every {interval}s ({len(seen)} alerts already sent)")
     while True:
+        started = time.perf_counter()
         try:
             alerts = fetch_top(endpoint)
-            if alerts:
-                for a in alerts:
-                    body = format_alert(a)
-                    msg = f"🔍 Search & Destroy (unflagged suspects)\n{body}"
-                    try:
-                        send_message(token, chat_id, msg)
-                        # Trigger assessment
-                        anchor = a.get("accountId") or a.get("deviceId")
-                        if anchor:
-                            assess_resp = requests.post(
-                                assess_endpoint,
-                                json={"ruleKey": a.get("ruleKey") or a.get("rule"), "anchor": anchor},
-                                timeout=30,
-                            )
-                            if assess_resp.ok:
-                                data = assess_resp.json()
-                                assess_text = data.get("assessment") or "No assessment."
-                                img_path = data.get("image_path")
-                                if img_path and os.path.exists(img_path):
-                                    send_photo(token, chat_id, img_path, assess_text[:1000])
-                                else:
-                                    send_message(token, chat_id, f"Assessment:\n{assess_text}")
-                    except Exception as exc:
-                        print(f"Agent send error: {exc}")
+            sent, skipped = run_cycle(alerts, seen, sender, pool, token, chat_id, assess_endpoint)
+            print(f"Agent cycle: {sent} new, {skipped} already sent, {time.perf_counter() - started:.1f}s; sender {sender.stats()}")
         except Exception as exc:
             print(f"Agent error: {exc}")
         time.sleep(interval)
@@ -17,5 +17,6 @@ def client():
         init_db()
     with app.test_client() as client:
         yield client
+    app.extensions["telegram_updates"].stop(timeout=5)
     with app.app_context():
         Base.metadata.drop_all(bind=engine)
@@ -68,3 +68,70 @@ def test_afasa_dispute_lifecycle(client):
     )
     assert resp_rel.status_code == 200
     assert resp_rel.get_json()["status"] == "RELEASED"
+
+
+def test_afasa_reports_follow_dispute_lifecycle(client):
+    alert_id, tx_id = _bootstrap_alert()
+    ids = []
+    for suspicion in ("MONEY_MULE", "MONEY_MULE", "SOCIAL_ENGINEERING"):
+        resp = client.post(
+            "/api/afasa/disputes",
+            json={"alert_id": alert_id, "tx_id": tx_id, "reason_category": "FMS_DETECTED", "suspicion_type": suspicion},
+        )
+        ids.append(resp.get_json()["id"])
+    client.post(f"/api/afasa/disputes/{ids[0]}/hold", json={"actor": "tester"})
+    client.post(f"/api/afasa/disputes/{ids[1]}/release", json={"decision": "RESTITUTION"})
+
+    summary = client.get("/api/afasa/reports/summary").get_json()
+    assert summary["total_disputes"] == 3
+    assert summary["by_status"] == {"PENDING_HOLD": 1, "HELD": 1, "WRITTEN_OFF": 1}
+    assert summary["by_suspicion"] == {"MONEY_MULE": 2, "SOCIAL_ENGINEERING": 1}
+
+    weekly = client.get("/api/afasa/reports/trends?bucket=week&days=7").get_json()
+    assert weekly["series"][-1]["total"] == 3
+    assert weekly["series"][-1]["by_status"]["HELD"] == 1
+    assert client.get("/api/afasa/reports/trends?bucket=month").status_code == 400
+
+    assert client.post("/api/afasa/reports/rebuild").get_json()["status"] == "ok"
+    assert client.get("/api/afasa/reports/summary").get_json() == summary
+
+
+def test_status_change_reads_the_committed_status(client):
+    from backend.afasa.rollups import dispute_summary
+    from backend.afasa.services import apply_temporary_hold, initiate_disputed_transaction, release_or_restitute_funds
+
+    alert_id, tx_id = _bootstrap_alert()
+    first, second = get_session(), get_session()
+    try:
+        dispute = initiate_disputed_transaction(first, alert_id, tx_id, "FMS_DETECTED", "MONEY_MULE", "tester")
+        assert first.get(type(dispute), dispute.id).status == "PENDING_HOLD"
+        # Another worker holds the dispute while `first` still has the old status loaded.
+        apply_temporary_hold(second, dispute.id, "other")
+        release_or_restitute_funds(first, dispute.id, "RELEASE", "tester")
+        assert dispute_summary(first)["by_status"] == {"RELEASED": 1}
+    finally:
+        first.close()
+        second.close()
+
+
+def test_list_disputes_pages_with_keyset_cursor(client):
+    alert_id, tx_id = _bootstrap_alert()
+    for _ in range(3):
+        client.post(
+            "/api/afasa/disputes",
+            json={"alert_id": alert_id, "tx_id": tx_id, "reason_category": "FMS_DETECTED", "suspicion_type": "MONEY_MULE"},
+        )
+
+    first = client.get("/api/afasa/disputes?limit=2")
+    assert first.status_code == 200
+    page = first.get_json()
+    assert len(page) == 2
+    assert page[0]["verification_events"][0]["event_type"] == "INITIATED"
+    cursor = first.headers["X-Next-After-Id"]
+    assert cursor == str(page[-1]["id"])
+
+    last = client.get(f"/api/afasa/disputes?limit=2&after_id={cursor}&include_events=false")
+    rest = last.get_json()
+    assert [d["id"] for d in rest] == [page[-1]["id"] + 1]
+    assert "verification_events" not in rest[0]
+    assert "X-Next-After-Id" not in last.headers
@@ -15,3 +15,17 @@ def test_refresh_and_list_alerts(client):
     alerts = list_resp.get_json()
     assert isinstance(alerts, list)
     assert len(alerts) >= generated
+
+
+def test_list_alerts_conditional_get(client):
+    client.post("/api/alerts/refresh", json={})
+    first = client.get("/api/alerts")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    repeat = client.get("/api/alerts", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+
+    filtered = client.get("/api/alerts?status=OPEN", headers={"If-None-Match": etag})
+    assert filtered.status_code == 200
@@ -0,0 +1,168 @@
+import asyncio
+import gzip
+import json
+import threading
+
+from flask import Flask, jsonify, request
+
+from backend.services import compression
+from backend.services.asgi_server import AsgiApp, JSONResponse, Router, WsgiBridge
+from backend.services.metrics import RequestMetrics
+
+
+def _flask_app():
+    app = Flask(__name__)
+
+    @app.route("/api/echo", methods=["GET", "POST"])
+    def echo():
+        return jsonify(
+            {
+                "args": request.args.to_dict(),
+                "body": request.get_data(as_text=True),
+                "header": request.headers.get("X-Test"),
+                "thread": threading.current_thread().name,
+            }
+        )
+
+    return app
+
+
+def _call(asgi_app, method, path, query=b"", body=b"", headers=()):
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(k.encode(), v.encode()) for k, v in headers],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_app(scope, receive, send))
+    start, chunk = sent
+    return start["status"], {k.decode(): v.decode() for k, v in start["headers"]}, chunk["body"]
+
+
+def test_router_matches_flask_style_patterns():
+    router = Router()
+
+    async def graph(request, account_id):
+        return JSONResponse({"id": account_id})
+
+    router.add("GET", "/api/neo4j/graph/account/<account_id>", graph)
+
+    pattern, handler, params = router.match("GET", "/api/neo4j/graph/account/MULE-1")
+    assert pattern == "/api/neo4j/graph/account/<account_id>"
+    assert handler is graph
+    assert params == {"account_id": "MULE-1"}
+    assert router.match("POST", "/api/neo4j/graph/account/MULE-1") is None
+    assert router.match("GET", "/api/neo4j/graph/account/MULE-1/extra") is None
+
+
+def test_unmatched_requests_are_served_by_flask_on_the_pool():
+    app = AsgiApp(Router(), WsgiBridge(_flask_app(), threads=2))
+
+    status, headers, body = _call(app, "POST", "/api/echo", query=b"limit=5", body=b"hello", headers=[("X-Test", "yes")])
+
+    payload = json.loads(body)
+    assert status == 200
+    assert headers["content-type"] == "application/json"
+    assert payload["args"] == {"limit": "5"}
+    assert payload["body"] == "hello"
+    assert payload["header"] == "yes"
+    assert payload["thread"].startswith("wsgi")
+
+
+def test_native_route_is_compressed_tagged_and_measured(monkeypatch):
+    monkeypatch.setattr(compression, "COMPRESS_MIN_BYTES", 100)
+    router = Router()
+
+    @router.route("/api/neo-alerts/r1")
+    async def alerts(request):
+        return JSONResponse([{"id": i, "summary": "x" * 20} for i in range(int(request.args["limit"]))], etag="abc")
+
+    metrics = RequestMetrics()
+    app = AsgiApp(router, WsgiBridge(_flask_app(), threads=1), metrics=metrics)
+
+    status, headers, body = _call(app, "GET", "/api/neo-alerts/r1", query=b"limit=20", headers=[("Accept-Encoding", "gzip")])
+
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert headers["etag"] == 'W/"abc"'
+    assert headers["access-control-allow-origin"] == "*"
+    assert len(json.loads(gzip.decompress(body))) == 20
+    assert 'endpoint="/api/neo-alerts/r1"' in metrics.render()
+
+
+def test_native_not_modified_and_errors():
+    router = Router()
+
+    @router.route("/cached")
+    async def cached(request):
+        if request.if_none_match.contains_weak("v1"):
+            return JSONResponse.not_modified("v1")
+        return JSONResponse({"ok": True}, etag="v1")
+
+    @router.route("/boom")
+    async def boom(request):
+        raise RuntimeError("neo4j down")
+
+    app = AsgiApp(router, WsgiBridge(_flask_app(), threads=1))
+
+    status, headers, body = _call(app, "GET", "/cached", headers=[("If-None-Match", 'W/"v1"')])
+    assert status == 304
+    assert body == b""
+    assert headers["etag"] == '"v1"'
+
+    status, _, body = _call(app, "GET", "/boom")
+    assert status == 500
+    assert json.loads(body)["status"] == "error"
+
+
+def test_handler_returning_none_falls_through_with_the_body():
+    router = Router()
+    seen = []
+
+    @router.route("/api/echo", methods=("POST",))
+    async def prefetch(request):
+        seen.append(request.body)
+        return None
+
+    app = AsgiApp(router, WsgiBridge(_flask_app(), threads=1))
+
+    status, _, body = _call(app, "POST", "/api/echo", body=b'{"anchor": "MULE-1"}')
+
+    assert status == 200
+    assert seen == [b'{"anchor": "MULE-1"}']
+    assert json.loads(body)["body"] == '{"anchor": "MULE-1"}'
+
+
+def test_lifespan_runs_startup_and_shutdown():
+    events = []
+
+    async def startup():
+        events.append("startup")
+
+    async def shutdown():
+        events.append("shutdown")
+
+    app = AsgiApp(Router(), WsgiBridge(_flask_app(), threads=1), on_startup=startup, on_shutdown=shutdown)
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(app({"type": "lifespan"}, receive, send))
+
+    assert events == ["startup", "shutdown"]
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
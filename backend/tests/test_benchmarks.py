@@ -0,0 +1,108 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.benchmarks.harness import compare, measure, percentile  # noqa: E402
+from backend.benchmarks.snapshot_rules import SnapshotRules  # noqa: E402
+from backend.services.graph_snapshot import GraphSnapshot, build_arrays, write_snapshot  # noqa: E402
+
+
+def _rules(tmp_path):
+    # M1..M4 are mules on DEV-R; M1 -> M2 -> M3 -> M1 is a step-ordered ring,
+    # M4 fans out to M2 and V1 -> M1 -> M2 -> M3 is a decreasing layering chain.
+    numbers = ["M1", "M2", "M3", "M4", "V1", "G1"]
+    accounts = {
+        "id": list(range(1, 7)),
+        "account_number": numbers,
+        "risk_score": ["0.9"] * 4 + ["0.1", "0.1"],
+        "is_fraud": ["true"] * 4 + ["false", "false"],
+    }
+    devices = {"id": [1, 2], "device_id": ["DEV-R", "DEV-G"]}
+    links = {"account_id": [1, 2, 3, 4, 5, 6], "device_id": [1, 1, 1, 1, 2, 2]}
+    edges = [
+        (1, 2, 9000, 1),
+        (2, 3, 8000, 2),
+        (3, 1, 7000, 3),
+        (4, 2, 500, 1),
+        (4, 6, 500, 2),
+        (5, 1, 50000, 10),
+        (1, 2, 45000, 11),
+        (2, 3, 40000, 12),
+        (4, 3, 300, 4),
+    ]
+    transactions = {
+        "tx_ref": [f"TX-{i}" for i in range(len(edges))],
+        "from_account_id": [e[0] for e in edges],
+        "to_account_id": [e[1] for e in edges],
+        "amount": [e[2] for e in edges],
+        "timestamp": [f"2024-01-01T{e[3]:02d}:00:00" for e in edges],
+        "is_flagged": ["false"] * len(edges),
+        "global_step": [e[3] for e in edges],
+    }
+    path = write_snapshot(tmp_path / "snap", build_arrays(accounts, devices, links, transactions))
+    return SnapshotRules(GraphSnapshot(path))
+
+
+def test_measure_reports_percentiles_and_throughput():
+    stats = measure(lambda: [1, 2, 3], repeat=4, warmup=1, items=len)
+    assert stats["repeat"] == 4
+    assert stats["min_ms"] <= stats["p50_ms"] <= stats["p95_ms"] <= stats["max_ms"]
+    assert stats["items_per_call"] == 3 and stats["throughput_per_s"] > 0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    def report(p50, extra=None):
+        benches = {"rule_r1": {"p50_ms": p50, "p95_ms": 10.0, "peak_mem_mb": 1.0}, "live": {"skipped": "no db"}}
+        benches.update(extra or {})
+        return {"results": {"0.1": {"benchmarks": benches}}}
+
+    rows = compare(report(10.0), report(12.0, {"rule_r9": {"p50_ms": 1.0}}), threshold=0.1)
+    by_key = {(r["benchmark"], r.get("metric")): r for r in rows}
+    assert by_key[("rule_r1", "p50_ms")]["status"] == "regressed"
+    assert by_key[("rule_r1", "p95_ms")]["status"] == "unchanged"
+    assert by_key[("rule_r9", None)]["status"] == "added"
+    assert not any(r["benchmark"] == "live" and r.get("metric") for r in rows)
+    assert compare(report(10.0), report(8.0))[0]["status"] == "improved"
+
+
+def test_aggregate_rules(tmp_path):
+    rules = _rules(tmp_path)
+    assert [r["accountId"] for r in rules.r1()] == ["M1", "M2", "M3", "M4"]
+    assert rules.r2(min_risky=3) == [{"deviceId": "DEV-R", "riskyAccounts": 4, "totalAccounts": 4}]
+    assert {r["accountId"]: r["ringSize"] for r in rules.r3(min_risky=3)} == {"M2": 3, "M3": 3}
+    r7 = rules.r7(min_risky=2)
+    assert [(r["accountId"], r["riskySenders"]) for r in r7] == [("M2", 2), ("M3", 2)]
+    assert r7[0]["txCount"] == 3
+
+
+def test_path_rules(tmp_path):
+    rules = _rules(tmp_path)
+    r8 = rules.r8(duration=4, amount=20000, min_hops=3, max_hops=5)
+    assert r8["alerts"] == [{"accountId": "V1", "pathLength": 3, "maxAmount": 50000.0, "timeSpan": 2}]
+
+    # Parallel ring and layering edges give every ring member four 3-hop cycles.
+    r9 = rules.r9(min_amount=5000, min_hops=3, max_hops=3, limit=20)
+    assert {a["accountId"] for a in r9["alerts"]} == {"M1", "M2", "M3"} and len(r9["alerts"]) == 12
+    assert rules.r9(min_amount=7500, min_hops=3, max_hops=3)["alerts"] == []
+
+    r10 = rules.r10(min_amount=5000, min_hops=3, max_hops=3, limit=20)
+    # Steps must increase: one ordering per member (1-2-3, 2-3-11, 3-11-12).
+    assert sorted(a["accountId"] for a in r10["alerts"]) == ["M1", "M2", "M3"]
+
+    capped = rules.r9(min_amount=0, min_hops=3, max_hops=6, budget=1)
+    assert capped["truncated"] is True
+
+
+def test_faf_features_come_from_the_snapshot(tmp_path):
+    from backend.benchmarks.run import snapshot_features
+
+    snap = _rules(tmp_path).snap
+    m1, m4 = snap.account_index("M1"), snap.account_index("M4")
+    assert snapshot_features(snap, m4, max_degree=4) == {
+        "account_id": "M4",
+        "graph_centrality": 0.75,
+        "num_new_recipients_24h": 3,
+        "impossible_travel_flag": False,
+    }
+    assert snapshot_features(snap, m1, max_degree=4)["graph_centrality"] == 1.0
@@ -0,0 +1,76 @@
+from backend.services.bulk_export import Checkpoint, Throughput, grid_rounds, pair_rounds
+
+
+def test_grid_rounds_cover_every_cell_without_shared_buckets():
+    rounds = grid_rounds(4)
+    cells = [cell for r in rounds for cell in r]
+    assert sorted(cells) == [(i, j) for i in range(4) for j in range(4)]
+    for r in rounds:
+        assert len({src for src, _ in r}) == len(r)
+        assert len({dst for _, dst in r}) == len(r)
+
+
+def test_pair_rounds_never_share_a_bucket_between_workers():
+    for partitions in (1, 4, 5):
+        rounds = pair_rounds(partitions)
+        cells = [cell for r in rounds for group in r for cell in group]
+        assert sorted(cells) == [(i, j) for i in range(partitions) for j in range(partitions)]
+        for r in rounds:
+            buckets = [{b for cell in group for b in cell} for group in r]
+            # Sources and destinations are the same accounts, so src and dst buckets must not overlap across workers.
+            assert sum(len(b) for b in buckets) == len(set().union(*buckets))
+
+
+def test_checkpoint_resumes_cells_after_their_last_key_and_discards_mismatched_meta(tmp_path):
+    path = tmp_path / "cache" / "export.checkpoint"
+    meta = {"resume": "keyset", "partitions": 4}
+    cp = Checkpoint(path, meta)
+    cp.mark("accounts:0", 500, ["ACC-0500"])
+    cp.finish("accounts:0")
+    cp.mark("account_device:1-2", 500, ["ACC-0100", "DEV-9"])
+    cp.mark("account_device:1-2", 500, ["ACC-0200", "DEV-3"])
+    cp.close()
+
+    resumed = Checkpoint(path, meta)
+    assert resumed.resumed == 2
+    assert resumed.is_done("accounts:0")
+    assert not resumed.is_done("account_device:1-2")
+    assert resumed.position("account_device:1-2") == ["ACC-0200", "DEV-3"]
+    assert resumed.position("accounts:1") is None
+    resumed.close()
+
+    changed = Checkpoint(path, {"resume": "keyset", "partitions": 8})
+    assert changed.resumed == 0
+    assert not changed.is_done("accounts:0")
+    changed.close(completed=True)
+    assert not path.exists()
+
+
+def test_checkpoint_ignores_torn_last_line(tmp_path):
+    path = tmp_path / "export.checkpoint"
+    meta = {"resume": "keyset", "partitions": 1}
+    cp = Checkpoint(path, meta)
+    cp.mark("devices:0", 10, ["DEV-10"])
+    cp.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"cell": "devices:0", "after": ["DEV-2')
+
+    resumed = Checkpoint(path, meta)
+    assert resumed.position("devices:0") == ["DEV-10"]
+    resumed.mark("devices:0", 10, ["DEV-20"])
+    resumed.close()
+    assert Checkpoint(path, meta).position("devices:0") == ["DEV-20"]
+
+
+def test_throughput_reports_rows_per_entity():
+    tp = Throughput()
+    tp.begin("accounts")
+    tp.add("accounts", 500)
+    tp.add("accounts", 250)
+    tp.skip("accounts")
+    tp.end("accounts")
+    report = tp.report()["accounts"]
+    assert report["rows"] == 750
+    assert report["batches"] == 2
+    assert report["skipped_cells"] == 1
+    assert report["rows_per_second"] > 0
@@ -0,0 +1,23 @@
+from backend.services.community_detection import detect_communities
+
+
+def _clique(prefix, size):
+    return [(f"{prefix}{i}", f"{prefix}{j}", 1) for i in range(size) for j in range(i + 1, size)]
+
+
+def test_louvain_splits_bridged_rings():
+    edges = _clique("a", 5) + _clique("b", 5) + [("a0", "b0", 1), ("x", "y", 1)]
+    communities = detect_communities(edges)
+
+    ring_a = {communities[f"a{i}"] for i in range(5)}
+    ring_b = {communities[f"b{i}"] for i in range(5)}
+    assert len(ring_a) == 1 and len(ring_b) == 1
+    assert ring_a != ring_b
+    assert communities["a0"][1] == 5
+    assert communities["x"] == communities["y"]
+    assert communities["x"][1] == 2
+
+
+def test_singletons_are_not_communities():
+    communities = detect_communities([("solo", "solo", 1)])
+    assert communities == {}
@@ -0,0 +1,29 @@
+import os
+
+from backend.services.graph_cache import RenderCache, graph_fingerprint
+
+
+def test_fingerprint_ignores_order():
+    nodes = [{"id": "A", "type": "Account"}, {"id": "B", "type": "Device"}]
+    edges = [{"source": "A", "target": "B", "type": "HAS_IDENTIFIER"}]
+    assert graph_fingerprint(nodes, edges) == graph_fingerprint(list(reversed(nodes)), edges)
+    assert graph_fingerprint(nodes, edges) != graph_fingerprint(nodes[:1], [])
+
+
+def test_render_cache_hits_and_evicts_lru(tmp_path):
+    cache = RenderCache(tmp_path, max_bytes=250)
+    assert cache.get("aaa") is None
+    first = cache.put("aaa", b"x" * 100)
+    cache.put("bbb", b"y" * 100)
+    os.utime(first, (1, 1))
+    os.utime(cache.path_for("bbb"), (2, 2))
+    assert cache.get("aaa") == first  # hit refreshes aaa, leaving bbb least recently used
+
+    cache.put("ccc", b"z" * 100)
+    assert cache.get("bbb") is None
+    assert cache.get("aaa") == first
+
+    stats = cache.stats()
+    assert stats["files"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.services.graph_snapshot import GraphSnapshot, arrays_from_csv, build_arrays, write_snapshot  # noqa: E402
+
+
+def _tables():
+    accounts = {
+        "id": [10, 11, 12],
+        "account_number": ["GOOD-3", "GOOD-1", "MULE-2"],
+        "risk_score": ["0.2", "", "0.9"],
+        "is_fraud": ["false", "false", "true"],
+    }
+    devices = {"id": [1, 2], "device_id": ["DEV-B", "DEV-A"]}
+    links = {"account_id": [10, 11, 12], "device_id": [1, 1, 2]}
+    transactions = {
+        "tx_ref": ["TX-1", "TX-2", "TX-3"],
+        "from_account_id": [12, 11, 12],
+        "to_account_id": [10, 10, 11],
+        "amount": ["100.50", "20", "7"],
+        "timestamp": ["2024-01-01T00:00:00", "2024-01-01T01:00:00", "2024-01-01T02:00:00.5"],
+        "is_flagged": ["true", "false", "true"],
+        "global_step": ["1", "2", ""],
+    }
+    return accounts, devices, links, transactions
+
+
+def test_snapshot_round_trip_is_memory_mapped(tmp_path):
+    path = write_snapshot(tmp_path / "snap", build_arrays(*_tables()), source="test")
+    snap = GraphSnapshot(path)
+    assert isinstance(snap.out_targets, np.memmap)
+    assert snap.meta["transactions"] == 3
+
+    mule = snap.account_index("MULE-2")
+    good3 = snap.account_index("GOOD-3")
+    assert snap.account_index("NOPE") is None
+    assert snap.account_key(mule) == "MULE-2"
+    assert bool(snap.account_fraud[mule]) and np.isnan(snap.account_risk[snap.account_index("GOOD-1")])
+
+    out = snap.out_edges(mule)
+    assert sorted(snap.account_key(t) for t in snap.out_targets[out]) == ["GOOD-1", "GOOD-3"]
+    assert sorted(snap.out_tx_ref[out].tolist()) == [b"TX-1", b"TX-3"]
+    assert sorted(snap.out_step[out].tolist()) == [-1, 1]
+
+    assert sorted(snap.account_key(s) for s in snap.in_sources(good3)) == ["GOOD-1", "MULE-2"]
+    assert snap.in_degree().sum() == snap.out_degree().sum() == 3
+
+    dev_b = int(np.searchsorted(snap.device_id, b"DEV-B"))
+    assert sorted(snap.account_key(a) for a in snap.accounts_on_device(dev_b)) == ["GOOD-1", "GOOD-3"]
+    assert snap.devices_of(mule).tolist() == [int(np.searchsorted(snap.device_id, b"DEV-A"))]
+
+
+def test_snapshot_from_csv_and_overwrite(tmp_path):
+    accounts, devices, links, transactions = _tables()
+    data = tmp_path / "data"
+    data.mkdir()
+    for name, cols in (("accounts", accounts), ("devices", devices), ("account_device", links), ("transactions", transactions)):
+        keys = list(cols)
+        lines = [",".join(keys)] + [",".join(str(cols[k][i]) for k in keys) for i in range(len(cols[keys[0]]))]
+        (data / f"{name}.csv").write_text("\n".join(lines) + "\n")
+
+    path = tmp_path / "snap"
+    write_snapshot(path, arrays_from_csv(data))
+    first = GraphSnapshot(path)
+    write_snapshot(path, arrays_from_csv(data), source="second")
+    # A reader opened before the swap keeps reading its own version.
+    assert first.meta["source"] == "" and first.account_key(0) == "GOOD-1"
+    assert GraphSnapshot(path, mmap=False).meta["source"] == "second"
+    assert path.is_symlink()
+
+    write_snapshot(path, arrays_from_csv(data), source="third")
+    versions = sorted(p.name for p in tmp_path.iterdir() if p.name.startswith("."))
+    assert len(versions) == 2 and os.readlink(path) in versions
+    assert GraphSnapshot(path).meta["source"] == "third"
+
+
+def test_snapshot_replaces_a_plain_directory(tmp_path):
+    path = tmp_path / "snap"
+    path.mkdir()
+    (path / "meta.json").write_text("{}")
+    write_snapshot(path, build_arrays(*_tables()))
+    assert path.is_symlink() and GraphSnapshot(path).meta["accounts"] == 3
+
+
+def test_unknown_reference_is_rejected():
+    accounts, devices, links, transactions = _tables()
+    transactions["to_account_id"][0] = 99
+    with pytest.raises(ValueError):
+        build_arrays(accounts, devices, links, transactions)
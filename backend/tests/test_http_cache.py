@@ -0,0 +1,68 @@
+from flask import Flask, jsonify
+
+from backend.services.http_cache import bump_graph_version, conditional, graph_version, make_etag
+
+
+class _Result:
+    def __init__(self, record):
+        self._record = record
+
+    def single(self):
+        return self._record
+
+
+class _Session:
+    def __init__(self):
+        self.version = None
+
+    def run(self, cypher):
+        if cypher.lstrip().startswith("MERGE"):
+            self.version = (self.version or 0) + 1
+        return _Result({"version": self.version} if self.version is not None else None)
+
+    def execute_read(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
+
+def test_conditional_skips_build_when_etag_matches():
+    app = Flask(__name__)
+    built = []
+
+    @app.route("/items")
+    def items():
+        def build():
+            built.append(1)
+            return jsonify([1, 2, 3])
+
+        return conditional(make_etag("items", 3), build)
+
+    @app.route("/missing")
+    def missing():
+        return conditional("x", lambda: (jsonify({"status": "error"}), 404))
+
+    client = app.test_client()
+    first = client.get("/items")
+    assert first.status_code == 200 and first.get_json() == [1, 2, 3]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    etag = first.headers["ETag"]
+
+    second = client.get("/items", headers={"If-None-Match": etag})
+    assert second.status_code == 304 and second.headers["ETag"] == etag
+    assert len(built) == 1
+    assert client.get("/items", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    error = client.get("/missing")
+    assert error.status_code == 404 and "ETag" not in error.headers
+
+
+def test_graph_version_falls_back_to_time_bucket_until_bumped():
+    session = _Session()
+    assert graph_version(session).startswith("t")
+    assert bump_graph_version(session) == 1
+    assert graph_version(session) == "v1"
+    bump_graph_version(session)
+    assert graph_version(session) == "v2"
+    assert make_etag("a", 1) != make_etag("a", 2)
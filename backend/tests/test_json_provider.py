@@ -0,0 +1,64 @@
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from flask import Flask, jsonify
+from neo4j.spatial import CartesianPoint
+from neo4j.time import Date, DateTime, Duration
+
+from backend.services import compression
+from backend.services.compression import compress_response
+from backend.services.json_provider import FastJSONProvider, dumps_bytes
+
+
+def _app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
+
+    @app.route("/big")
+    def big():
+        return jsonify([{"id": i, "label": f"node-{i}"} for i in range(200)])
+
+    @app.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    return app
+
+
+def test_neo4j_and_stdlib_values_serialize_in_one_pass():
+    payload = {
+        "ts": DateTime(2024, 5, 1, 12, 30, 0),
+        "day": Date(2024, 5, 1),
+        "window": Duration(days=2),
+        "where": CartesianPoint((1.5, 2.0)),
+        "created": datetime(2024, 5, 1, 12, 30),
+        "amount": Decimal("10.50"),
+        "tags": {"a"},
+        7: "int key",
+    }
+    out = json.loads(dumps_bytes(payload))
+    assert out["ts"].startswith("2024-05-01T12:30:00") and out["day"] == "2024-05-01"
+    assert out["window"] == "P2D"
+    assert out["where"] == {"srid": 7203, "x": 1.5, "y": 2.0}
+    assert out["created"] == "Wed, 01 May 2024 12:30:00 GMT"
+    assert out["amount"] == "10.50" and out["tags"] == ["a"] and out["7"] == "int key"
+    assert json.loads(dumps_bytes({"big": 2**70}))["big"] == 2**70
+
+
+def test_large_responses_are_compressed_per_accept_encoding(monkeypatch):
+    monkeypatch.setattr(compression, "ENCODINGS", ["gzip"])
+    client = _app().test_client()
+
+    plain = client.get("/big")
+    assert "Content-Encoding" not in plain.headers and plain.headers["Vary"] == "Accept-Encoding"
+
+    zipped = client.get("/big", headers={"Accept-Encoding": "br;q=1, gzip;q=0.5"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert len(zipped.data) < len(plain.data)
+    assert gzip.decompress(zipped.data) == plain.data
+
+    assert "Content-Encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "Content-Encoding" not in client.get("/big", headers={"Accept-Encoding": "gzip;q=0"}).headers
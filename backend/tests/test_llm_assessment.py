@@ -0,0 +1,39 @@
+import threading
+
+from backend.services.llm_assessment import AssessmentService, StubBackend
+
+GRAPH = {"nodes": [{"id": "A"}], "edges": []}
+
+
+def test_repeated_assessments_hit_cache():
+    backend = StubBackend()
+    service = AssessmentService(backend, ttl_seconds=60)
+
+    first, cached_first = service.assess("R1", "A", GRAPH, "fp-1")
+    second, cached_second = service.assess("R1", "A", GRAPH, "fp-1")
+    assert first == second
+    assert (cached_first, cached_second) == (False, True)
+    assert backend.calls == 1
+
+    # A changed neighborhood has a new fingerprint and is assessed again.
+    service.assess("R1", "A", GRAPH, "fp-2")
+    assert backend.calls == 2
+
+
+def test_concurrent_identical_requests_share_one_call():
+    backend = StubBackend(delay=0.2)
+    service = AssessmentService(backend, ttl_seconds=60)
+    results = []
+
+    def worker():
+        results.append(service.assess("R3", "MULE-1", GRAPH, "fp")[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert backend.calls == 1
+    assert len(set(results)) == 1 and len(results) == 8
+    assert service.stats()["coalesced"] >= 1
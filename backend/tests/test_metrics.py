@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, text
+
+from backend.services.metrics import RequestMetrics, count_query, end_request, install_sqlalchemy, start_request, submit_in_context
+from backend.services.neo4j_client import bookmarks, instrument_driver
+
+
+class _FakeTx:
+    def run(self, query, **params):
+        return [query]
+
+
+class _FakeSession:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        return [query]
+
+    def execute_read(self, fn, *args, **kwargs):
+        return fn(_FakeTx(), *args, **kwargs)
+
+
+class _FakeDriver:
+    closed = False
+
+    def session(self, **kwargs):
+        return _FakeSession()
+
+    def close(self):
+        self.closed = True
+
+
+def test_counts_sql_and_cypher_per_request():
+    engine = create_engine("sqlite://")
+    install_sqlalchemy(engine)
+    driver = instrument_driver(_FakeDriver())
+
+    counter = start_request()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        with driver.session() as session:
+            session.run("RETURN 1")
+            session.execute_read(lambda tx, n: [tx.run("RETURN $n", n=n) for _ in range(n)], 3)
+    finally:
+        end_request()
+
+    assert counter.sql == 2
+    assert counter.neo4j == 4
+    count_query("sql")  # outside a request: ignored
+    assert counter.sql == 2
+    driver.close()
+    assert driver._driver.closed
+
+
+def test_pool_work_counts_towards_submitting_request():
+    counter = start_request()
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [submit_in_context(pool, count_query, "neo4j") for _ in range(5)]
+            for fut in futures:
+                fut.result()
+            pool.submit(count_query, "neo4j").result()  # plain submit loses the request context
+    finally:
+        end_request()
+    assert counter.neo4j == 5
+
+
+def test_prometheus_rendering():
+    metrics = RequestMetrics()
+    metrics.observe("GET", "/api/alerts", 200, 0.03, sql=12, neo4j=0, size=2048)
+    metrics.observe("GET", "/api/alerts", 200, 0.2, sql=1, neo4j=0, size=100)
+    metrics.observe("GET", "/api/neo-alerts/<rule>", 500, 1.5, sql=0, neo4j=3, size=10)
+    text_out = metrics.render()
+
+    assert 'http_requests_total{method="GET",endpoint="/api/alerts",status="200"} 2' in text_out
+    assert 'http_request_duration_seconds_bucket{method="GET",endpoint="/api/alerts",le="0.05"} 1' in text_out
+    assert 'http_request_duration_seconds_bucket{method="GET",endpoint="/api/alerts",le="+Inf"} 2' in text_out
+    assert 'http_request_duration_seconds_count{method="GET",endpoint="/api/alerts"} 2' in text_out
+    assert 'http_request_sql_queries_bucket{method="GET",endpoint="/api/alerts",le="10"} 1' in text_out
+    assert 'http_request_sql_queries_sum{method="GET",endpoint="/api/alerts"} 13' in text_out
+    assert 'http_response_size_bytes_sum{method="GET",endpoint="/api/alerts"} 2148' in text_out
+    assert 'http_request_neo4j_queries_bucket{method="GET",endpoint="/api/neo-alerts/<rule>",le="2"} 0' in text_out
+    assert "# TYPE http_request_duration_seconds histogram" in text_out
+
+
+def test_sessions_share_the_process_bookmark_manager():
+    opened = []
+
+    class _Driver(_FakeDriver):
+        def session(self, **kwargs):
+            opened.append(kwargs)
+            return _FakeSession()
+
+    driver = instrument_driver(_Driver())
+    with driver.session():
+        pass
+    with driver.session(database="neo4j"):
+        pass
+
+    assert [kw["bookmark_manager"] for kw in opened] == [bookmarks, bookmarks]
+    assert opened[1]["database"] == "neo4j"
@@ -0,0 +1,81 @@
+from backend.services.neighborhood import account_graph, identifier_graph
+from backend.services.rule_queries import ACCOUNT_GRAPH_CYPHER, DEVICE_GRAPH_CYPHER
+
+
+class _Result:
+    def __init__(self, record):
+        self._record = record
+
+    def single(self):
+        return self._record
+
+
+class _Session:
+    def __init__(self, record):
+        self.record = record
+        self.ran = []
+
+    def run(self, cypher, **params):
+        self.ran.append((cypher, params))
+        return _Result(self.record)
+
+    def execute_read(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
+
+def _acc(key, **props):
+    return dict({"key": key, "name": f"Name {key}", "mule": False}, **props)
+
+
+def _tx(key, amount):
+    return {"key": key, "amount": amount, "tags": None}
+
+
+def test_account_graph_builds_deduplicated_nodes_and_edges():
+    phone = {"key": "0917", "kind": "Phone"}
+    record = {
+        "anchor": _acc("MULE-1", mule=True),
+        "identifiers": [phone],
+        "idPeers": [{"identifier": phone, "peer": _acc("C-2")}, {"identifier": phone, "peer": _acc("C-2")}],
+        "outbound": [{"tx": _tx("T1", 500), "other": _acc("C-2")}, {"tx": _tx("T1", 500), "other": _acc("C-2")}],
+        "inbound": [{"tx": _tx("T2", 90), "other": _acc("C-3", is_fraud="true")}],
+        "truncated": {"outbound": True, "inbound": False},
+    }
+    session = _Session(record)
+    graph = account_graph(session, "MULE-1", tx=7)
+
+    cypher, params = session.ran[0]
+    assert cypher == ACCOUNT_GRAPH_CYPHER and params["txLimit"] == 7 and params["accountId"] == "MULE-1"
+    nodes = {n["id"]: n for n in graph["nodes"]}
+    assert set(nodes) == {"MULE-1", "0917", "C-2", "C-3", "T1", "T2"}
+    assert nodes["MULE-1"]["isSubject"] and nodes["MULE-1"]["isFlagged"]
+    assert nodes["0917"]["deviceType"] == "Phone"
+    assert nodes["C-3"]["isFlagged"] and not nodes["C-2"]["isFlagged"]
+    edges = {(e["source"], e["target"], e["type"]) for e in graph["edges"]}
+    assert len(edges) == len(graph["edges"]) == 6
+    assert ("MULE-1", "T1", "PERFORMS") in edges and ("T2", "MULE-1", "TO") in edges
+    assert graph["truncated"] == {"outbound": True, "inbound": False}
+
+
+def test_identifier_graph_links_transactions_to_sharing_accounts():
+    record = {
+        "anchor": {"key": "a@b.c", "kind": "Email"},
+        "accounts": [_acc("C-1"), _acc("C-2")],
+        "outbound": [{"tx": _tx("T1", 10), "other": _acc("C-9"), "account": "C-1"}],
+        "inbound": [{"tx": _tx("T2", 20), "other": _acc("C-1"), "account": "C-2"}],
+        "truncated": {"accounts": False},
+    }
+    session = _Session(record)
+    graph = identifier_graph(session, "a@b.c", devices=True)
+    assert session.ran[0][0] == DEVICE_GRAPH_CYPHER
+    assert [n["id"] for n in graph["nodes"] if n.get("isSubject")] == ["a@b.c"]
+    edges = [(e["source"], e["target"], e["type"]) for e in graph["edges"]]
+    assert edges == [
+        ("C-1", "a@b.c", "HAS_IDENTIFIER"),
+        ("C-2", "a@b.c", "HAS_IDENTIFIER"),
+        ("C-1", "T1", "PERFORMS"),
+        ("T1", "C-9", "TO"),
+        ("C-1", "T2", "PERFORMS"),
+        ("T2", "C-2", "TO"),
+    ]
+    assert identifier_graph(_Session(None), "missing") is None
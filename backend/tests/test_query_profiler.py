@@ -0,0 +1,134 @@
+from backend.services.query_profiler import ProfileStore, compare_profiles, plan_tree, run_profile, summarize_plan
+from backend.services.rule_queries import ACCOUNT_GRAPH_CYPHER, DEVICE_GRAPH_CYPHER, RULE_QUERIES, clamp_hops, neighborhood_params
+
+
+def _profile(leaf="NodeByLabelScan@neo4j", hits=100):
+    return {
+        "operatorType": "ProduceResults@neo4j",
+        "dbHits": 0,
+        "rows": 5,
+        "args": {"Details": "accountId"},
+        "children": [
+            {"operatorType": "Limit@neo4j", "dbHits": 0, "rows": 5, "children": [{"operatorType": leaf, "dbHits": hits, "rows": 50, "args": {"Details": "a:Mule"}}]}
+        ],
+    }
+
+
+class _Summary:
+    def __init__(self, profile):
+        self.profile = profile
+
+
+class _Result:
+    def __init__(self, profile=None, value=None):
+        self._profile = profile
+        self._value = value
+
+    def consume(self):
+        return _Summary(self._profile)
+
+    def single(self):
+        return {"value": self._value}
+
+
+class _Session:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, cypher, **params):
+        if not cypher.startswith("PROFILE"):
+            return _Result(value="MULE-1")
+        self.driver.ran.append((cypher, params))
+        if "TRANSACTED_WITH WHERE" in cypher:
+            raise RuntimeError("boom")
+        return _Result(self.driver.profile)
+
+
+class _Driver:
+    def __init__(self, profile):
+        self.profile = profile
+        self.ran = []
+
+    def session(self):
+        return _Session(self)
+
+
+def test_plan_tree_and_summary():
+    tree = plan_tree(_profile("AllNodesScan@neo4j", hits=2000))
+    assert tree["operator"] == "ProduceResults"
+    assert tree["children"][0]["children"][0]["details"] == "a:Mule"
+    summary = summarize_plan(tree)
+    assert summary["dbHits"] == 2000
+    assert summary["rows"] == 5
+    assert summary["operators"] == {"AllNodesScan": 1, "Limit": 1, "ProduceResults": 1}
+    assert summary["riskyOperators"] == ["AllNodesScan"]
+
+
+def test_compare_flags_new_operators_hits_and_errors():
+    def report(commit, leaf, hits, error=None):
+        entry = {"error": error} if error else summarize_plan(plan_tree(_profile(leaf, hits)))
+        return {"commit": commit, "queries": {"R1": summarize_plan(plan_tree(_profile())), "R2": entry}}
+
+    base = report("aaa", "NodeByLabelScan", 100)
+    assert compare_profiles(base, report("bbb", "NodeByLabelScan", 120)) == []
+    kinds = {r["kind"] for r in compare_profiles(base, report("bbb", "AllNodesScan", 5000))}
+    assert kinds == {"new_operator", "db_hits"}
+    assert compare_profiles(base, report("bbb", "x", 0, error="timeout"))[0]["kind"] == "error"
+    assert compare_profiles(None, report("bbb", "CartesianProduct", 1))[0]["kind"] == "risky_operator"
+
+
+def test_run_profile_stores_runs_and_uses_previous_as_baseline(tmp_path):
+    store = ProfileStore(tmp_path)
+    driver = _Driver(_profile())
+    first = run_profile(driver, "xavier", store, commit="aaa")
+    assert first["baseline"] is None
+    assert set(first["queries"]) == set(RULE_QUERIES)
+    assert "error" in first["queries"]["R9"]
+    graph_params = [p for c, p in driver.ran if "$accountId" in c][0]
+    assert graph_params["accountId"] == "MULE-1"
+    assert all(c.startswith("PROFILE") for c, _ in driver.ran)
+
+    driver.profile = _profile("AllNodesScan@neo4j", hits=10_000)
+    second = run_profile(driver, "xavier", store, names=["R1"], commit="bbb")
+    assert second["baseline"] == "aaa"
+    assert [r["kind"] for r in second["regressions"]] == ["new_operator", "db_hits"]
+
+    assert [r["commit"] for r in store.runs("xavier")][0] in {"aaa", "bbb"}
+    assert store.load("xavier", "aaa")["commit"] == "aaa"
+    assert store.load("other", "aaa") is None
+
+
+def test_store_paths_stay_under_the_root(tmp_path):
+    store = ProfileStore(tmp_path / "profiles")
+    for name in ("..", ".", "", "../etc", "a/b"):
+        path = store.path_for(name, name)
+        assert path.resolve().is_relative_to(store.root.resolve())
+    assert store.path_for("..", "v1.2").parent.name == "_"
+    assert store.path_for("..", "v1.2").name == "v1.2.json"
+
+
+def test_registry_builds_route_cypher():
+    cypher, params = RULE_QUERIES["R9"].cypher({"minHops": 3, "maxHops": 40, "name": None})
+    assert "{name: $name}" not in cypher
+    assert "->{3,15}(c)" in cypher
+    assert params["minAmount"] == 1200000
+    assert clamp_hops(0, 3) == (1, 3)
+
+
+def test_neighborhood_queries_are_bounded_per_direction():
+    params = neighborhood_params(tx=7, account=0)
+    assert (params["txLimit"], params["txFetch"]) == (7, 8)
+    assert (params["accountLimit"], params["accountFetch"]) == (1, 2)
+    for cypher in (ACCOUNT_GRAPH_CYPHER, DEVICE_GRAPH_CYPHER):
+        assert "OPTIONAL MATCH" not in cypher
+        assert cypher.count("LIMIT $txFetch") == 2
+        assert "AS truncated" in cypher
+    assert ACCOUNT_GRAPH_CYPHER.count("CALL {") == 4
+    _, graph_params = RULE_QUERIES["ACCOUNT_GRAPH"].cypher({"accountId": "MULE-1"})
+    assert graph_params["peerFetch"] == graph_params["peerLimit"] + 1
@@ -0,0 +1,51 @@
+from pathlib import Path
+from xml.etree import ElementTree
+
+from backend.services.graph_cache import RenderCache
+from backend.services.render_service import RenderService, graph_to_svg
+
+NODES = [
+    {"id": "ACC-1", "label": "Subject", "type": "Account", "isSubject": True},
+    {"id": "EMAIL-1", "label": "a@b.c", "type": "Device"},
+]
+EDGES = [{"source": "ACC-1", "target": "EMAIL-1", "type": "HAS_IDENTIFIER"}]
+
+
+def test_small_graph_renders_svg_in_process(tmp_path):
+    service = RenderService(RenderCache(tmp_path, max_bytes=1024 * 1024), svg_max_nodes=10)
+    result = service.render(NODES, EDGES, fmt="auto")
+    assert result["status"] == "ready"
+    assert result["format"] == "svg"
+    assert Path(result["path"]).read_text().startswith("<svg")
+    assert service.stats()["completed"] == 0  # no dot process involved
+
+
+def test_full_queue_rejects_instead_of_blocking(tmp_path):
+    service = RenderService(RenderCache(tmp_path, max_bytes=1024 * 1024), max_pending=0)
+    result = service.render(NODES, EDGES, fmt="png")
+    assert result["status"] == "rejected"
+    assert service.stats()["rejected"] == 1
+
+
+def test_invalid_handle_is_rejected(tmp_path):
+    service = RenderService(RenderCache(tmp_path, max_bytes=1024))
+    assert service.status("../../etc/passwd.png")["status"] == "invalid"
+
+
+def test_failures_are_visible_to_every_worker_sharing_the_cache(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError("dot missing")
+
+    monkeypatch.setattr("backend.services.render_service.subprocess.run", fail)
+    service = RenderService(RenderCache(tmp_path, max_bytes=1024 * 1024))
+    handle = service.render(NODES, EDGES, fmt="png", wait=5)["handle"]
+
+    other_worker = RenderService(RenderCache(tmp_path, max_bytes=1024 * 1024))
+    assert other_worker.status(handle) == {"handle": handle, "status": "failed", "error": "dot missing", "format": "png"}
+    assert other_worker.status("0" * 64 + ".png")["status"] == "unknown"
+    assert service.stats()["failed"] == 1
+
+
+def test_svg_labels_are_truncated_before_escaping():
+    svg = graph_to_svg([{"id": "ACC-1", "label": "A" * 31 + "&B", "type": "Account", "isSubject": True}], [])
+    assert ElementTree.fromstring(svg).find("{http://www.w3.org/2000/svg}text").text == "A" * 31 + "&"
@@ -0,0 +1,101 @@
+from sqlalchemy import create_engine, text
+
+from backend.services.neighborhood import identifier_query
+from backend.services.neo4j_client import _call_params, fetch_single, instrument_driver
+from backend.services.slow_queries import SlowQueryLog, install_slow_sql_log, query_tags, redact_params, set_tags, slow_query_log
+
+
+class _FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def single(self):
+        return self._rows[0] if self._rows else None
+
+
+class _FakeSession:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **params):
+        return _FakeResult([{"n": 1}])
+
+    def execute_read(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
+
+class _FakeDriver:
+    def session(self, **kwargs):
+        return _FakeSession()
+
+
+def test_redacts_sensitive_and_bulky_parameters():
+    params = {"accountId": "MULE-1", "ruleId": "R1", "name": "Aubree David", "password": "x", "ids": list(range(50)), "note": "y" * 100, "limit": 5}
+    red = redact_params(params)
+    assert red["accountId"] == "***" and red["ruleId"] == "R1" and red["limit"] == 5
+    assert red["name"] == "***" and red["password"] == "***"
+    assert red["ids"] == "<list of 50>"
+    assert red["note"].startswith("y" * 64) and red["note"].endswith("(100 chars)")
+    assert redact_params([{"email": "a@b"}, {"email": "c@d"}]) == [{"email": "***"}, "... 2 parameter sets"]
+    assert redact_params(("GCASH-1", 5)) == ["***", 5]
+
+
+def test_redacts_lookup_values_in_nested_transaction_params():
+    cypher, params = identifier_query("jane.doe@example.com")
+    assert redact_params(params)["identifier"] == "***"
+    # neo4j_tx entries record fetch_single's arguments, with the query parameters nested.
+    for args in ((cypher, params), ("MATCH (n) RETURN n", {"qLower": "jane.doe"})):
+        red = redact_params(_call_params(fetch_single, args, {}))
+        assert set(red) == {"cypher", "params"}
+        assert "jane.doe" not in repr(red)
+    assert redact_params({"q": "09171234567", "limit": 15}) == {"q": "***", "limit": 15}
+
+
+def test_ring_buffer_keeps_newest_above_threshold():
+    log = SlowQueryLog(threshold_ms=10, capacity=2)
+    assert not log.record("sql", "SELECT 1", None, 5)
+    set_tags(endpoint="/api/alerts")
+    with query_tags(rule="R7"):
+        for i in range(3):
+            log.record("sql", f"SELECT   {i}\n FROM t", {"a": i}, 20 + i)
+    set_tags()
+    entries = log.entries()
+    assert [e["statement"] for e in entries] == ["SELECT 2 FROM t", "SELECT 1 FROM t"]
+    assert entries[0]["tags"] == {"endpoint": "/api/alerts", "rule": "R7"}
+    assert log.stats() == {"thresholdMs": 10, "capacity": 2, "buffered": 2, "recorded": 3}
+    assert log.entries(kind="neo4j") == []
+
+
+def test_sql_and_neo4j_queries_are_logged_with_tags(monkeypatch):
+    log = SlowQueryLog(threshold_ms=0)
+    engine = create_engine("sqlite://")
+    install_slow_sql_log(engine, log)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT :token AS t"), {"token": "secret"})
+    [sql] = log.entries(kind="sql")
+    assert sql["params"] == {"token": "***"}
+
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0)
+    slow_query_log.clear()
+
+    def fetch_r7(tx, risk_threshold, limit):
+        return [r for r in tx.run("MATCH (n) RETURN n LIMIT $limit", limit=limit)]
+
+    driver = instrument_driver(_FakeDriver())
+    with query_tags(rule="R7"):
+        with driver.session() as session:
+            session.execute_read(fetch_r7, 0.8, limit=5)
+            session.run("RETURN $name", {"name": "x"}).single()
+
+    run_entry, tx_entry, query_entry = slow_query_log.entries()
+    assert query_entry["kind"] == "neo4j" and query_entry["params"] == {"limit": 5}
+    assert query_entry["tags"] == {"rule": "R7", "function": "fetch_r7"}
+    assert tx_entry["kind"] == "neo4j_tx" and tx_entry["statement"] == "fetch_r7"
+    assert tx_entry["params"] == {"risk_threshold": 0.8, "limit": 5}
+    assert run_entry["params"] == {"name": "***"} and run_entry["tags"] == {"rule": "R7"}
@@ -0,0 +1,148 @@
+import json
+import threading
+
+import pytest
+
+from backend.services.telegram_queue import SeenStore, SendQueue, UpdateQueue, UpdateQueueFull, retry_after_seconds
+
+
+class _Resp:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code, body):
+        super().__init__(f"HTTP {status_code}")
+        self.response = _Resp(status_code, body)
+
+
+def test_seen_store_persists_and_expires(tmp_path):
+    path = tmp_path / "seen.json"
+    store = SeenStore(path, ttl_seconds=60)
+    assert store.claim("R1|A1")
+    assert not store.claim("R1|A1")  # reserved while its message is queued
+    store.save()
+    assert not SeenStore(path).contains("R1|A1")
+    store.mark("R1|A1")
+    store.save()
+
+    reloaded = SeenStore(path, ttl_seconds=60)
+    assert reloaded.contains("R1|A1")
+    reloaded.discard("R1|A1")
+    assert reloaded.claim("R1|A1")
+
+    path.write_text(json.dumps({"R2|D1": 1.0}))
+    assert not SeenStore(path).contains("R2|D1")
+
+
+def test_retry_after_only_for_429():
+    assert retry_after_seconds(_HTTPError(429, {"parameters": {"retry_after": 7}})) == 7.0
+    assert retry_after_seconds(_HTTPError(400, {})) is None
+    assert retry_after_seconds(ValueError("boom")) is None
+
+
+def test_send_queue_retries_rate_limited_calls():
+    sleeps = []
+    sender = SendQueue(rate_per_second=0, sleep=sleeps.append)
+    attempts = []
+
+    def flaky(text):
+        attempts.append(text)
+        if len(attempts) == 1:
+            raise _HTTPError(429, {"parameters": {"retry_after": 3}})
+
+    def broken(text):
+        raise _HTTPError(400, {})
+
+    sender.enqueue(flaky, "hello")
+    sender.enqueue(broken, "bad")
+    assert sender.drain(timeout=5)
+    assert attempts == ["hello", "hello"]
+    assert 3.0 in sleeps
+    stats = sender.stats()
+    assert stats["sent"] == 1 and stats["failed"] == 1 and stats["rate_limited"] == 1
+
+
+def test_agent_marks_alerts_seen_only_after_delivery(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from backend import telegram_agent
+
+    seen = SeenStore(tmp_path / "seen.json")
+    sender = SendQueue(rate_per_second=0)
+    delivered = []
+
+    def send(token, chat_id, text):
+        if "A2" in text:
+            raise _HTTPError(400, {})
+        delivered.append(text)
+
+    alerts = [{"ruleKey": "R1", "accountId": "A1"}, {"ruleKey": "R1", "accountId": "A2"}]
+    assessed = []
+
+    def assess(endpoint, a):
+        assessed.append(a["accountId"])
+        raise RuntimeError("assess down")
+
+    monkeypatch.setattr(telegram_agent, "send_message", send)
+    monkeypatch.setattr(telegram_agent, "request_assessment", assess)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert telegram_agent.run_cycle(alerts, seen, sender, pool, "t", "c", "http://x") == (2, 0)
+        assert sender.drain(timeout=5)
+        # A1 went out despite its failed assessment; A2's send failed, so it is retried.
+        assert seen.contains("R1|A1") and not seen.contains("R1|A2")
+        assert telegram_agent.run_cycle(alerts, seen, sender, pool, "t", "c", "http://x") == (1, 1)
+        assert sender.drain(timeout=5)
+    assert len(delivered) == 1
+    # Only the delivered alert is assessed, once.
+    assert assessed == ["A1"]
+
+
+def test_update_queue_dedupes_and_records_latency():
+    handled = []
+    queue = UpdateQueue(lambda u: handled.append(u["update_id"]), workers=2)
+    assert queue.submit({"update_id": 1, "message": {}})
+    assert not queue.submit({"update_id": 1, "message": {}})
+    assert queue.submit({"update_id": 2, "message": {}})
+    assert queue.drain(timeout=5)
+    assert sorted(handled) == [1, 2]
+    stats = queue.stats()
+    assert stats["duplicates"] == 1 and stats["processed"] == 2
+    assert stats["processing_ms"]["p50"] is not None
+    queue.stop(timeout=5)
+
+
+def test_update_queue_starts_workers_on_demand_and_stops_them():
+    queue = UpdateQueue(lambda u: None, workers=2)
+    assert queue.stats()["workers"] == 0
+    queue.submit({"update_id": 1})
+    threads = list(queue._threads)
+    assert len(threads) == 2
+    queue.stop(timeout=5)
+    assert queue.stats()["processed"] == 1
+    assert not any(t.is_alive() for t in threads)
+
+
+def test_update_queue_rejects_when_full_without_remembering_id():
+    picked_up, release = threading.Event(), threading.Event()
+
+    def handle(update):
+        picked_up.set()
+        release.wait(5)
+
+    queue = UpdateQueue(handle, workers=1, max_pending=1)
+    queue.submit({"update_id": 1})
+    # Wait until the worker holds update 1 so the queue slot is free.
+    assert picked_up.wait(5)
+    queue.submit({"update_id": 2})
+    with pytest.raises(UpdateQueueFull):
+        queue.submit({"update_id": 3})
+    release.set()
+    assert queue.drain(timeout=5)
+    assert queue.submit({"update_id": 3})
+    queue.stop(timeout=5)
@@ -0,0 +1,33 @@
+from backend.services.top_k import TopKSelector, priority_score
+
+
+def test_keeps_best_by_severity_then_priority():
+    sel = TopKSelector(3)
+    rows = [
+        ("Medium", 0.9, "m1"),
+        ("High", 0.3, "h1"),
+        ("Critical", 0.1, "c1"),
+        ("High", 0.8, "h2"),
+        ("Medium", 0.99, "m2"),
+    ]
+    for sev, prio, item in rows:
+        if sel.accepts(sev, prio):
+            sel.push(sev, prio, item)
+    assert sel.results() == ["c1", "h2", "h1"]
+
+
+def test_ties_keep_arrival_order_and_reject_late_equals():
+    sel = TopKSelector(2)
+    for item in ["a", "b"]:
+        assert sel.accepts("High", 0.5)
+        sel.push("High", 0.5, item)
+    assert not sel.accepts("High", 0.5)
+    assert sel.results() == ["a", "b"]
+    assert sel.skipped == 1
+
+
+def test_priority_score_is_bounded():
+    assert priority_score("R3", {"ringSize": 50}) == 1.0
+    assert priority_score("R7", {"riskySenders": 5}) == 0.5
+    assert priority_score("FAF-001", {"afasa_risk_score": 80}) == 0.8
+    assert priority_score("FAF-001", {}) == 0.5